@@ -0,0 +1,13 @@
+from .common import *
+from .regs import AxiRegisterBank, Register
+from .regslice import SkidBuffer, AxiRegisterSlice
+from .monitor import AxiPerfMonitor
+from .dma import AxiReader, AxiWriter, AxiDma
+from .interconnect import AxiArbiter, AxiStriper
+from .sg import AxiSgDma, DESC_BYTES, DESC_FLAG_IRQ
+from .width import AxiWidthConverter
+from .coherent import *
+from .cdc import AsyncFifo, AsyncStreamFifo, AxiClockConverter
+from .irq import IrqController, IrqLatencyProbe
+from .mailbox import Mailbox
+from .ram import AxiRam
@@ -0,0 +1,184 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Cat
+from amaranth.lib.cdc import FFSynchronizer
+
+from .common import CHANNELS, MASTER_CHANNELS, SLAVE_CHANNELS, get_stream_record
+
+__all__ = ['AsyncFifo', 'AsyncStreamFifo', 'AxiClockConverter']
+
+
+def _gray_encode(m, value):
+    gray = Signal(len(value))
+    m.d.comb += gray.eq(value ^ (value >> 1))
+    return gray
+
+
+def _gray_decode(m, gray):
+    value = Signal(len(gray))
+    m.d.comb += value[-1].eq(gray[-1])
+    for i in reversed(range(len(gray) - 1)):
+        m.d.comb += value[i].eq(value[i + 1] ^ gray[i])
+    return value
+
+
+class AsyncFifo(Elaboratable):
+    '''
+        Valid/ready FIFO from ``w_domain`` to ``r_domain``, one transfer per
+        cycle on each side. The pointers cross as Gray codes through
+        ``FFSynchronizer``s; with ``max_delay`` (seconds, see
+        ``get_cdc_max_delay``) the synchronizer inputs get a datapath only
+        maximum delay instead of a false path, which bounds the pointer skew.
+
+        ``w_level`` and ``r_level`` are the fill levels as seen from each
+        side, the other side's pointer arrives a few cycles late. Both
+        domains must be reset together. ``depth`` is a power of two, 8 or
+        more entries hide the synchronizer latency.
+    '''
+    def __init__(self, width, depth, w_domain, r_domain, max_delay=None):
+        assert depth >= 2 and depth & (depth - 1) == 0
+        self.width = width
+        self.depth = depth
+        self.w_domain = w_domain
+        self.r_domain = r_domain
+        self.max_delay = max_delay
+
+        self.i_data = Signal(width)
+        self.i_valid = Signal()
+        self.i_ready = Signal()
+        self.w_level = Signal(range(depth + 1))
+
+        self.o_data = Signal(width)
+        self.o_valid = Signal()
+        self.o_ready = Signal()
+        self.r_level = Signal(range(depth + 2))
+
+    def elaborate(self, platform):
+        m = Module()
+        ptr_w = (self.depth - 1).bit_length() + 1
+        addr_w = ptr_w - 1
+
+        mem = Memory(width=self.width, depth=self.depth)
+        wrport = m.submodules.wrport = mem.write_port(domain=self.w_domain)
+        rdport = m.submodules.rdport = mem.read_port(domain=self.r_domain,
+                                                     transparent=False)
+
+        # Write side
+        w_bin = Signal(ptr_w)
+        w_bin_next = Signal(ptr_w)
+        w_gry = Signal(ptr_w)
+        r_gry_w = Signal(ptr_w)
+        write = Signal()
+        m.d.comb += [
+            self.i_ready.eq(w_gry != Cat(r_gry_w[:-2], ~r_gry_w[-2:])),
+            write.eq(self.i_valid & self.i_ready),
+            w_bin_next.eq(w_bin + write),
+            wrport.addr.eq(w_bin[:addr_w]),
+            wrport.data.eq(self.i_data),
+            wrport.en.eq(write),
+            self.w_level.eq(w_bin - _gray_decode(m, r_gry_w)),
+        ]
+        m.d[self.w_domain] += [
+            w_bin.eq(w_bin_next),
+            w_gry.eq(_gray_encode(m, w_bin_next)),
+        ]
+
+        # Read side, the memory output register is the output stage
+        r_bin = Signal(ptr_w)
+        r_bin_next = Signal(ptr_w)
+        r_gry = Signal(ptr_w)
+        w_gry_r = Signal(ptr_w)
+        read = Signal()
+        stored = Signal(ptr_w)
+        m.d.comb += [
+            read.eq((r_gry != w_gry_r) & (~self.o_valid | self.o_ready)),
+            r_bin_next.eq(r_bin + read),
+            rdport.addr.eq(r_bin[:addr_w]),
+            rdport.en.eq(read),
+            self.o_data.eq(rdport.data),
+            stored.eq(_gray_decode(m, w_gry_r) - r_bin),
+            self.r_level.eq(stored + self.o_valid),
+        ]
+        m.d[self.r_domain] += [
+            r_bin.eq(r_bin_next),
+            r_gry.eq(_gray_encode(m, r_bin_next)),
+        ]
+        with m.If(read):
+            m.d[self.r_domain] += self.o_valid.eq(1)
+        with m.Elif(self.o_ready):
+            m.d[self.r_domain] += self.o_valid.eq(0)
+
+        m.submodules.w_sync = FFSynchronizer(w_gry, w_gry_r, o_domain=self.r_domain,
+                                             max_input_delay=self.max_delay)
+        m.submodules.r_sync = FFSynchronizer(r_gry, r_gry_w, o_domain=self.w_domain,
+                                             max_input_delay=self.max_delay)
+        return m
+
+
+class AsyncStreamFifo(Elaboratable):
+    '''
+        ``AsyncFifo`` between a ``sink`` stream in ``w_domain`` and a
+        ``source`` stream in ``r_domain``, TLAST and TUSER included.
+    '''
+    def __init__(self, depth, w_domain, r_domain, data_w=32, user_w=0, max_delay=None):
+        self.sink = get_stream_record(data_w=data_w, user_w=user_w, name='sink')
+        self.source = get_stream_record(data_w=data_w, user_w=user_w, name='source')
+        self._fields = ['TDATA', 'TLAST'] + (['TUSER'] if user_w else [])
+        width = data_w + 1 + user_w
+        self.fifo = AsyncFifo(width, depth, w_domain, r_domain, max_delay)
+        self.w_level = self.fifo.w_level
+        self.r_level = self.fifo.r_level
+
+    def elaborate(self, platform):
+        m = Module()
+        fifo = m.submodules.fifo = self.fifo
+        m.d.comb += [
+            fifo.i_data.eq(Cat(*[self.sink[f] for f in self._fields])),
+            fifo.i_valid.eq(self.sink.TVALID),
+            self.sink.TREADY.eq(fifo.i_ready),
+            Cat(*[self.source[f] for f in self._fields]).eq(fifo.o_data),
+            self.source.TVALID.eq(fifo.o_valid),
+            fifo.o_ready.eq(self.source.TREADY),
+        ]
+        return m
+
+
+class AxiClockConverter(Elaboratable):
+    '''
+        One ``AsyncFifo`` per channel between an AXI ``master`` record
+        clocked by ``m_domain`` and a ``slave`` record with the same layout
+        clocked by ``s_domain``, like ``AxiRegisterSlice`` across clocks.
+        Each channel moves one beat per cycle once ``depth`` covers the
+        synchronizer round trip. Fields outside the five channels (clocks,
+        FIFO levels...) are not touched.
+    '''
+    def __init__(self, master, slave, m_domain, s_domain, depth=16, max_delay=None):
+        self.master = master
+        self.slave = slave
+        self.m_domain = m_domain
+        self.s_domain = s_domain
+        self.depth = depth
+        self.max_delay = max_delay
+
+    def elaborate(self, platform):
+        m = Module()
+        for ch in MASTER_CHANNELS + SLAVE_CHANNELS:
+            if ch in MASTER_CHANNELS:
+                src, dst = self.master, self.slave
+                w_domain, r_domain = self.m_domain, self.s_domain
+            else:
+                src, dst = self.slave, self.master
+                w_domain, r_domain = self.s_domain, self.m_domain
+            fields = [f for f in CHANNELS[ch] if f in src.fields and f in dst.fields]
+            i_data = Cat(*[src[f] for f in fields])
+            o_data = Cat(*[dst[f] for f in fields])
+
+            fifo = AsyncFifo(len(i_data), self.depth, w_domain, r_domain, self.max_delay)
+            m.submodules[ch.lower()] = fifo
+            m.d.comb += [
+                fifo.i_data.eq(i_data),
+                fifo.i_valid.eq(src[ch + 'VALID']),
+                src[ch + 'READY'].eq(fifo.i_ready),
+                o_data.eq(fifo.o_data),
+                dst[ch + 'VALID'].eq(fifo.o_valid),
+                fifo.o_ready.eq(dst[ch + 'READY']),
+            ]
+        return m
@@ -0,0 +1,131 @@
+from amaranth import Elaboratable, Module, Signal
+
+__all__ = [
+    'get_cache_attrs', 'set_cache_attrs', 'AceLiteResponder',
+    'CACHE_DEVICE', 'CACHE_NORMAL', 'CACHE_WRITE_BACK',
+    'PROT_PRIVILEGED', 'PROT_NONSECURE', 'PROT_INSTRUCTION',
+    'DOMAIN_NON_SHAREABLE', 'DOMAIN_INNER', 'DOMAIN_OUTER', 'DOMAIN_SYSTEM',
+]
+
+# AxCACHE, AXI4 encoding
+CACHE_DEVICE = 0b0000
+CACHE_NORMAL = 0b0011
+CACHE_WRITE_BACK = 0b1111
+
+PROT_PRIVILEGED = 0b001
+PROT_NONSECURE = 0b010
+PROT_INSTRUCTION = 0b100
+
+DOMAIN_NON_SHAREABLE = 0b00
+DOMAIN_INNER = 0b01
+DOMAIN_OUTER = 0b10
+DOMAIN_SYSTEM = 0b11
+
+
+def get_cache_attrs(axi, coherent=True, allocate=True, prot=0):
+    '''
+        Values of the read and write address channel attributes of ``axi``
+        (a record from ``get_axi``) for one kind of transaction, as a dict
+        of field name to constant:
+
+            coherent=True, allocate=True    write back, read and write
+                                            allocate: data goes through the
+                                            CPU caches, so the CPU needs no
+                                            flush or invalidate
+            coherent=True, allocate=False   write back, no allocate: snooped
+                                            but not left in the caches
+            coherent=False                  normal non-cacheable memory
+
+        The coherency side band depends on the port:
+
+            ACE (SACEFPD)   ACE-Lite ``AxDOMAIN`` outer shareable with
+                            ReadOnce/WriteUnique ``AxSNOOP``, system domain
+                            when not coherent
+            ACP on Zynq     ``AxUSER[0]`` marks shared requests
+            ACP on ZynqMP   ``AxUSER`` holds the shareability domain
+
+        Other ports only get ``AxCACHE`` and ``AxPROT``, coherency on them
+        depends on the interconnect configuration.
+    '''
+    axi3 = 'WID' in axi.fields
+    if not coherent:
+        cache = {'AR': CACHE_NORMAL, 'AW': CACHE_NORMAL}
+    elif allocate:
+        cache = {'AR': CACHE_WRITE_BACK, 'AW': CACHE_WRITE_BACK}
+    elif axi3:
+        # Cacheable and bufferable, the allocate bits are the top two
+        cache = {'AR': 0b0011, 'AW': 0b0011}
+    else:
+        cache = {'AR': 0b1011, 'AW': 0b0111}
+
+    attrs = {}
+    for ch in ['AR', 'AW']:
+        if ch + 'CACHE' in axi.fields:
+            attrs[ch + 'CACHE'] = cache[ch]
+        if ch + 'PROT' in axi.fields:
+            attrs[ch + 'PROT'] = prot
+        if ch + 'DOMAIN' in axi.fields:
+            attrs[ch + 'DOMAIN'] = DOMAIN_OUTER if coherent else DOMAIN_SYSTEM
+            # ReadOnce/WriteUnique and ReadNoSnoop/WriteNoSnoop are both 0,
+            # the domain tells them apart
+            attrs[ch + 'SNOOP'] = 0
+            attrs[ch + 'BAR'] = 0
+        elif ch + 'USER' in axi.fields:
+            user_w = len(axi[ch + 'USER'])
+            if user_w == 5:
+                attrs[ch + 'USER'] = int(coherent)
+            elif user_w == 2:
+                attrs[ch + 'USER'] = DOMAIN_INNER if coherent else DOMAIN_NON_SHAREABLE
+    return attrs
+
+
+def set_cache_attrs(axi, coherent=True, allocate=True, prot=0, cache=True):
+    '''
+        Statements driving the attributes from ``get_cache_attrs``. Use
+        ``cache=False`` when the master already drives ``AxCACHE``, like
+        ``AxiReader``/``AxiWriter`` do from their ``cache`` argument.
+    '''
+    attrs = get_cache_attrs(axi, coherent, allocate, prot)
+    return [
+        axi[f].eq(value) for f, value in attrs.items()
+        if cache or not f.endswith('CACHE')
+    ]
+
+
+class AceLiteResponder(Elaboratable):
+    '''
+        Completes the ACE specific handshakes of an ACE port (``sacefpd``)
+        used by an ACE-Lite master: ``RACK``/``WACK`` are pulsed the cycle
+        after each read burst and write response, and snoops are answered
+        with an empty ``CRRESP`` since the PL holds no cached copies. The
+        master drives the regular AXI channels as usual.
+    '''
+    def __init__(self, ace, domain='sync'):
+        self.ace = ace
+        self.domain = domain
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        ace = self.ace
+
+        sync += [
+            ace.RACK.eq(ace.RVALID & ace.RREADY & ace.RLAST),
+            ace.WACK.eq(ace.BVALID & ace.BREADY),
+        ]
+
+        # One response per snoop, never with data
+        pending = Signal()
+        m.d.comb += [
+            ace.ACREADY.eq(~pending),
+            ace.CRVALID.eq(pending),
+            ace.CRRESP.eq(0),
+            ace.CDVALID.eq(0),
+            ace.CDLAST.eq(0),
+        ]
+        with m.If(ace.ACVALID & ace.ACREADY):
+            sync += pending.eq(1)
+        with m.Elif(ace.CRREADY):
+            sync += pending.eq(0)
+
+        return m
@@ -0,0 +1,155 @@
+from amaranth import Record
+
+__all__ = [
+    'CHANNELS', 'MASTER_CHANNELS', 'SLAVE_CHANNELS',
+    'get_axi_pl_layout', 'get_axi_record', 'get_axi_params',
+    'get_channel_fields', 'connect',
+    'get_stream_layout', 'get_stream_record',
+    'BURST_FIXED', 'BURST_INCR', 'BURST_WRAP',
+    'RESP_OKAY', 'RESP_EXOKAY', 'RESP_SLVERR', 'RESP_DECERR',
+]
+
+BURST_FIXED = 0
+BURST_INCR = 1
+BURST_WRAP = 2
+
+RESP_OKAY = 0
+RESP_EXOKAY = 1
+RESP_SLVERR = 2
+RESP_DECERR = 3
+
+CHANNELS = {
+    'AW': [
+        'AWADDR', 'AWBURST', 'AWCACHE', 'AWID', 'AWLEN', 'AWLOCK', 'AWPROT',
+        'AWQOS', 'AWSIZE', 'AWUSER', 'AWREGION', 'AWDOMAIN', 'AWSNOOP', 'AWBAR',
+    ],
+    'W': ['WDATA', 'WSTRB', 'WLAST', 'WID', 'WUSER'],
+    'B': ['BID', 'BRESP', 'BUSER'],
+    'AR': [
+        'ARADDR', 'ARBURST', 'ARCACHE', 'ARID', 'ARLEN', 'ARLOCK', 'ARPROT',
+        'ARQOS', 'ARSIZE', 'ARUSER', 'ARREGION', 'ARDOMAIN', 'ARSNOOP', 'ARBAR',
+    ],
+    'R': ['RDATA', 'RID', 'RRESP', 'RLAST', 'RUSER'],
+}
+MASTER_CHANNELS = ['AW', 'W', 'AR']
+SLAVE_CHANNELS = ['B', 'R']
+
+
+def get_axi_pl_layout(data_w=32, addr_w=32, id_w=1, len_w=8, size_w=3,
+                      lock_w=1, user_w=0, wid=False):
+    '''
+        Layout of a PL side AXI interface using the same field names as the
+        records returned by ``get_axi``. The defaults describe AXI4, use
+        ``len_w=4, size_w=2, lock_w=2, wid=True`` for AXI3.
+    '''
+    assert data_w % 8 == 0
+    layout = []
+    for ch in ['AR', 'AW']:
+        layout += [
+            (ch + 'ADDR', addr_w),
+            (ch + 'BURST', 2),
+            (ch + 'CACHE', 4),
+            (ch + 'ID', id_w),
+            (ch + 'LEN', len_w),
+            (ch + 'LOCK', lock_w),
+            (ch + 'PROT', 3),
+            (ch + 'QOS', 4),
+            (ch + 'SIZE', size_w),
+        ]
+        if user_w:
+            layout.append((ch + 'USER', user_w))
+        layout += [
+            (ch + 'VALID', 1),
+            (ch + 'READY', 1),
+        ]
+    layout += [
+        ('WDATA', data_w),
+        ('WSTRB', data_w // 8),
+        ('WLAST', 1),
+    ]
+    if wid:
+        layout.append(('WID', id_w))
+    layout += [
+        ('WVALID', 1),
+        ('WREADY', 1),
+        ('BID', id_w),
+        ('BRESP', 2),
+        ('BVALID', 1),
+        ('BREADY', 1),
+        ('RDATA', data_w),
+        ('RID', id_w),
+        ('RRESP', 2),
+        ('RLAST', 1),
+        ('RVALID', 1),
+        ('RREADY', 1),
+    ]
+    return layout
+
+
+def get_axi_record(name=None, **kwargs):
+    return Record(get_axi_pl_layout(**kwargs), name=name, src_loc_at=1)
+
+
+def get_axi_params(axi):
+    '''
+        ``get_axi_pl_layout`` arguments describing an existing AXI record,
+        handy to build PL side interfaces matching a PS port.
+    '''
+    return {
+        'data_w': len(axi.WDATA),
+        'addr_w': len(axi.AWADDR),
+        'id_w': len(axi.AWID),
+        'len_w': len(axi.AWLEN),
+        'size_w': len(axi.AWSIZE),
+        'lock_w': len(axi.AWLOCK),
+        'user_w': len(axi.AWUSER) if 'AWUSER' in axi.fields else 0,
+        'wid': 'WID' in axi.fields,
+    }
+
+
+def get_stream_layout(data_w=32, user_w=0):
+    '''
+        AXI-Stream like valid/ready interface used by the PL side of the DMA
+        engines. ``TLAST`` marks the last beat of a transfer.
+    '''
+    layout = [
+        ('TDATA', data_w),
+        ('TLAST', 1),
+    ]
+    if user_w:
+        layout.append(('TUSER', user_w))
+    layout += [
+        ('TVALID', 1),
+        ('TREADY', 1),
+    ]
+    return layout
+
+
+def get_stream_record(name=None, **kwargs):
+    return Record(get_stream_layout(**kwargs), name=name, src_loc_at=1)
+
+
+def get_channel_fields(axi, channel):
+    return [f for f in CHANNELS[channel] if f in axi.fields]
+
+
+def connect(master, slave):
+    '''
+        Statements wiring an AXI master to an AXI slave. Fields are matched
+        by name, so PS records and ``get_axi_record`` records can be mixed;
+        widths are truncated or zero extended and master fields missing on
+        the master side are driven with zero.
+    '''
+    stmts = []
+    for channel in MASTER_CHANNELS + SLAVE_CHANNELS:
+        if channel in MASTER_CHANNELS:
+            src, dst = master, slave
+        else:
+            src, dst = slave, master
+        for f in CHANNELS[channel] + [channel + 'VALID']:
+            if f in dst.fields:
+                stmts.append(dst[f].eq(src[f] if f in src.fields else 0))
+        ready = channel + 'READY'
+        if ready in src.fields:
+            stmts.append(src[ready].eq(dst[ready] if ready in dst.fields else 0))
+    return stmts
@@ -0,0 +1,439 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Array, Cat, Const, Mux
+from amaranth.lib.fifo import SyncFIFO, SyncFIFOBuffered
+from amaranth.hdl.xfrm import DomainRenamer
+
+from .common import BURST_INCR, RESP_OKAY, get_stream_record
+
+__all__ = ['AxiReader', 'AxiWriter', 'AxiDma']
+
+
+def _log2(n):
+    assert n > 0 and n & (n - 1) == 0, (
+        '{} is not a power of two'.format(n))
+    return n.bit_length() - 1
+
+
+class _BurstSplitter:
+    '''
+        Splits the remaining beats of a transfer into INCR bursts of at most
+        ``max_burst`` beats that never cross a ``boundary`` (at most 4KB).
+    '''
+    def __init__(self, m, addr, remaining, size, max_burst, boundary=4096):
+        boundary_bits = _log2(min(boundary, 4096))
+        self.beats = Signal(range(max_burst + 1))
+        to_boundary = Signal(boundary_bits + 1)
+        limit = Signal(range(max_burst + 1))
+        m.d.comb += [
+            to_boundary.eq((2 ** boundary_bits - addr[:boundary_bits]) >> size),
+            limit.eq(Mux(to_boundary < max_burst, to_boundary, max_burst)),
+            self.beats.eq(Mux(remaining < limit, remaining, limit)),
+        ]
+
+
+class _Engine(Elaboratable):
+    def __init__(self, axi, prefix, domain, max_outstanding, max_burst, cache,
+                 boundary):
+        self.axi = axi
+        self.domain = domain
+        data_w = len(axi[prefix + 'DATA'])
+        len_w = len(axi[('AR' if prefix == 'R' else 'AW') + 'LEN'])
+        id_w = len(axi[('AR' if prefix == 'R' else 'AW') + 'ID'])
+        assert data_w % 8 == 0
+
+        self.data_w = data_w
+        self.size = _log2(data_w // 8)
+        self.max_burst = 2 ** len_w if max_burst is None else max_burst
+        assert self.max_burst <= 2 ** len_w, (
+            'AXI{} bursts are limited to {} beats'.format(
+                3 if len_w == 4 else 4, 2 ** len_w))
+        assert self.max_burst * data_w // 8 <= 4096
+        self.slots = min(max_outstanding, 2 ** id_w)
+        assert self.slots >= 2
+        _log2(self.slots)
+        _log2(self.max_burst)
+        self.cache = cache
+        self.boundary = boundary
+        assert boundary >= data_w // 8
+
+        self.cmd_valid = Signal()
+        self.cmd_ready = Signal()
+        self.cmd_addr = Signal(len(axi[('AR' if prefix == 'R' else 'AW') + 'ADDR']))
+        self.cmd_len = Signal(32)
+
+        self.busy = Signal()
+        self.done = Signal()
+        self.error = Signal()
+
+    def _start(self, m, sync, addr, *counters):
+        m.d.comb += self.cmd_ready.eq(~self.busy)
+        with m.If(self.cmd_valid & self.cmd_ready):
+            sync += [
+                self.busy.eq(1),
+                self.error.eq(0),
+                addr.eq(self.cmd_addr),
+            ]
+            sync += [c.eq(self.cmd_len >> self.size) for c in counters]
+
+
+class AxiReader(_Engine):
+    '''
+        Memory to stream engine using the read channels of ``axi``.
+
+        A command (``cmd_addr``, ``cmd_len`` in bytes, both aligned to the
+        data width) is split into the longest INCR bursts allowed by the
+        port that don't cross a ``boundary`` (4KB, or the ``AxiStriper``
+        granularity), and up to ``max_outstanding`` of them are kept in
+        flight with one ID each. Read data lands in a reorder buffer, so the
+        PS is free to return the bursts in any order, and leaves through
+        ``source`` in address order with ``TLAST`` on the last beat. Space
+        for a burst is reserved before it is issued, so ``RREADY`` is always
+        high.
+
+        ``done`` pulses when the last beat leaves ``source``, ``error`` then
+        tells whether any beat had a non OKAY response.
+    '''
+    def __init__(self, axi, domain='sync', max_outstanding=8, max_burst=None,
+                 cache=0b0011, boundary=4096):
+        super().__init__(axi, 'R', domain, max_outstanding, max_burst, cache,
+                         boundary)
+        self.source = get_stream_record(data_w=self.data_w)
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+        source = self.source
+
+        slot_bits = _log2(self.slots)
+        burst_bits = _log2(self.max_burst)
+
+        addr = Signal.like(self.cmd_addr)
+        remaining = Signal(32)
+        fetch_left = Signal(32)
+        drain_left = Signal(32)
+        self._start(m, sync, addr, remaining, fetch_left, drain_left)
+
+        mem = Memory(width=self.data_w, depth=self.slots * self.max_burst)
+        m.submodules.wp = wp = mem.write_port(domain=self.domain)
+        m.submodules.rp = rp = mem.read_port(domain=self.domain, transparent=False)
+
+        slot_len = Array(Signal(burst_bits + 1, name='slot_len{}'.format(i))
+                         for i in range(self.slots))
+        received = Array(Signal(burst_bits + 1, name='received{}'.format(i))
+                         for i in range(self.slots))
+        head = Signal(slot_bits + 1)
+        tail = Signal(slot_bits + 1)
+        in_flight = Signal(slot_bits + 1)
+        m.d.comb += in_flight.eq(tail - head)
+
+        # Address channel
+        burst = _BurstSplitter(m, addr, remaining, self.size, self.max_burst,
+                               self.boundary)
+        tail_slot = tail[:slot_bits]
+        m.d.comb += [
+            axi.ARVALID.eq(self.busy & (remaining != 0) & (in_flight != self.slots)),
+            axi.ARADDR.eq(addr),
+            axi.ARID.eq(tail_slot),
+            axi.ARLEN.eq(burst.beats - 1),
+            axi.ARSIZE.eq(self.size),
+            axi.ARBURST.eq(BURST_INCR),
+        ]
+        if 'ARCACHE' in axi.fields:
+            m.d.comb += axi.ARCACHE.eq(self.cache)
+        with m.If(axi.ARVALID & axi.ARREADY):
+            sync += [
+                slot_len[tail_slot].eq(burst.beats),
+                received[tail_slot].eq(0),
+                tail.eq(tail + 1),
+                addr.eq(addr + (burst.beats << self.size)),
+                remaining.eq(remaining - burst.beats),
+            ]
+
+        # Data channel, into the reorder buffer
+        r_slot = axi.RID[:slot_bits]
+        m.d.comb += [
+            axi.RREADY.eq(1),
+            wp.addr.eq(Cat(received[r_slot][:burst_bits], r_slot)),
+            wp.data.eq(axi.RDATA),
+        ]
+        with m.If(axi.RVALID):
+            m.d.comb += wp.en.eq(1)
+            sync += received[r_slot].eq(received[r_slot] + 1)
+            with m.If(axi.RRESP != RESP_OKAY):
+                sync += self.error.eq(1)
+
+        # Stream out in issue order
+        head_slot = head[:slot_bits]
+        beat = Signal(burst_bits + 1)
+        out_valid = Signal()
+        out_last = Signal()
+        available = (head != tail) & (beat < received[head_slot])
+        fetch = Signal()
+        m.d.comb += [
+            fetch.eq(available & (~out_valid | source.TREADY)),
+            rp.addr.eq(Cat(beat[:burst_bits], head_slot)),
+            rp.en.eq(fetch),
+            source.TVALID.eq(out_valid),
+            source.TDATA.eq(rp.data),
+            source.TLAST.eq(out_last),
+        ]
+        with m.If(fetch):
+            sync += [
+                out_valid.eq(1),
+                out_last.eq(fetch_left == 1),
+                fetch_left.eq(fetch_left - 1),
+            ]
+            with m.If(beat + 1 == slot_len[head_slot]):
+                sync += [
+                    beat.eq(0),
+                    head.eq(head + 1),
+                ]
+            with m.Else():
+                sync += beat.eq(beat + 1)
+        with m.Elif(source.TREADY):
+            sync += out_valid.eq(0)
+
+        with m.If(source.TVALID & source.TREADY):
+            sync += drain_left.eq(drain_left - 1)
+
+        with m.If(self.busy & (drain_left == 0)):
+            m.d.comb += self.done.eq(1)
+            sync += self.busy.eq(0)
+
+        return m
+
+
+class AxiWriter(_Engine):
+    '''
+        Stream to memory engine using the write channels of ``axi``.
+
+        Beats accepted from ``sink`` are buffered in a ``fifo_depth`` deep
+        FIFO (twice the burst length by default), and a burst is only issued
+        once all its data is there, so ``WVALID`` never stalls mid burst and
+        the PS port isn't held by a slow producer. IDs rotate through the ID
+        space and up to ``max_outstanding`` bursts wait for their response.
+        Exactly ``cmd_len`` bytes are taken from ``sink``, ``TLAST`` is
+        ignored. Every beat is written with the byte enables ``strb``, all
+        of them by default.
+
+        ``done`` pulses once every write response came back, ``error`` then
+        tells whether any of them wasn't OKAY.
+    '''
+    def __init__(self, axi, domain='sync', max_outstanding=8, max_burst=None,
+                 fifo_depth=None, cache=0b0011, boundary=4096, strb=None):
+        super().__init__(axi, 'W', domain, max_outstanding, max_burst, cache,
+                         boundary)
+        self.strb = Const(-1 if strb is None else strb, len(axi.WSTRB))
+        self.fifo_depth = 2 * self.max_burst if fifo_depth is None else fifo_depth
+        assert self.fifo_depth >= max(2, self.max_burst)
+        self.sink = get_stream_record(data_w=self.data_w)
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+        sink = self.sink
+
+        len_w = len(axi.AWLEN)
+        id_w = len(axi.AWID)
+
+        addr = Signal.like(self.cmd_addr)
+        remaining = Signal(32)
+        accept_left = Signal(32)
+        self._start(m, sync, addr, remaining, accept_left)
+
+        fifo = SyncFIFOBuffered(width=self.data_w, depth=self.fifo_depth)
+        bursts = SyncFIFO(width=len_w + id_w, depth=self.slots)
+        if self.domain != 'sync':
+            fifo = DomainRenamer(self.domain)(fifo)
+            bursts = DomainRenamer(self.domain)(bursts)
+        m.submodules.fifo = fifo
+        m.submodules.bursts = bursts
+
+        m.d.comb += [
+            sink.TREADY.eq(fifo.w_rdy & (accept_left != 0)),
+            fifo.w_en.eq(sink.TVALID & sink.TREADY),
+            fifo.w_data.eq(sink.TDATA),
+        ]
+        with m.If(fifo.w_en):
+            sync += accept_left.eq(accept_left - 1)
+
+        # Address channel
+        burst = _BurstSplitter(m, addr, remaining, self.size, self.max_burst,
+                               self.boundary)
+        outstanding = Signal(range(self.slots + 1))
+        reserved = Signal(range(self.fifo_depth + 1))
+        next_id = Signal(id_w)
+        aw = Signal()
+        m.d.comb += [
+            axi.AWVALID.eq(self.busy & (remaining != 0) & bursts.w_rdy &
+                           (outstanding != self.slots) &
+                           (fifo.level >= reserved + burst.beats)),
+            axi.AWADDR.eq(addr),
+            axi.AWID.eq(next_id),
+            axi.AWLEN.eq(burst.beats - 1),
+            axi.AWSIZE.eq(self.size),
+            axi.AWBURST.eq(BURST_INCR),
+            aw.eq(axi.AWVALID & axi.AWREADY),
+            bursts.w_data.eq(Cat(axi.AWLEN, axi.AWID)),
+            bursts.w_en.eq(aw),
+        ]
+        if 'AWCACHE' in axi.fields:
+            m.d.comb += axi.AWCACHE.eq(self.cache)
+        with m.If(aw):
+            sync += [
+                next_id.eq(next_id + 1),
+                addr.eq(addr + (burst.beats << self.size)),
+                remaining.eq(remaining - burst.beats),
+            ]
+
+        # Data channel, following the order of the address channel
+        w_len = bursts.r_data[:len_w]
+        w_id = bursts.r_data[len_w:]
+        count = Signal(len_w)
+        w = Signal()
+        m.d.comb += [
+            axi.WVALID.eq(bursts.r_rdy & fifo.r_rdy),
+            axi.WDATA.eq(fifo.r_data),
+            axi.WSTRB.eq(self.strb),
+            axi.WLAST.eq(count == w_len),
+            w.eq(axi.WVALID & axi.WREADY),
+            fifo.r_en.eq(w),
+            bursts.r_en.eq(w & axi.WLAST),
+        ]
+        if 'WID' in axi.fields:
+            m.d.comb += axi.WID.eq(w_id)
+        with m.If(w):
+            sync += count.eq(Mux(axi.WLAST, 0, count + 1))
+        sync += reserved.eq(reserved + Mux(aw, burst.beats, 0) - w)
+
+        # Response channel
+        b = Signal()
+        m.d.comb += [
+            axi.BREADY.eq(1),
+            b.eq(axi.BVALID),
+        ]
+        sync += outstanding.eq(outstanding + aw - b)
+        with m.If(b & (axi.BRESP != RESP_OKAY)):
+            sync += self.error.eq(1)
+
+        with m.If(self.busy & (remaining == 0) & (outstanding == 0) & (accept_left == 0)):
+            m.d.comb += self.done.eq(1)
+            sync += self.busy.eq(0)
+
+        return m
+
+
+class AxiDma(Elaboratable):
+    '''
+        Burst DMA on a SAXI port returned by ``get_axi``, with an
+        ``AxiReader`` (MM2S, memory to ``mm2s`` stream) and an ``AxiWriter``
+        (S2MM, ``s2mm`` stream to memory) sharing the port. It is controlled
+        through registers added to ``bank``, usually on a MAXI port:
+
+            CTRL        write 1 to bit 0/1 to start MM2S/S2MM, ignored while
+                        that direction is busy
+            IRQ_EN      bit 0/1 routes MM2S/S2MM completion to ``irq``
+            STATUS      bit 0/1 MM2S/S2MM busy, bit 2/3 MM2S/S2MM done,
+                        bit 4/5 MM2S/S2MM error, done and error bits are
+                        cleared by writing 1
+            MM2S_ADDR   source address (``_LO``/``_HI`` on wide ports)
+            MM2S_LEN    length in bytes
+            S2MM_ADDR   destination address
+            S2MM_LEN    length in bytes
+
+        Addresses and lengths must be multiples of the data width in bytes.
+        ``cache`` is the ``AxCACHE`` of every burst, see ``get_cache_attrs``
+        for coherent ports. ``irq`` is a level interrupt meant for
+        ``get_irq_signal``.
+    '''
+    def __init__(self, axi, bank, domain='sync', mm2s=True, s2mm=True,
+                 max_outstanding=8, max_burst=None, fifo_depth=None,
+                 cache=0b0011, boundary=4096, name='dma'):
+        assert mm2s or s2mm
+        self.axi = axi
+        self.bank = bank
+        self.domain = domain
+        self.name = name
+        self.irq = Signal()
+
+        self.reader = None
+        self.writer = None
+        self.mm2s = None
+        self.s2mm = None
+        if mm2s:
+            self.reader = AxiReader(axi, domain, max_outstanding, max_burst,
+                                    cache=cache, boundary=boundary)
+            self.mm2s = self.reader.source
+        if s2mm:
+            self.writer = AxiWriter(axi, domain, max_outstanding, max_burst,
+                                    fifo_depth, cache=cache, boundary=boundary)
+            self.s2mm = self.writer.sink
+
+        self._registers = {}
+        self._add_register('CTRL', width=2, access='w')
+        self._add_register('IRQ_EN', width=2)
+        self._add_register('STATUS', width=6, access='w1c')
+        for d, engine in [('MM2S', self.reader), ('S2MM', self.writer)]:
+            if engine is None:
+                continue
+            if len(engine.cmd_addr) > 32:
+                self._add_register(d + '_ADDR_LO')
+                self._add_register(d + '_ADDR_HI', width=len(engine.cmd_addr) - 32)
+            else:
+                self._add_register(d + '_ADDR', width=len(engine.cmd_addr))
+            self._add_register(d + '_LEN')
+
+    def _add_register(self, name, width=32, access='rw'):
+        self._registers[name] = self.bank.add_register(
+            '{}_{}'.format(self.name, name.lower()), width=width, access=access)
+
+    def get_register_map(self):
+        return {
+            name: self.bank.get_offset(reg)
+            for name, reg in self._registers.items()
+        }
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        regs = self._registers
+
+        ctrl = regs['CTRL']
+        status = regs['STATUS']
+        irq_en = regs['IRQ_EN'].r_data
+
+        busy = [Const(0), Const(0)]
+        done = [Signal(name='mm2s_done'), Signal(name='s2mm_done')]
+        error = [Signal(name='mm2s_error'), Signal(name='s2mm_error')]
+
+        for i, (d, engine) in enumerate([('MM2S', self.reader), ('S2MM', self.writer)]):
+            if engine is None:
+                continue
+            m.submodules[d.lower()] = engine
+            if d + '_ADDR' in regs:
+                addr = regs[d + '_ADDR'].r_data
+            else:
+                addr = Cat(regs[d + '_ADDR_LO'].r_data, regs[d + '_ADDR_HI'].r_data)
+            m.d.comb += [
+                engine.cmd_valid.eq(ctrl.w_stb & ctrl.w_data[i]),
+                engine.cmd_addr.eq(addr),
+                engine.cmd_len.eq(regs[d + '_LEN'].r_data),
+            ]
+            busy[i] = engine.busy
+
+            with m.If(status.w_stb & status.w_data[2 + i]):
+                sync += done[i].eq(0)
+            with m.If(status.w_stb & status.w_data[4 + i]):
+                sync += error[i].eq(0)
+            with m.If(engine.done):
+                sync += done[i].eq(1)
+                with m.If(engine.error):
+                    sync += error[i].eq(1)
+
+        m.d.comb += [
+            status.r_data.eq(Cat(*busy, *done, *error)),
+            self.irq.eq(((Cat(*done) | Cat(*error)) & irq_en).any()),
+        ]
+
+        return m
@@ -0,0 +1,261 @@
+from amaranth import Elaboratable, Module, Signal, Array, Cat, Const
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.hdl.xfrm import DomainRenamer
+
+from .common import CHANNELS, get_axi_params, get_axi_record
+
+__all__ = ['AxiArbiter', 'AxiStriper']
+
+
+def _round_robin(m, valids, last):
+    '''
+        Index of the first asserted ``valids`` entry after ``last``.
+    '''
+    n = len(valids)
+    sel = Signal(range(n))
+    with m.Switch(last):
+        for l in range(n):
+            with m.Case(l):
+                # Lowest priority first, the last assignment wins
+                for k in reversed(range(n)):
+                    i = (l + 1 + k) % n
+                    with m.If(valids[i]):
+                        m.d.comb += sel.eq(i)
+    return sel
+
+
+def _field(axi, name):
+    if name in axi.fields:
+        return axi[name]
+    return Const(0)
+
+
+class AxiArbiter(Elaboratable):
+    '''
+        Shares the ``slave`` AXI port (a SAXI record from ``get_axi``)
+        between several PL ``masters``. Address channels are granted round
+        robin, the master index is prepended to the ID (so each master gets
+        ``len(slave ID) - log2(len(masters))`` ID bits, see
+        ``get_master_params``) and used to route read data and write
+        responses back. Write data follows the order of granted write
+        addresses, as AXI3 requires; masters must not send write data before
+        its address.
+    '''
+    def __init__(self, slave, n_masters, domain='sync', max_writes=8):
+        assert n_masters >= 2
+        self.slave = slave
+        self.domain = domain
+        self.max_writes = max_writes
+        self.sel_bits = (n_masters - 1).bit_length()
+        params = self.get_master_params()
+        assert params['id_w'] >= 1, (
+            'Not enough ID bits for {} masters'.format(n_masters))
+        self.masters = [
+            get_axi_record(name='master{}'.format(i), **params)
+            for i in range(n_masters)
+        ]
+
+    def get_master_params(self):
+        params = get_axi_params(self.slave)
+        params['id_w'] -= self.sel_bits
+        return params
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        slave = self.slave
+        masters = self.masters
+        n = len(masters)
+
+        def mux(name, sel):
+            return Array(_field(mst, name) for mst in masters)[sel]
+
+        def arbitrate(ch):
+            valid = ch + 'VALID'
+            ready = ch + 'READY'
+            locked = Signal(name=ch.lower() + '_locked')
+            current = Signal(range(n), name=ch.lower() + '_current')
+            last = Signal(range(n), name=ch.lower() + '_last')
+            sel = Signal(range(n), name=ch.lower() + '_sel')
+            rr = _round_robin(m, [mst[valid] for mst in masters], last)
+            m.d.comb += sel.eq(rr)
+            with m.If(locked):
+                m.d.comb += sel.eq(current)
+            for f in CHANNELS[ch]:
+                if f not in slave.fields:
+                    continue
+                if f == ch + 'ID':
+                    m.d.comb += slave[f].eq(Cat(mux(f, sel)[:len(slave[f]) - self.sel_bits], sel))
+                else:
+                    m.d.comb += slave[f].eq(mux(f, sel))
+            m.d.comb += slave[valid].eq(mux(valid, sel))
+            for i, mst in enumerate(masters):
+                m.d.comb += mst[ready].eq(slave[ready] & (sel == i))
+            handshake = slave[valid] & slave[ready]
+            # AXI forbids changing a pending request, hold the grant
+            with m.If(handshake):
+                m.d[self.domain] += [
+                    locked.eq(0),
+                    last.eq(sel),
+                ]
+            with m.Elif(slave[valid]):
+                m.d[self.domain] += [
+                    locked.eq(1),
+                    current.eq(sel),
+                ]
+            return sel, handshake
+
+        arbitrate('AR')
+        aw_sel, aw = arbitrate('AW')
+
+        # Route responses on the ID prefix
+        for ch in ['R', 'B']:
+            rid = slave[ch + 'ID']
+            dst = rid[len(rid) - self.sel_bits:]
+            for i, mst in enumerate(masters):
+                for f in CHANNELS[ch]:
+                    if f not in mst.fields or f not in slave.fields:
+                        continue
+                    m.d.comb += mst[f].eq(slave[f])
+                m.d.comb += mst[ch + 'VALID'].eq(slave[ch + 'VALID'] & (dst == i))
+            m.d.comb += slave[ch + 'READY'].eq(mux(ch + 'READY', dst))
+
+        # Write data in write address order
+        order = SyncFIFO(width=self.sel_bits, depth=self.max_writes)
+        if self.domain != 'sync':
+            order = DomainRenamer(self.domain)(order)
+        m.submodules.order = order
+        w_sel = order.r_data
+        m.d.comb += [
+            order.w_data.eq(aw_sel),
+            order.w_en.eq(aw),
+        ]
+        with m.If(~order.w_rdy):
+            m.d.comb += slave.AWVALID.eq(0)
+            for mst in masters:
+                m.d.comb += mst.AWREADY.eq(0)
+        for f in CHANNELS['W']:
+            if f not in slave.fields:
+                continue
+            if f == 'WID':
+                m.d.comb += slave.WID.eq(Cat(mux(f, w_sel)[:len(slave.WID) - self.sel_bits], w_sel))
+            else:
+                m.d.comb += slave[f].eq(mux(f, w_sel))
+        m.d.comb += slave.WVALID.eq(order.r_rdy & mux('WVALID', w_sel))
+        for i, mst in enumerate(masters):
+            m.d.comb += mst.WREADY.eq(slave.WREADY & order.r_rdy & (w_sel == i))
+        m.d.comb += order.r_en.eq(slave.WVALID & slave.WREADY & slave.WLAST)
+
+        return m
+
+
+class AxiStriper(Elaboratable):
+    '''
+        Spreads the bursts of one PL master over several PS ports (e.g.
+        SAXIHP0-3 or SAXIGP2-5 records from ``get_axi``) to get past the
+        outstanding transaction and buffering limits of a single port.
+
+        Consecutive ``granularity`` sized blocks of the address space go to
+        consecutive ports, bursts must not cross a block boundary
+        (``AxiReader``/``AxiWriter`` honour it through ``boundary``). Every
+        burst is issued with ID 0 on its port, so each port answers in
+        order, and the master ID travels with the port index in the order
+        FIFOs: read data and write responses come back in issue order,
+        whatever the ID, so the master sees a single in order port.
+        ``max_outstanding`` bounds the bursts in flight per direction.
+
+        ``master`` has the same layout as the first port.
+    '''
+    def __init__(self, ports, granularity=4096, domain='sync', max_outstanding=16):
+        n = len(ports)
+        assert n >= 2 and n & (n - 1) == 0, (
+            'Number of ports must be a power of two')
+        assert granularity & (granularity - 1) == 0
+        self.ports = ports
+        self.granularity = granularity
+        self.domain = domain
+        self.max_outstanding = max_outstanding
+        self.sel_bits = (n - 1).bit_length()
+        self.master = get_axi_record(name='striped', **get_axi_params(ports[0]))
+
+    def get_port_index(self, addr):
+        shift = self.granularity.bit_length() - 1
+        return addr[shift:shift + self.sel_bits]
+
+    def _get_order(self, m, name, id_w=0):
+        order = SyncFIFO(width=self.sel_bits + id_w, depth=self.max_outstanding)
+        if self.domain != 'sync':
+            order = DomainRenamer(self.domain)(order)
+        m.submodules[name] = order
+        return order
+
+    def _route(self, m, ch, sel, orders):
+        master = self.master
+        ports = self.ports
+        valid = ch + 'VALID'
+        ready = ch + 'READY'
+        space = Signal(name=ch.lower() + '_space')
+        m.d.comb += space.eq(Cat(*[order.w_rdy for order in orders]).all())
+        for i, port in enumerate(ports):
+            for f in CHANNELS[ch]:
+                if f in port.fields and f != ch + 'ID':
+                    m.d.comb += port[f].eq(_field(master, f))
+            m.d.comb += [
+                port[ch + 'ID'].eq(0),
+                port[valid].eq(master[valid] & space & (sel == i)),
+            ]
+        m.d.comb += master[ready].eq(space & Array(port[ready] for port in ports)[sel])
+        for order in orders:
+            m.d.comb += [
+                order.w_data.eq(Cat(sel, master[ch + 'ID'])),
+                order.w_en.eq(master[valid] & master[ready]),
+            ]
+
+    def _collect(self, m, ch, order):
+        master = self.master
+        ports = self.ports
+        sel = order.r_data[:self.sel_bits]
+        valid_en = order.r_rdy
+        for f in CHANNELS[ch]:
+            if f in master.fields and f != ch + 'ID':
+                m.d.comb += master[f].eq(Array(_field(port, f) for port in ports)[sel])
+        m.d.comb += master[ch + 'ID'].eq(order.r_data[self.sel_bits:])
+        m.d.comb += master[ch + 'VALID'].eq(
+            valid_en & Array(port[ch + 'VALID'] for port in ports)[sel])
+        for i, port in enumerate(ports):
+            m.d.comb += port[ch + 'READY'].eq(valid_en & master[ch + 'READY'] & (sel == i))
+
+    def elaborate(self, platform):
+        m = Module()
+        master = self.master
+
+        # Reads: data is only taken from the port of the oldest read burst
+        id_w = len(master.ARID)
+        ar_order = self._get_order(m, 'ar_order', id_w)
+        self._route(m, 'AR', self.get_port_index(master.ARADDR), [ar_order])
+        self._collect(m, 'R', ar_order)
+        m.d.comb += ar_order.r_en.eq(master.RVALID & master.RREADY & master.RLAST)
+
+        # Writes: data follows the write addresses, responses come back in
+        # the same order
+        w_order = self._get_order(m, 'w_order')
+        b_order = self._get_order(m, 'b_order', id_w)
+        self._route(m, 'AW', self.get_port_index(master.AWADDR), [w_order, b_order])
+
+        w_sel = w_order.r_data
+        for i, port in enumerate(self.ports):
+            for f in CHANNELS['W']:
+                if f in port.fields and f != 'WID':
+                    m.d.comb += port[f].eq(_field(master, f))
+            if 'WID' in port.fields:
+                m.d.comb += port.WID.eq(0)
+            m.d.comb += port.WVALID.eq(master.WVALID & w_order.r_rdy & (w_sel == i))
+        m.d.comb += [
+            master.WREADY.eq(w_order.r_rdy & Array(port.WREADY for port in self.ports)[w_sel]),
+            w_order.r_en.eq(master.WVALID & master.WREADY & master.WLAST),
+        ]
+
+        self._collect(m, 'B', b_order)
+        m.d.comb += b_order.r_en.eq(master.BVALID & master.BREADY)
+
+        return m
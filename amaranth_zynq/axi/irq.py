@@ -0,0 +1,302 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Cat
+from amaranth.lib.cdc import FFSynchronizer
+
+__all__ = ['IrqController', 'IrqLatencyProbe']
+
+
+def _popcount(bits):
+    '''
+        Number of ones in ``bits``, as a balanced adder tree.
+    '''
+    values = [bits[i] for i in range(len(bits))]
+    while len(values) > 1:
+        values = [
+            values[i] + values[i + 1] if i + 1 < len(values) else values[i]
+            for i in range(0, len(values), 2)
+        ]
+    return values[0]
+
+
+class IrqController(Elaboratable):
+    '''
+        Collects up to 1024 PL event ``sources`` into a single PS interrupt.
+        Events (rising edges, or high levels with ``edge=False``) latch a
+        pending bit; once ``COAL_COUNT`` unmasked events have arrived, or
+        the first of them has waited ``COAL_TIMEOUT`` cycles, ``irq`` rises
+        and stays high until every unmasked pending bit is acknowledged, so
+        one interrupt serves a whole batch of events.
+
+        Registers, ``n`` being the group of 32 sources:
+
+            CTRL            bit 0 enables ``irq``
+            SUMMARY         bit n set when group n has unmasked pending bits
+            COAL_COUNT      events per interrupt
+            COAL_TIMEOUT    cycles an event may wait for an interrupt
+            PENDING_n       pending events of sources 32n to 32n+31
+            MASK_n          1 lets the source raise ``irq`` (default all)
+            ACK_n           writing 1 clears the pending bit
+
+        ``irq`` is a level interrupt meant for ``get_irq_signal``.
+    '''
+    def __init__(self, bank, n_sources, domain='sync', edge=True, name='irqc'):
+        assert 1 <= n_sources <= 1024
+        self.bank = bank
+        self.n_sources = n_sources
+        self.domain = domain
+        self.edge = edge
+        self.name = name
+
+        self.sources = Signal(n_sources)
+        self.irq = Signal()
+
+        self.n_groups = (n_sources + 31) // 32
+        self._registers = {}
+        self._add_register('CTRL', width=1)
+        self._add_register('SUMMARY', width=self.n_groups, access='r')
+        self._add_register('COAL_COUNT', width=16, reset=1)
+        self._add_register('COAL_TIMEOUT')
+        for n in range(self.n_groups):
+            width = min(32, n_sources - 32 * n)
+            self._add_register('PENDING_{}'.format(n), width=width, access='r')
+            self._add_register('MASK_{}'.format(n), width=width, reset=2 ** width - 1)
+            self._add_register('ACK_{}'.format(n), width=width, access='w')
+
+    def _add_register(self, name, width=32, access='rw', reset=0):
+        self._registers[name] = self.bank.add_register(
+            '{}_{}'.format(self.name, name.lower()), width=width, access=access, reset=reset)
+
+    def get_register_map(self):
+        return {
+            name: self.bank.get_offset(reg)
+            for name, reg in self._registers.items()
+        }
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        regs = self._registers
+
+        if self.edge:
+            last = Signal(self.n_sources)
+            sync += last.eq(self.sources)
+            events = self.sources & ~last
+        else:
+            events = self.sources
+
+        # Pending bits, an event in the same cycle as its ack wins
+        pending = Signal(self.n_sources)
+        acked = Signal(self.n_sources)
+        mask = Cat(*[regs['MASK_{}'.format(n)].r_data for n in range(self.n_groups)])
+        active = Signal(self.n_sources)
+        m.d.comb += active.eq(pending & mask)
+        for n in range(self.n_groups):
+            lo = 32 * n
+            hi = min(lo + 32, self.n_sources)
+            ack = regs['ACK_{}'.format(n)]
+            with m.If(ack.w_stb):
+                m.d.comb += acked[lo:hi].eq(ack.w_data)
+            m.d.comb += [
+                regs['PENDING_{}'.format(n)].r_data.eq(pending[lo:hi]),
+                regs['SUMMARY'].r_data[n].eq(active[lo:hi].any()),
+            ]
+        sync += pending.eq(pending & ~acked | events)
+
+        # Count new unmasked events, one group per popcount
+        new = Signal(self.n_sources)
+        m.d.comb += new.eq(events & mask & ~pending)
+        group_counts = []
+        for n in range(self.n_groups):
+            count = Signal(range(33), name='new{}'.format(n))
+            sync += count.eq(_popcount(new[32 * n:min(32 * n + 32, self.n_sources)]))
+            group_counts.append(count)
+        arrived = Signal(range(self.n_sources + 1))
+        m.d.comb += arrived.eq(sum(group_counts))
+
+        # Coalescing
+        fired = Signal()
+        count = Signal(16)
+        timer = Signal(32)
+        with m.If(fired):
+            with m.If(~active.any()):
+                sync += fired.eq(0)
+        with m.Elif((count + arrived >= regs['COAL_COUNT'].r_data) & (count + arrived != 0) |
+                    (count != 0) & (timer >= regs['COAL_TIMEOUT'].r_data)):
+            sync += [
+                fired.eq(1),
+                count.eq(0),
+                timer.eq(0),
+            ]
+        with m.Else():
+            sync += count.eq(count + arrived)
+            with m.If(count != 0):
+                sync += timer.eq(timer + 1)
+
+        m.d.comb += self.irq.eq(fired & regs['CTRL'].r_data[0])
+        return m
+
+
+class IrqLatencyProbe(Elaboratable):
+    '''
+        Measures how long the PS takes to handle an interrupt line. ``irq``
+        is the signal driven into ``get_irq_signal``, the probe only reads
+        it. Each rising edge is timestamped with a free running counter and
+        the time until the PS acknowledges, by writing ``ACK`` or toggling
+        ``gpio`` (an EMIO GPIO output such as ``ps.ports.EMIOGPIOO[0]``,
+        synchronized here), is added to a histogram held in a block RAM.
+        Bin ``n`` counts latencies in ``[n << shift, (n + 1) << shift)``
+        cycles, the last bin is open.
+
+        Registers:
+
+            CTRL        bit 0 enables the probe (default on), writing 1 to
+                        bit 1 clears the histogram and statistics, which
+                        takes ``bins`` cycles
+            ACK         any write acknowledges the interrupt
+            LAST        latest latency, in cycles
+            MIN/MAX     shortest and longest latency
+            COUNT       acknowledged interrupts
+            MISSED      rising edges while an earlier one was not yet
+                        acknowledged, those are not measured
+            HIST_INDEX  write only, selects the bin read through HIST_DATA
+            HIST_DATA   count of the selected bin, every read moves to the
+                        next bin so a FIXED burst reads the whole histogram
+    '''
+    def __init__(self, irq, bank, gpio=None, domain='sync', bins=256, shift=0,
+                 name='irqlat'):
+        assert bins >= 2 and bins & (bins - 1) == 0
+        self.irq = irq
+        self.bank = bank
+        self.gpio = gpio
+        self.domain = domain
+        self.bins = bins
+        self.shift = shift
+        self.name = name
+
+        self._registers = {}
+        self._add_register('CTRL', width=2, reset=1)
+        self._add_register('ACK', width=1, access='w')
+        for reg in ['LAST', 'MIN', 'MAX', 'COUNT', 'MISSED']:
+            self._add_register(reg, access='r')
+        self._add_register('HIST_INDEX', width=(bins - 1).bit_length(), access='w')
+        self._add_register('HIST_DATA', access='r')
+
+    def _add_register(self, name, width=32, access='rw', reset=0):
+        self._registers[name] = self.bank.add_register(
+            '{}_{}'.format(self.name, name.lower()), width=width, access=access, reset=reset)
+
+    def get_register_map(self):
+        return {
+            name: self.bank.get_offset(reg)
+            for name, reg in self._registers.items()
+        }
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        regs = self._registers
+
+        now = Signal(32)
+        sync += now.eq(now + 1)
+
+        last_irq = Signal()
+        sync += last_irq.eq(self.irq)
+        edge = self.irq & ~last_irq
+
+        ack = Signal()
+        m.d.comb += ack.eq(regs['ACK'].w_stb)
+        if self.gpio is not None:
+            gpio = Signal()
+            last_gpio = Signal()
+            m.submodules.gpio_sync = FFSynchronizer(self.gpio, gpio, o_domain=self.domain)
+            sync += last_gpio.eq(gpio)
+            m.d.comb += ack.eq(regs['ACK'].w_stb | (gpio != last_gpio))
+
+        # Histogram, the write side is a read-modify-write one cycle long
+        hist = Memory(width=32, depth=self.bins)
+        m.submodules.hist_wp = wp = hist.write_port(domain=self.domain)
+        m.submodules.hist_rp = rp = hist.read_port(domain=self.domain, transparent=False)
+        m.submodules.hist_bus = bus = hist.read_port(domain=self.domain, transparent=False)
+
+        index = Signal(range(self.bins))
+        m.d.comb += [
+            bus.addr.eq(index),
+            regs['HIST_DATA'].r_data.eq(bus.data),
+        ]
+        with m.If(regs['HIST_INDEX'].w_stb):
+            sync += index.eq(regs['HIST_INDEX'].w_data)
+        with m.Elif(regs['HIST_DATA'].r_stb):
+            sync += index.eq(index + 1)
+
+        enable = regs['CTRL'].r_data[0]
+        clear = regs['CTRL'].w_stb & regs['CTRL'].w_data[1]
+        clearing = Signal()
+        clear_addr = Signal(range(self.bins))
+
+        stats = {name: Signal(32, name=name.lower()) for name in ['LAST', 'MAX', 'COUNT', 'MISSED']}
+        stats['MIN'] = Signal(32, reset=2**32 - 1, name='min')
+        for name, stat in stats.items():
+            m.d.comb += regs[name].r_data.eq(stat)
+
+        waiting = Signal()
+        stamp = Signal(32)
+        latency = Signal(32)
+        m.d.comb += latency.eq(now - stamp)
+
+        scaled = latency >> self.shift
+        hist_bin = Signal(range(self.bins))
+        with m.If(scaled >= self.bins - 1):
+            m.d.comb += hist_bin.eq(self.bins - 1)
+        with m.Else():
+            m.d.comb += hist_bin.eq(scaled)
+
+        update = Signal()
+        update_bin = Signal(range(self.bins))
+        sync += [
+            update.eq(0),
+            update_bin.eq(hist_bin),
+        ]
+        m.d.comb += rp.addr.eq(hist_bin)
+
+        with m.If(clear):
+            sync += [
+                clearing.eq(1),
+                clear_addr.eq(0),
+                waiting.eq(0),
+            ]
+            sync += [stat.eq(stat.reset) for stat in stats.values()]
+        with m.Elif(clearing):
+            m.d.comb += [
+                wp.addr.eq(clear_addr),
+                wp.data.eq(0),
+                wp.en.eq(1),
+            ]
+            sync += clear_addr.eq(clear_addr + 1)
+            with m.If(clear_addr == self.bins - 1):
+                sync += clearing.eq(0)
+        with m.Elif(enable):
+            m.d.comb += [
+                wp.addr.eq(update_bin),
+                wp.data.eq(rp.data + 1),
+                wp.en.eq(update),
+            ]
+            with m.If(waiting & ack):
+                sync += [
+                    waiting.eq(0),
+                    update.eq(1),
+                    stats['LAST'].eq(latency),
+                    stats['COUNT'].eq(stats['COUNT'] + 1),
+                ]
+                with m.If(latency < stats['MIN']):
+                    sync += stats['MIN'].eq(latency)
+                with m.If(latency > stats['MAX']):
+                    sync += stats['MAX'].eq(latency)
+            with m.If(edge):
+                with m.If(waiting & ~ack):
+                    sync += stats['MISSED'].eq(stats['MISSED'] + 1)
+                with m.Else():
+                    sync += [
+                        waiting.eq(1),
+                        stamp.eq(now),
+                    ]
+
+        return m
@@ -0,0 +1,258 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Array, Cat, Const, Repl
+
+from .common import BURST_FIXED, get_stream_record
+
+__all__ = ['Mailbox']
+
+# Register words at the start of the window
+MAILBOX_REGS = ['TO_PL_HEAD', 'TO_PL_TAIL', 'TO_PS_HEAD', 'TO_PS_TAIL', 'CTRL', 'STATUS']
+
+
+class Mailbox(Elaboratable):
+    '''
+        Message rings between the PS and the PL, served straight from block
+        RAM on a record returned by ``get_axi`` for a MAXI port. The window
+        is split in four areas of ``depth`` 32 bit words, aliased across the
+        rest of the port window:
+
+            0   registers
+            1   TO_PL ring, written by the PS
+            2   TO_PS ring, read by the PS
+            3   unused, reads return 0
+
+        Registers, one word each:
+
+            TO_PL_HEAD  PS doorbell, written after filling the TO_PL ring
+            TO_PL_TAIL  words taken by the PL from the TO_PL ring
+            TO_PS_HEAD  words published by the PL in the TO_PS ring
+            TO_PS_TAIL  written by the PS after reading the TO_PS ring
+            CTRL        bit 0/1 routes STATUS bit 0/1 to ``irq`` (bit 0 on
+                        by default)
+            STATUS      bit 0 a TO_PS message arrived, bit 1 the PL took
+                        words from the TO_PL ring, cleared by writing 1
+
+        Pointers count words modulo ``2 * depth``, the ring index is the
+        pointer modulo ``depth``. The four pointers are consecutive so one
+        burst (a single beat on a 128 bit port) reads them all. On ports
+        wider than 32 bits the rings are as wide as the bus, so bursts move
+        a word per lane (honouring ``WSTRB``), and register beats carry
+        consecutive registers on their lanes.
+
+        The PL side is two streams: ``source`` returns the TO_PL words in
+        order, ``TLAST`` on the last word published by a doorbell write,
+        and ``sink`` fills the TO_PS ring, whose head only moves, and
+        STATUS bit 0 only rises, on ``TLAST`` so the PS never sees half a
+        message. ``irq`` is a level interrupt meant for ``get_irq_signal``.
+    '''
+    def __init__(self, axi, domain='sync', depth=512):
+        assert depth >= len(MAILBOX_REGS) and depth & (depth - 1) == 0
+        assert len(axi.WDATA) in (32, 64, 128)
+        self.axi = axi
+        self.domain = domain
+        self.depth = depth
+
+        self.source = get_stream_record(data_w=32, name='source')
+        self.sink = get_stream_record(data_w=32, name='sink')
+        self.irq = Signal()
+
+    def get_register_map(self):
+        regs = {name: 4 * i for i, name in enumerate(MAILBOX_REGS)}
+        regs['TO_PL_RING'] = 4 * self.depth
+        regs['TO_PS_RING'] = 8 * self.depth
+        return regs
+
+    def _decode(self, addr):
+        index_w = (self.depth - 1).bit_length()
+        return addr[2:2 + index_w], addr[2 + index_w:4 + index_w]
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+        ptr_w = (self.depth - 1).bit_length() + 1
+        addr_w = ptr_w - 1
+        lanes = len(axi.WDATA) // 32
+        lane_bits = (lanes - 1).bit_length()
+
+        # One row per bus beat, the PL side picks its word out of a row
+        to_pl = Memory(width=32 * lanes, depth=self.depth // lanes)
+        to_ps = Memory(width=32 * lanes, depth=self.depth // lanes)
+        m.submodules.to_pl_wp = to_pl_wp = to_pl.write_port(domain=self.domain, granularity=8)
+        m.submodules.to_pl_rp = to_pl_rp = to_pl.read_port(domain=self.domain, transparent=False)
+        m.submodules.to_ps_wp = to_ps_wp = to_ps.write_port(domain=self.domain, granularity=32)
+        m.submodules.to_ps_rp = to_ps_rp = to_ps.read_port(domain=self.domain, transparent=False)
+
+        to_pl_head = Signal(ptr_w)
+        to_pl_tail = Signal(ptr_w)
+        to_ps_head = Signal(ptr_w)
+        to_ps_tail = Signal(ptr_w)
+        ctrl = Signal(2, reset=1)
+        status = Signal(2)
+        regs = Array([to_pl_head, to_pl_tail, to_ps_head, to_ps_tail, ctrl, status] +
+                     [Const(0)] * (8 - len(MAILBOX_REGS)))
+
+        m.d.comb += self.irq.eq((status & ctrl).any())
+        status_set = Signal(2)
+        status_clr = Signal(2)
+        sync += status.eq(status & ~status_clr | status_set)
+
+        # PL side of the TO_PL ring, the memory output register is the
+        # output stage
+        rd_ptr = Signal(ptr_w)
+        fetch = Signal()
+        rd_next = Signal(ptr_w)
+        m.d.comb += [
+            rd_next.eq(rd_ptr + 1),
+            fetch.eq((rd_ptr != to_pl_head) & (~self.source.TVALID | self.source.TREADY)),
+            to_pl_rp.addr.eq(rd_ptr[lane_bits:addr_w]),
+            to_pl_rp.en.eq(fetch),
+        ]
+        if lanes > 1:
+            rd_lane = Signal(lane_bits)
+            with m.If(fetch):
+                sync += rd_lane.eq(rd_ptr[:lane_bits])
+            m.d.comb += self.source.TDATA.eq(to_pl_rp.data.word_select(rd_lane, 32))
+        else:
+            m.d.comb += self.source.TDATA.eq(to_pl_rp.data)
+        with m.If(fetch):
+            sync += [
+                rd_ptr.eq(rd_next),
+                self.source.TVALID.eq(1),
+                self.source.TLAST.eq(rd_next == to_pl_head),
+            ]
+        with m.Elif(self.source.TREADY):
+            sync += self.source.TVALID.eq(0)
+        with m.If(self.source.TVALID & self.source.TREADY):
+            sync += to_pl_tail.eq(to_pl_tail + 1)
+            m.d.comb += status_set[1].eq(1)
+
+        # PL side of the TO_PS ring
+        wr_ptr = Signal(ptr_w)
+        m.d.comb += [
+            self.sink.TREADY.eq((wr_ptr - to_ps_tail)[:ptr_w] != self.depth),
+            to_ps_wp.addr.eq(wr_ptr[lane_bits:addr_w]),
+            to_ps_wp.data.eq(Repl(self.sink.TDATA, lanes)),
+        ]
+        with m.If(self.sink.TVALID & self.sink.TREADY):
+            if lanes > 1:
+                m.d.comb += to_ps_wp.en.eq(1 << wr_ptr[:lane_bits])
+            else:
+                m.d.comb += to_ps_wp.en.eq(1)
+        with m.If(self.sink.TVALID & self.sink.TREADY):
+            sync += wr_ptr.eq(wr_ptr + 1)
+            with m.If(self.sink.TLAST):
+                sync += to_ps_head.eq(wr_ptr + 1)
+                m.d.comb += status_set[0].eq(1)
+
+        # AXI writes
+        aw_addr = Signal.like(axi.AWADDR)
+        aw_id = Signal.like(axi.AWID)
+        aw_burst = Signal.like(axi.AWBURST)
+        aw_size = Signal.like(axi.AWSIZE)
+
+        w_index, w_area = self._decode(aw_addr)
+        m.d.comb += [
+            to_pl_wp.addr.eq(w_index[lane_bits:]),
+            to_pl_wp.data.eq(axi.WDATA),
+        ]
+
+        with m.FSM(domain=self.domain, name='write'):
+            with m.State('ADDR'):
+                m.d.comb += axi.AWREADY.eq(1)
+                with m.If(axi.AWVALID):
+                    sync += [
+                        aw_addr.eq(axi.AWADDR),
+                        aw_id.eq(axi.AWID),
+                        aw_burst.eq(axi.AWBURST),
+                        aw_size.eq(axi.AWSIZE),
+                    ]
+                    m.next = 'DATA'
+            with m.State('DATA'):
+                m.d.comb += axi.WREADY.eq(1)
+                with m.If(axi.WVALID):
+                    with m.If(w_area == 1):
+                        m.d.comb += to_pl_wp.en.eq(axi.WSTRB)
+                    with m.Elif(w_area == 0):
+                        # Every strobed lane writes its own register
+                        for i in range(lanes):
+                            w_data = axi.WDATA.word_select(i, 32)
+                            with m.If(axi.WSTRB.word_select(i, 4).any()):
+                                with m.Switch(Cat(Const(i, lane_bits), w_index[lane_bits:])):
+                                    with m.Case(MAILBOX_REGS.index('TO_PL_HEAD')):
+                                        sync += to_pl_head.eq(w_data)
+                                    with m.Case(MAILBOX_REGS.index('TO_PS_TAIL')):
+                                        sync += to_ps_tail.eq(w_data)
+                                    with m.Case(MAILBOX_REGS.index('CTRL')):
+                                        sync += ctrl.eq(w_data)
+                                    with m.Case(MAILBOX_REGS.index('STATUS')):
+                                        m.d.comb += status_clr.eq(w_data)
+                    with m.If(aw_burst != BURST_FIXED):
+                        sync += aw_addr.eq(aw_addr + (Const(1) << aw_size))
+                    with m.If(axi.WLAST):
+                        m.next = 'RESP'
+            with m.State('RESP'):
+                m.d.comb += [
+                    axi.BVALID.eq(1),
+                    axi.BID.eq(aw_id),
+                ]
+                with m.If(axi.BREADY):
+                    m.next = 'ADDR'
+
+        # AXI reads
+        ar_addr = Signal.like(axi.ARADDR)
+        ar_id = Signal.like(axi.ARID)
+        ar_len = Signal.like(axi.ARLEN)
+        ar_burst = Signal.like(axi.ARBURST)
+        ar_size = Signal.like(axi.ARSIZE)
+        r_count = Signal.like(axi.ARLEN)
+        r_area = Signal(2)
+        r_regs = Signal(len(axi.RDATA))
+
+        r_index, ar_area = self._decode(ar_addr)
+        m.d.comb += to_ps_rp.addr.eq(r_index[lane_bits:])
+        words = [Signal(32, name='r_word{}'.format(i)) for i in range(lanes)]
+        for i, word in enumerate(words):
+            m.d.comb += word.eq(regs[Cat(Const(i, lane_bits), r_index[lane_bits:3])])
+
+        with m.FSM(domain=self.domain, name='read'):
+            with m.State('ADDR'):
+                m.d.comb += axi.ARREADY.eq(1)
+                with m.If(axi.ARVALID):
+                    sync += [
+                        ar_addr.eq(axi.ARADDR),
+                        ar_id.eq(axi.ARID),
+                        ar_len.eq(axi.ARLEN),
+                        ar_burst.eq(axi.ARBURST),
+                        ar_size.eq(axi.ARSIZE),
+                        r_count.eq(0),
+                    ]
+                    m.next = 'FETCH'
+            with m.State('FETCH'):
+                m.d.comb += to_ps_rp.en.eq(1)
+                sync += r_area.eq(ar_area)
+                with m.If(r_index < 8):
+                    sync += r_regs.eq(Cat(*words))
+                with m.Else():
+                    sync += r_regs.eq(0)
+                m.next = 'DATA'
+            with m.State('DATA'):
+                with m.Switch(r_area):
+                    with m.Case(0):
+                        m.d.comb += axi.RDATA.eq(r_regs)
+                    with m.Case(2):
+                        m.d.comb += axi.RDATA.eq(to_ps_rp.data)
+                m.d.comb += [
+                    axi.RVALID.eq(1),
+                    axi.RID.eq(ar_id),
+                    axi.RLAST.eq(r_count == ar_len),
+                ]
+                with m.If(axi.RREADY):
+                    sync += r_count.eq(r_count + 1)
+                    with m.If(ar_burst != BURST_FIXED):
+                        sync += ar_addr.eq(ar_addr + (Const(1) << ar_size))
+                    with m.If(r_count == ar_len):
+                        m.next = 'ADDR'
+                    with m.Else():
+                        m.next = 'FETCH'
+
+        return m
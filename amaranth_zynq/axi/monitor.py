@@ -0,0 +1,236 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Array
+
+__all__ = ['AxiPerfMonitor']
+
+
+class _LatencyTracker(Elaboratable):
+    '''
+        Matches transaction starts and ends by ID. Timestamps are queued per
+        ID slot (the low ``slot_bits`` bits of the ID), which keeps the AXI
+        ordering rule exact as long as distinct IDs don't alias to a slot.
+    '''
+    def __init__(self, id_w, ts_w, slot_bits, depth, domain):
+        self.slot_bits = min(id_w, slot_bits)
+        self.depth = depth
+        self.domain = domain
+
+        self.now = Signal(ts_w)
+        self.start = Signal()
+        self.start_id = Signal(id_w)
+        self.stop = Signal()
+        self.stop_id = Signal(id_w)
+
+        self.done = Signal()
+        self.latency = Signal(ts_w)
+        self.overflow = Signal()
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+
+        slots = 2 ** self.slot_bits
+        ptr_w = (self.depth - 1).bit_length()
+        mem = Memory(width=len(self.now), depth=slots * self.depth)
+        m.submodules.wp = wp = mem.write_port(domain=self.domain)
+        m.submodules.rp = rp = mem.read_port(domain='comb')
+
+        wptr = Array(Signal(ptr_w + 1, name='wptr{}'.format(i)) for i in range(slots))
+        rptr = Array(Signal(ptr_w + 1, name='rptr{}'.format(i)) for i in range(slots))
+
+        start_slot = self.start_id[:self.slot_bits]
+        stop_slot = self.stop_id[:self.slot_bits]
+        full = (wptr[start_slot] - rptr[start_slot]) == self.depth
+        empty = wptr[stop_slot] == rptr[stop_slot]
+
+        def index(slot, ptr):
+            if ptr_w == 0:
+                return slot
+            return (slot << ptr_w) | ptr[:ptr_w]
+
+        m.d.comb += [
+            wp.addr.eq(index(start_slot, wptr[start_slot])),
+            wp.data.eq(self.now),
+            rp.addr.eq(index(stop_slot, rptr[stop_slot])),
+            self.latency.eq(self.now - rp.data),
+        ]
+
+        with m.If(self.start):
+            with m.If(full):
+                m.d.comb += self.overflow.eq(1)
+            with m.Else():
+                m.d.comb += wp.en.eq(1)
+                sync += wptr[start_slot].eq(wptr[start_slot] + 1)
+
+        with m.If(self.stop & ~empty):
+            m.d.comb += self.done.eq(1)
+            sync += rptr[stop_slot].eq(rptr[stop_slot] + 1)
+
+        return m
+
+
+class AxiPerfMonitor(Elaboratable):
+    '''
+        Passive bandwidth and latency monitor for an AXI record, such as the
+        ones returned by ``get_axi``. It only observes the record, so it can
+        be attached next to whatever drives it.
+
+        Counters are exposed through an ``AxiRegisterBank`` (usually on a
+        MAXI port), starting at ``base``:
+
+            CTRL            bit 0 enables counting (default on),
+                            writing 1 to bit 1 clears every counter
+            CYCLES_LO/HI    enabled cycles
+            RD_BURSTS       AR handshakes
+            RD_BEATS        R handshakes
+            RD_BYTES_LO/HI  bytes requested by AR, (ARLEN + 1) << ARSIZE
+            WR_BURSTS       AW handshakes
+            WR_BEATS        W handshakes
+            WR_BYTES_LO/HI  bytes written, enabled WSTRB bits
+            AR/R/AW/W/B_STALLS  cycles with VALID high and READY low
+            RD_LAT_MIN/MAX, RD_LAT_SUM_LO/HI, RD_LAT_COUNT
+                            cycles from AR handshake to the last R beat
+            WR_LAT_MIN/MAX, WR_LAT_SUM_LO/HI, WR_LAT_COUNT
+                            cycles from AW handshake to the B handshake
+            RD_LAT_HIST*/WR_LAT_HIST*
+                            latency histogram, bin ``n`` counts latencies
+                            in ``[2**n, 2**(n+1))``, the last bin is open
+
+        ``get_register_map()`` returns the offsets of every register.
+    '''
+    def __init__(self, axi, bank, domain='sync', hist_bins=16, id_slot_bits=4,
+                 max_outstanding=8, name='mon'):
+        self.axi = axi
+        self.name = name
+        self.bank = bank
+        self.domain = domain
+        self.hist_bins = hist_bins
+        self.id_slot_bits = id_slot_bits
+        self.max_outstanding = max_outstanding
+
+        self.ctrl = bank.add_register(name + '_ctrl', width=2, reset=1)
+        self.base = bank.get_offset(self.ctrl)
+        self._counters = {}
+        self._registers = {'CTRL': self.ctrl}
+
+        self._add_counter('CYCLES', 64)
+        for counter in ['RD_BURSTS', 'RD_BEATS']:
+            self._add_counter(counter)
+        self._add_counter('RD_BYTES', 64)
+        for counter in ['WR_BURSTS', 'WR_BEATS']:
+            self._add_counter(counter)
+        self._add_counter('WR_BYTES', 64)
+        for ch in ['AR', 'R', 'AW', 'W', 'B']:
+            self._add_counter(ch + '_STALLS')
+        for d in ['RD', 'WR']:
+            self._add_counter(d + '_LAT_MIN', reset=2**32 - 1)
+            self._add_counter(d + '_LAT_MAX')
+            self._add_counter(d + '_LAT_SUM', 64)
+            self._add_counter(d + '_LAT_COUNT')
+        for d in ['RD', 'WR']:
+            for i in range(hist_bins):
+                self._add_counter('{}_LAT_HIST{}'.format(d, i))
+
+    def _add_counter(self, name, width=32, reset=0):
+        counter = Signal(width, reset=reset, name=name.lower())
+        self._counters[name] = counter
+        if width <= 32:
+            self._registers[name] = self.bank.add_register(
+                '{}_{}'.format(self.name, name.lower()), access='r')
+        else:
+            for i, suffix in enumerate(['_LO', '_HI']):
+                self._registers[name + suffix] = self.bank.add_register(
+                    '{}_{}'.format(self.name, (name + suffix).lower()), access='r')
+
+    def get_register_map(self):
+        return {
+            name: self.bank.get_offset(reg)
+            for name, reg in self._registers.items()
+        }
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+        c = self._counters
+
+        for name, counter in c.items():
+            if len(counter) <= 32:
+                m.d.comb += self._registers[name].r_data.eq(counter)
+            else:
+                m.d.comb += [
+                    self._registers[name + '_LO'].r_data.eq(counter[:32]),
+                    self._registers[name + '_HI'].r_data.eq(counter[32:]),
+                ]
+
+        enable = self.ctrl.r_data[0]
+        clear = self.ctrl.w_stb & self.ctrl.w_data[1]
+
+        now = Signal(32)
+        sync += now.eq(now + 1)
+
+        ar = axi.ARVALID & axi.ARREADY
+        r = axi.RVALID & axi.RREADY
+        aw = axi.AWVALID & axi.AWREADY
+        w = axi.WVALID & axi.WREADY
+        b = axi.BVALID & axi.BREADY
+
+        trackers = {}
+        for d, start, start_id, stop, stop_id in [
+                ('RD', ar, axi.ARID, r & axi.RLAST, axi.RID),
+                ('WR', aw, axi.AWID, b, axi.BID)]:
+            tracker = _LatencyTracker(len(start_id), len(now), self.id_slot_bits,
+                                      self.max_outstanding, self.domain)
+            m.submodules[d.lower() + '_latency'] = tracker
+            m.d.comb += [
+                tracker.now.eq(now),
+                tracker.start.eq(start),
+                tracker.start_id.eq(start_id),
+                tracker.stop.eq(stop),
+                tracker.stop_id.eq(stop_id),
+            ]
+            trackers[d] = tracker
+
+        with m.If(clear):
+            sync += [counter.eq(counter.reset) for counter in c.values()]
+        with m.Elif(enable):
+            sync += c['CYCLES'].eq(c['CYCLES'] + 1)
+            with m.If(ar):
+                sync += [
+                    c['RD_BURSTS'].eq(c['RD_BURSTS'] + 1),
+                    c['RD_BYTES'].eq(c['RD_BYTES'] + ((axi.ARLEN + 1) << axi.ARSIZE)),
+                ]
+            with m.If(r):
+                sync += c['RD_BEATS'].eq(c['RD_BEATS'] + 1)
+            with m.If(aw):
+                sync += c['WR_BURSTS'].eq(c['WR_BURSTS'] + 1)
+            with m.If(w):
+                sync += [
+                    c['WR_BEATS'].eq(c['WR_BEATS'] + 1),
+                    c['WR_BYTES'].eq(c['WR_BYTES'] + sum(axi.WSTRB)),
+                ]
+            for ch in ['AR', 'R', 'AW', 'W', 'B']:
+                with m.If(axi[ch + 'VALID'] & ~axi[ch + 'READY']):
+                    stalls = c[ch + '_STALLS']
+                    sync += stalls.eq(stalls + 1)
+
+            for d, tracker in trackers.items():
+                latency = tracker.latency
+                lat_min = c[d + '_LAT_MIN']
+                lat_max = c[d + '_LAT_MAX']
+                hist = Array(c['{}_LAT_HIST{}'.format(d, i)] for i in range(self.hist_bins))
+                hist_bin = Signal(range(self.hist_bins))
+                for i in range(1, self.hist_bins):
+                    with m.If(latency >= 2**i):
+                        m.d.comb += hist_bin.eq(i)
+                with m.If(tracker.done):
+                    sync += [
+                        c[d + '_LAT_SUM'].eq(c[d + '_LAT_SUM'] + latency),
+                        c[d + '_LAT_COUNT'].eq(c[d + '_LAT_COUNT'] + 1),
+                        hist[hist_bin].eq(hist[hist_bin] + 1),
+                    ]
+                    with m.If(latency < lat_min):
+                        sync += lat_min.eq(latency)
+                    with m.If(latency > lat_max):
+                        sync += lat_max.eq(latency)
+
+        return m
@@ -0,0 +1,226 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Record, Cat, Mux
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.hdl.xfrm import DomainRenamer
+
+from .width import ADDR_W, _log2, _next_addr
+
+__all__ = ['AxiRam']
+
+
+class _Burst:
+    '''
+        Address channel fields queued until the data beats of the burst.
+    '''
+    def __init__(self, axi, ch):
+        self.fields = [
+            ('addr', len(axi[ch + 'ADDR'])),
+            ('size', len(axi[ch + 'SIZE'])),
+            ('burst', 2),
+            ('len', len(axi[ch + 'LEN'])),
+            ('id', len(axi[ch + 'ID'])),
+        ]
+        self.width = sum(w for _, w in self.fields)
+        self.axi = axi
+        self.ch = ch
+
+    def pack(self):
+        return Cat(*[self.axi[self.ch + name.upper()] for name, _ in self.fields])
+
+    def unpack(self, data):
+        values = {}
+        offset = 0
+        for name, w in self.fields:
+            values[name] = data[offset:offset + w]
+            offset += w
+        return values
+
+
+class AxiRam(Elaboratable):
+    '''
+        Full AXI memory of ``size`` bytes, as wide as the data bus of
+        ``axi`` (usually a MAXI port from ``get_axi``), aliased across the
+        rest of the port window. FIXED, INCR and WRAP bursts of any size
+        and length are served at one beat per cycle (shared between reads
+        and writes), with up to
+        ``max_reads`` read and ``max_writes`` write bursts accepted ahead
+        of their data; responses come back in order, whatever their IDs.
+
+        The memory has two physical ports, so it maps onto a single block
+        RAM, or UltraRAM with ``uram=True`` (UltraScale+ only, no ``init``
+        then): AXI reads and writes share the read/write port A, taking
+        turns when both are pending, and the PL reads through ``port``, a
+        read port in ``domain`` without transparency, on port B. With
+        ``pl_write=True`` the PL also writes through ``write_port``
+        (``addr``, ``data`` and byte enables ``en``, like a ``Memory``
+        write port) on port A; PL writes always win and stall the AXI side
+        for that cycle. Write strobes are honoured. Port A never reads and
+        writes in the same cycle, which UltraRAM requires.
+    '''
+    def __init__(self, axi, size, domain='sync', max_reads=4, max_writes=4,
+                 uram=False, init=None, pl_write=False):
+        data_bytes = len(axi.WDATA) // 8
+        assert size % data_bytes == 0
+        assert not (uram and init is not None), 'UltraRAM can not be initialized'
+        self.axi = axi
+        self.size = size
+        self.domain = domain
+        self.max_reads = max_reads
+        self.max_writes = max_writes
+
+        self.mem = Memory(width=len(axi.WDATA), depth=size // data_bytes, init=init,
+                          attrs={'ram_style': 'ultra' if uram else 'block'})
+        self.port = self.mem.read_port(domain=domain, transparent=False)
+        self.write_port = None
+        if pl_write:
+            self.write_port = Record([
+                ('addr', range(self.mem.depth)),
+                ('data', self.mem.width),
+                ('en', data_bytes),
+            ], name='write_port')
+
+    def _index(self, addr):
+        lo = _log2(len(self.axi.WDATA) // 8)
+        return addr[lo:lo + _log2(self.mem.depth)]
+
+    def _addr(self, m, name, burst, first, cur, advance):
+        '''
+            Address of the current beat, the burst start on its first beat.
+            Bursts never cross 4KB, only the low bits move.
+        '''
+        addr = Signal.like(cur, name=name)
+        m.d.comb += addr.eq(Mux(first, burst['addr'], cur))
+        with m.If(advance):
+            m.d[self.domain] += cur.eq(Cat(
+                _next_addr(addr[:ADDR_W], burst['size'], burst['burst'], burst['len']),
+                addr[ADDR_W:]))
+        return addr
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+        id_w = len(axi.AWID)
+
+        # Port B is the PL read port, port A serves everything else from a
+        # single address
+        m.submodules.port = self.port
+        m.submodules.wp = wp = self.mem.write_port(domain=self.domain, granularity=8)
+        m.submodules.rp = rp = self.mem.read_port(domain=self.domain, transparent=False)
+        a_addr = Signal(range(self.mem.depth))
+        m.d.comb += [
+            wp.addr.eq(a_addr),
+            rp.addr.eq(a_addr),
+        ]
+        pl_write = Signal()
+        if self.write_port is not None:
+            m.d.comb += pl_write.eq(self.write_port.en.any())
+        # Reads and AXI writes alternate while both are pending
+        prefer_read = Signal()
+        read_wanted = Signal()
+        w_possible = Signal()
+
+        # Writes
+        aw = _Burst(axi, 'AW')
+        aw_fifo = SyncFIFO(width=aw.width, depth=self.max_writes)
+        b_fifo = SyncFIFO(width=id_w, depth=self.max_writes)
+        if self.domain != 'sync':
+            aw_fifo = DomainRenamer(self.domain)(aw_fifo)
+            b_fifo = DomainRenamer(self.domain)(b_fifo)
+        m.submodules.aw_fifo = aw_fifo
+        m.submodules.b_fifo = b_fifo
+        w_burst = aw.unpack(aw_fifo.r_data)
+        w_first = Signal(reset=1)
+        w_cur = Signal.like(axi.AWADDR)
+        w_beat = Signal()
+
+        m.d.comb += [
+            aw_fifo.w_data.eq(aw.pack()),
+            aw_fifo.w_en.eq(axi.AWVALID),
+            axi.AWREADY.eq(aw_fifo.w_rdy),
+            w_possible.eq(aw_fifo.r_rdy & b_fifo.w_rdy & ~pl_write),
+            axi.WREADY.eq(w_possible & ~(read_wanted & prefer_read)),
+            w_beat.eq(axi.WVALID & axi.WREADY),
+        ]
+        w_addr = self._addr(m, 'w_addr', w_burst, w_first, w_cur, w_beat)
+        with m.If(w_beat):
+            m.d.comb += [
+                a_addr.eq(self._index(w_addr)),
+                wp.data.eq(axi.WDATA),
+                wp.en.eq(axi.WSTRB),
+            ]
+            sync += w_first.eq(axi.WLAST)
+            with m.If(axi.WLAST):
+                m.d.comb += [
+                    aw_fifo.r_en.eq(1),
+                    b_fifo.w_en.eq(1),
+                ]
+        m.d.comb += [
+            b_fifo.w_data.eq(w_burst['id']),
+            axi.BVALID.eq(b_fifo.r_rdy),
+            axi.BID.eq(b_fifo.r_data),
+            b_fifo.r_en.eq(axi.BREADY),
+        ]
+
+        # Reads, one memory read per cycle while the R FIFO has room for it
+        ar = _Burst(axi, 'AR')
+        ar_fifo = SyncFIFO(width=ar.width, depth=self.max_reads)
+        r_fifo = SyncFIFO(width=len(axi.RDATA) + id_w + 1, depth=4)
+        if self.domain != 'sync':
+            ar_fifo = DomainRenamer(self.domain)(ar_fifo)
+            r_fifo = DomainRenamer(self.domain)(r_fifo)
+        m.submodules.ar_fifo = ar_fifo
+        m.submodules.r_fifo = r_fifo
+        r_burst = ar.unpack(ar_fifo.r_data)
+        r_first = Signal(reset=1)
+        r_cur = Signal.like(axi.ARADDR)
+        r_count = Signal.like(axi.ARLEN)
+        issue = Signal()
+        pending = Signal()
+        pending_id = Signal(id_w)
+        pending_last = Signal()
+
+        m.d.comb += [
+            ar_fifo.w_data.eq(ar.pack()),
+            ar_fifo.w_en.eq(axi.ARVALID),
+            axi.ARREADY.eq(ar_fifo.w_rdy),
+            read_wanted.eq(ar_fifo.r_rdy & (r_fifo.level + pending < r_fifo.depth)),
+            issue.eq(read_wanted & ~pl_write & ~w_beat),
+            rp.en.eq(issue),
+        ]
+        with m.If(read_wanted & axi.WVALID & w_possible):
+            sync += prefer_read.eq(~prefer_read)
+        r_addr = self._addr(m, 'r_addr', r_burst, r_first, r_cur, issue)
+        sync += [
+            pending.eq(issue),
+            pending_id.eq(r_burst['id']),
+            pending_last.eq(r_count == r_burst['len']),
+        ]
+        with m.If(issue):
+            m.d.comb += a_addr.eq(self._index(r_addr))
+            sync += [
+                r_count.eq(r_count + 1),
+                r_first.eq(0),
+            ]
+            with m.If(r_count == r_burst['len']):
+                m.d.comb += ar_fifo.r_en.eq(1)
+                sync += [
+                    r_count.eq(0),
+                    r_first.eq(1),
+                ]
+        if self.write_port is not None:
+            with m.If(pl_write):
+                m.d.comb += [
+                    a_addr.eq(self.write_port.addr),
+                    wp.data.eq(self.write_port.data),
+                    wp.en.eq(self.write_port.en),
+                ]
+
+        m.d.comb += [
+            r_fifo.w_data.eq(Cat(rp.data, pending_id, pending_last)),
+            r_fifo.w_en.eq(pending),
+            Cat(axi.RDATA, axi.RID, axi.RLAST).eq(r_fifo.r_data),
+            axi.RVALID.eq(r_fifo.r_rdy),
+            r_fifo.r_en.eq(axi.RREADY),
+        ]
+
+        return m
@@ -0,0 +1,169 @@
+from amaranth import Elaboratable, Module, Signal, Cat, Repl, Const, Mux
+
+from .common import BURST_FIXED
+
+__all__ = ['Register', 'AxiRegisterBank']
+
+
+class Register:
+    '''
+        A register of an ``AxiRegisterBank``.
+
+        ``r_data`` is returned on reads: the bank holds it for ``rw``
+        registers, the owner drives it for ``r`` and ``w1c`` registers.
+        ``w_data`` is the value being written (partial strobes already merged)
+        and is valid while ``w_stb`` is asserted. ``r_stb`` pulses once per
+        read beat. ``w1c`` registers are meant for status bits that are
+        cleared by writing ones, which the owner does on ``w_stb``.
+    '''
+    def __init__(self, name, width=32, access='rw', reset=0):
+        assert access in ('r', 'w', 'rw', 'w1c')
+        assert width <= 32
+        self.name = name
+        self.width = width
+        self.access = access
+        self.r_data = Signal(width, reset=reset, name=name + '_r_data')
+        self.r_stb = Signal(name=name + '_r_stb')
+        self.w_data = Signal(width, name=name + '_w_data')
+        self.w_stb = Signal(name=name + '_w_stb')
+
+
+class AxiRegisterBank(Elaboratable):
+    '''
+        AXI slave exposing 32 bit registers on a record returned by
+        ``get_axi`` for a MAXI port (or any AXI record driven by a master).
+
+        Register ``n`` sits at byte offset ``4 * n``; upper address bits are
+        not decoded, so the bank aliases across the whole port window. Full
+        AXI bursts are accepted, one transaction per direction at a time.
+        Several cores can share one bank by adding their own registers.
+    '''
+    def __init__(self, axi, domain='sync'):
+        self.axi = axi
+        self.domain = domain
+        self.registers = []
+
+    def add_register(self, name, width=32, access='rw', reset=0):
+        reg = Register(name, width, access, reset)
+        self.registers.append(reg)
+        return reg
+
+    def get_offset(self, reg):
+        return 4 * self.registers.index(reg)
+
+    def get_register_map(self):
+        return {reg.name: self.get_offset(reg) for reg in self.registers}
+
+    def _get_index(self, addr):
+        index_w = max(1, (len(self.registers) - 1).bit_length())
+        return addr[2:2 + index_w]
+
+    def _get_lane(self, addr):
+        lanes = len(self.axi.WDATA) // 32
+        if lanes <= 1:
+            return Const(0)
+        return addr[2:2 + (lanes - 1).bit_length()]
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        axi = self.axi
+
+        aw_addr = Signal.like(axi.AWADDR)
+        aw_id = Signal.like(axi.AWID)
+        aw_burst = Signal.like(axi.AWBURST)
+        aw_size = Signal.like(axi.AWSIZE)
+
+        w_lane = self._get_lane(aw_addr)
+        w_data = axi.WDATA.word_select(w_lane, 32) if len(axi.WDATA) > 32 else axi.WDATA
+        w_strb = axi.WSTRB.word_select(w_lane, 4) if len(axi.WSTRB) > 4 else axi.WSTRB
+
+        for reg in self.registers:
+            merged = Cat(*[
+                Mux(w_strb[i], w_data[8 * i:8 * i + 8], reg.r_data[8 * i:8 * i + 8])
+                for i in range((reg.width + 7) // 8)
+            ])
+            m.d.comb += reg.w_data.eq(merged)
+            if reg.access == 'rw':
+                with m.If(reg.w_stb):
+                    sync += reg.r_data.eq(reg.w_data)
+
+        with m.FSM(domain=self.domain, name='write'):
+            with m.State('ADDR'):
+                m.d.comb += axi.AWREADY.eq(1)
+                with m.If(axi.AWVALID):
+                    sync += [
+                        aw_addr.eq(axi.AWADDR),
+                        aw_id.eq(axi.AWID),
+                        aw_burst.eq(axi.AWBURST),
+                        aw_size.eq(axi.AWSIZE),
+                    ]
+                    m.next = 'DATA'
+            with m.State('DATA'):
+                m.d.comb += axi.WREADY.eq(1)
+                with m.If(axi.WVALID):
+                    with m.Switch(self._get_index(aw_addr)):
+                        for i, reg in enumerate(self.registers):
+                            if reg.access != 'r':
+                                with m.Case(i):
+                                    m.d.comb += reg.w_stb.eq(1)
+                    with m.If(aw_burst != BURST_FIXED):
+                        sync += aw_addr.eq(aw_addr + (Const(1) << aw_size))
+                    with m.If(axi.WLAST):
+                        m.next = 'RESP'
+            with m.State('RESP'):
+                m.d.comb += [
+                    axi.BVALID.eq(1),
+                    axi.BID.eq(aw_id),
+                ]
+                with m.If(axi.BREADY):
+                    m.next = 'ADDR'
+
+        ar_addr = Signal.like(axi.ARADDR)
+        ar_id = Signal.like(axi.ARID)
+        ar_len = Signal.like(axi.ARLEN)
+        ar_burst = Signal.like(axi.ARBURST)
+        ar_size = Signal.like(axi.ARSIZE)
+        r_count = Signal.like(axi.ARLEN)
+        r_data = Signal(32)
+
+        with m.FSM(domain=self.domain, name='read'):
+            with m.State('ADDR'):
+                m.d.comb += axi.ARREADY.eq(1)
+                with m.If(axi.ARVALID):
+                    sync += [
+                        ar_addr.eq(axi.ARADDR),
+                        ar_id.eq(axi.ARID),
+                        ar_len.eq(axi.ARLEN),
+                        ar_burst.eq(axi.ARBURST),
+                        ar_size.eq(axi.ARSIZE),
+                        r_count.eq(0),
+                    ]
+                    m.next = 'FETCH'
+            with m.State('FETCH'):
+                sync += r_data.eq(0)
+                with m.Switch(self._get_index(ar_addr)):
+                    for i, reg in enumerate(self.registers):
+                        if reg.access != 'w':
+                            with m.Case(i):
+                                m.d.comb += reg.r_stb.eq(1)
+                                sync += r_data.eq(reg.r_data)
+                m.next = 'DATA'
+            with m.State('DATA'):
+                m.d.comb += [
+                    axi.RVALID.eq(1),
+                    axi.RID.eq(ar_id),
+                    axi.RDATA.eq(Repl(r_data, len(axi.RDATA) // 32)),
+                    axi.RLAST.eq(r_count == ar_len),
+                ]
+                with m.If(axi.RREADY):
+                    sync += r_count.eq(r_count + 1)
+                    with m.If(ar_burst != BURST_FIXED):
+                        sync += ar_addr.eq(ar_addr + (Const(1) << ar_size))
+                    with m.If(r_count == ar_len):
+                        m.next = 'ADDR'
+                    with m.Else():
+                        m.next = 'FETCH'
+
+        return m
+
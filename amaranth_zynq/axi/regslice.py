@@ -0,0 +1,88 @@
+from amaranth import Elaboratable, Module, Signal, Cat
+
+from .common import CHANNELS, MASTER_CHANNELS, SLAVE_CHANNELS
+
+__all__ = ['SkidBuffer', 'AxiRegisterSlice']
+
+
+class SkidBuffer(Elaboratable):
+    '''
+        Valid/ready register stage with registered outputs in both
+        directions (``i_ready`` included) and one transfer per cycle. The
+        second register holds the beat accepted while the output stalls.
+    '''
+    def __init__(self, width, domain='sync'):
+        self.width = width
+        self.domain = domain
+
+        self.i_data = Signal(width)
+        self.i_valid = Signal()
+        self.i_ready = Signal()
+
+        self.o_data = Signal(width)
+        self.o_valid = Signal()
+        self.o_ready = Signal()
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+
+        skid_data = Signal(self.width)
+        skid_valid = Signal()
+        m.d.comb += self.i_ready.eq(~skid_valid)
+
+        with m.If(self.o_ready | ~self.o_valid):
+            with m.If(skid_valid):
+                sync += [
+                    self.o_data.eq(skid_data),
+                    self.o_valid.eq(1),
+                    skid_valid.eq(0),
+                ]
+            with m.Else():
+                sync += [
+                    self.o_data.eq(self.i_data),
+                    self.o_valid.eq(self.i_valid),
+                ]
+        with m.Elif(self.i_valid & self.i_ready):
+            sync += [
+                skid_data.eq(self.i_data),
+                skid_valid.eq(1),
+            ]
+
+        return m
+
+
+class AxiRegisterSlice(Elaboratable):
+    '''
+        One ``SkidBuffer`` per channel between an AXI ``master`` and
+        ``slave`` record with the same layout, cutting every path between
+        them without losing throughput. Fields outside the five channels
+        (clocks, FIFO levels...) are not touched.
+    '''
+    def __init__(self, master, slave, domain='sync'):
+        self.master = master
+        self.slave = slave
+        self.domain = domain
+
+    def elaborate(self, platform):
+        m = Module()
+        for ch in MASTER_CHANNELS + SLAVE_CHANNELS:
+            if ch in MASTER_CHANNELS:
+                src, dst = self.master, self.slave
+            else:
+                src, dst = self.slave, self.master
+            fields = [f for f in CHANNELS[ch] if f in src.fields and f in dst.fields]
+            i_data = Cat(*[src[f] for f in fields])
+            o_data = Cat(*[dst[f] for f in fields])
+
+            skid = SkidBuffer(len(i_data), self.domain)
+            m.submodules[ch.lower()] = skid
+            m.d.comb += [
+                skid.i_data.eq(i_data),
+                skid.i_valid.eq(src[ch + 'VALID']),
+                src[ch + 'READY'].eq(skid.i_ready),
+                o_data.eq(skid.o_data),
+                dst[ch + 'VALID'].eq(skid.o_valid),
+                skid.o_ready.eq(dst[ch + 'READY']),
+            ]
+        return m
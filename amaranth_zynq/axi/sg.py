@@ -0,0 +1,320 @@
+from amaranth import Elaboratable, Module, Signal, Cat, Const, Mux
+from amaranth.lib.fifo import SyncFIFOBuffered
+from amaranth.hdl.xfrm import DomainRenamer
+
+from .dma import AxiReader, AxiWriter
+from .interconnect import AxiArbiter
+
+__all__ = ['AxiSgDma', 'DESC_BYTES', 'DESC_FLAG_IRQ']
+
+DESC_BYTES = 16
+DESC_FLAG_IRQ = 1 << 0
+
+
+class _SgChannel(Elaboratable):
+    '''
+        Descriptor ring handling for one direction: fetches descriptors with
+        its own ``AxiReader``, feeds them to the data ``engine`` and writes
+        the completion index back with its own ``AxiWriter``.
+    '''
+    def __init__(self, engine, axi, regs, domain, fetch_batch):
+        self.engine = engine
+        self.regs = regs
+        self.domain = domain
+        self.fetch_batch = fetch_batch
+
+        data_w = len(axi.RDATA)
+        assert data_w <= 8 * DESC_BYTES
+        beat_bytes = data_w // 8
+        self.data_w = data_w
+        self.desc_beats = DESC_BYTES // beat_bytes
+        self.wb_beats = max(1, 64 // data_w)
+        self.wb_bytes = self.wb_beats * beat_bytes
+        fetch_burst = min(fetch_batch * self.desc_beats, 2 ** len(axi.ARLEN))
+        self.fetcher = AxiReader(axi, domain, max_outstanding=2, max_burst=fetch_burst)
+        # On ports wider than the 8 byte status only its bytes are written
+        self.writeback = AxiWriter(axi, domain, max_outstanding=2,
+                                   max_burst=self.wb_beats, fifo_depth=2,
+                                   strb=(1 << min(beat_bytes, 8)) - 1)
+        self.irq = Signal()
+
+    def _reg(self, name):
+        regs = self.regs
+        if name in regs:
+            return regs[name].r_data
+        return Cat(regs[name + '_LO'].r_data, regs[name + '_HI'].r_data)
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        engine = self.engine
+        fetcher = self.fetcher
+        writeback = self.writeback
+        m.submodules.fetcher = fetcher
+        m.submodules.writeback = writeback
+
+        ctrl = self.regs['CTRL'].r_data
+        status = self.regs['STATUS']
+        run = ctrl[0]
+        irq_en = ctrl[1]
+        ring_base = self._reg('RING')
+        ring_size = self.regs['RING_SIZE'].r_data
+        tail = self.regs['TAIL'].r_data
+        coal_count = self.regs['COAL_COUNT'].r_data
+        coal_timeout = self.regs['COAL_TIMEOUT'].r_data
+
+        depth = 2 * self.fetch_batch
+        descs = SyncFIFOBuffered(width=8 * DESC_BYTES, depth=depth)
+        if self.domain != 'sync':
+            descs = DomainRenamer(self.domain)(descs)
+        m.submodules.descs = descs
+
+        # Fetch up to fetch_batch descriptors, stopping at the end of the ring
+        fetch_idx = Signal(16)
+        avail = Signal(16)
+        count = Signal(range(self.fetch_batch + 1))
+        m.d.comb += [
+            avail.eq(Mux(tail >= fetch_idx, tail - fetch_idx, ring_size - fetch_idx)),
+            count.eq(Mux(avail < self.fetch_batch, avail, self.fetch_batch)),
+            fetcher.cmd_valid.eq(run & (count != 0) & (descs.level + count <= depth)),
+            fetcher.cmd_addr.eq(ring_base + fetch_idx * DESC_BYTES),
+            fetcher.cmd_len.eq(count * DESC_BYTES),
+        ]
+        with m.If(fetcher.cmd_valid & fetcher.cmd_ready):
+            sync += fetch_idx.eq(Mux(fetch_idx + count == ring_size, 0, fetch_idx + count))
+
+        # Assemble descriptors, the space was reserved before fetching
+        source = fetcher.source
+        m.d.comb += source.TREADY.eq(1)
+        if self.desc_beats == 1:
+            m.d.comb += [
+                descs.w_data.eq(source.TDATA),
+                descs.w_en.eq(source.TVALID),
+            ]
+        else:
+            beat = Signal(range(self.desc_beats))
+            parts = Signal(self.data_w * (self.desc_beats - 1))
+            last = beat == self.desc_beats - 1
+            m.d.comb += [
+                descs.w_data.eq(Cat(parts, source.TDATA)),
+                descs.w_en.eq(source.TVALID & last),
+            ]
+            with m.If(source.TVALID):
+                sync += beat.eq(Mux(last, 0, beat + 1))
+                with m.Switch(beat):
+                    for i in range(self.desc_beats - 1):
+                        with m.Case(i):
+                            sync += parts.word_select(i, self.data_w).eq(source.TDATA)
+
+        # Run descriptors on the data engine
+        desc = descs.r_data
+        desc_irq = Signal()
+        m.d.comb += [
+            engine.cmd_valid.eq(descs.r_rdy),
+            engine.cmd_addr.eq(desc[0:64]),
+            engine.cmd_len.eq(desc[64:96]),
+            descs.r_en.eq(engine.cmd_valid & engine.cmd_ready),
+        ]
+        with m.If(descs.r_en):
+            sync += desc_irq.eq((desc[96:128] & DESC_FLAG_IRQ) != 0)
+
+        # Completions, written back in batches
+        head = Signal(16)
+        errors = Signal(32)
+        pending = Signal(16)
+        timer = Signal(32)
+        force = Signal()
+        error = Signal()
+        sending = Signal()
+        flush = Signal()
+        wb_value = Signal(64)
+
+        irq = Signal()
+        with m.If(status.w_stb):
+            with m.If(status.w_data[1]):
+                sync += irq.eq(0)
+            with m.If(status.w_data[2]):
+                sync += error.eq(0)
+
+        m.d.comb += flush.eq((pending != 0) & writeback.cmd_ready & ~sending &
+                             ((pending >= coal_count) | (timer >= coal_timeout) | force))
+        with m.If(engine.done):
+            sync += head.eq(Mux(head + 1 == ring_size, 0, head + 1))
+            with m.If(engine.error):
+                sync += [
+                    errors.eq(errors + 1),
+                    error.eq(1),
+                ]
+        with m.If(flush):
+            sync += [
+                pending.eq(engine.done),
+                force.eq(engine.done & desc_irq),
+                timer.eq(0),
+                wb_value.eq(Cat(head, Const(0, 16), errors)),
+                sending.eq(1),
+            ]
+        with m.Else():
+            with m.If(engine.done):
+                sync += [
+                    pending.eq(pending + 1),
+                    force.eq(force | desc_irq),
+                ]
+            with m.If(pending != 0):
+                sync += timer.eq(timer + 1)
+
+        m.d.comb += [
+            writeback.cmd_valid.eq(flush),
+            writeback.cmd_addr.eq(self._reg('WB')),
+            writeback.cmd_len.eq(self.wb_bytes),
+        ]
+        sink = writeback.sink
+        wb_beat = Signal(range(self.wb_beats + 1))
+        m.d.comb += sink.TVALID.eq(sending)
+        if self.data_w < 64:
+            m.d.comb += sink.TDATA.eq(wb_value.word_select(wb_beat, self.data_w))
+        else:
+            m.d.comb += sink.TDATA.eq(wb_value)
+        with m.If(sink.TVALID & sink.TREADY):
+            sync += wb_beat.eq(wb_beat + 1)
+            with m.If(wb_beat == self.wb_beats - 1):
+                sync += [
+                    wb_beat.eq(0),
+                    sending.eq(0),
+                ]
+
+        with m.If(writeback.done):
+            sync += irq.eq(1)
+
+        busy = Signal()
+        m.d.comb += [
+            busy.eq((fetch_idx != tail) | fetcher.busy | descs.r_rdy | engine.busy |
+                    (pending != 0) | sending | writeback.busy),
+            status.r_data.eq(Cat(busy, irq, error)),
+            self.regs['HEAD'].r_data.eq(head),
+            self.irq.eq(irq & irq_en),
+        ]
+
+        # Stopping an idle channel rewinds the ring
+        with m.If(~run & ~busy):
+            sync += [
+                fetch_idx.eq(0),
+                head.eq(0),
+            ]
+
+        return m
+
+
+class AxiSgDma(Elaboratable):
+    '''
+        Descriptor ring (scatter-gather) version of ``AxiDma``. The PS
+        queues buffers by filling descriptors in DDR and bumping a tail
+        index, the PL fetches them in batches through the same SAXI port,
+        runs them on an ``AxiReader`` (MM2S) or ``AxiWriter`` (S2MM) and
+        reports completions by writing the ring head back to memory, at most
+        once per ``COAL_COUNT`` completions or ``COAL_TIMEOUT`` cycles.
+
+        Descriptors are ``DESC_BYTES`` long, 16 byte aligned and little
+        endian:
+
+            +0x0    buffer address, 64 bit
+            +0x8    length in bytes
+            +0xC    flags, ``DESC_FLAG_IRQ`` writes back (and interrupts)
+                    as soon as this descriptor completes
+
+        The write back location holds the head index in the low 16 bits of
+        the first word and the number of failed descriptors in the second,
+        only these 8 bytes are written whatever the port width.
+
+        ``fetch_batch`` is the most descriptors fetched in one burst, a
+        power of two.
+
+        Registers, prefixed with ``MM2S_`` or ``S2MM_``:
+
+            CTRL            bit 0 runs the ring, bit 1 enables the interrupt
+            STATUS          bit 0 busy, bit 1 write back done (interrupt),
+                            bit 2 error, bits 1 and 2 are cleared by writing 1
+            RING            ring address (``_LO``/``_HI`` on wide ports)
+            RING_SIZE       number of descriptors in the ring
+            TAIL            index of the first descriptor not handed to the PL
+            HEAD            index of the first descriptor not completed
+            WB              write back address, aligned to the data width
+            COAL_COUNT      completions per write back
+            COAL_TIMEOUT    cycles a completion may wait for a write back
+
+        Clearing RUN once the channel is idle rewinds ``HEAD`` to 0, the
+        software is expected to do the same with ``TAIL``. ``irq`` is a level
+        interrupt meant for ``get_irq_signal``.
+    '''
+    def __init__(self, axi, bank, domain='sync', mm2s=True, s2mm=True,
+                 max_outstanding=8, max_burst=None, fifo_depth=None,
+                 fetch_batch=4, name='sgdma'):
+        assert mm2s or s2mm
+        if fetch_batch < 1 or fetch_batch & (fetch_batch - 1):
+            raise ValueError('fetch_batch must be a power of two, not {}'.format(fetch_batch))
+        self.bank = bank
+        self.domain = domain
+        self.name = name
+        self.irq = Signal()
+
+        self.arbiter = AxiArbiter(axi, 3, domain)
+        data, *ctrl = self.arbiter.masters
+
+        self.mm2s = None
+        self.s2mm = None
+        self._registers = {}
+        self._channels = []
+        for d, enabled, axi_ctrl in [('MM2S', mm2s, ctrl[0]), ('S2MM', s2mm, ctrl[1])]:
+            if not enabled:
+                continue
+            if d == 'MM2S':
+                engine = AxiReader(data, domain, max_outstanding, max_burst)
+                self.mm2s = engine.source
+            else:
+                engine = AxiWriter(data, domain, max_outstanding, max_burst, fifo_depth)
+                self.s2mm = engine.sink
+            regs = self._add_registers(d, len(data.AWADDR))
+            self._channels.append((d, engine, _SgChannel(engine, axi_ctrl, regs, domain, fetch_batch)))
+
+    def _add_registers(self, d, addr_w):
+        regs = {}
+
+        def add(name, width=32, access='rw', reset=0):
+            regs[name] = self.bank.add_register(
+                '{}_{}_{}'.format(self.name, d.lower(), name.lower()),
+                width=width, access=access, reset=reset)
+            self._registers[d + '_' + name] = regs[name]
+
+        def add_addr(name):
+            if addr_w > 32:
+                add(name + '_LO')
+                add(name + '_HI', width=addr_w - 32)
+            else:
+                add(name, width=addr_w)
+
+        add('CTRL', width=2)
+        add('STATUS', width=3, access='w1c')
+        add_addr('RING')
+        add('RING_SIZE', width=16)
+        add('TAIL', width=16)
+        add('HEAD', width=16, access='r')
+        add_addr('WB')
+        add('COAL_COUNT', width=16, reset=1)
+        add('COAL_TIMEOUT')
+        return regs
+
+    def get_register_map(self):
+        return {
+            name: self.bank.get_offset(reg)
+            for name, reg in self._registers.items()
+        }
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.arbiter = self.arbiter
+        irqs = []
+        for d, engine, channel in self._channels:
+            m.submodules[d.lower()] = engine
+            m.submodules[d.lower() + '_sg'] = channel
+            irqs.append(channel.irq)
+        m.d.comb += self.irq.eq(Cat(*irqs).any())
+        return m
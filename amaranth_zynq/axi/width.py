@@ -0,0 +1,358 @@
+from amaranth import Elaboratable, Module, Signal, Memory, Array, Cat, Const, Mux, Repl
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.hdl.xfrm import DomainRenamer
+
+from .common import (CHANNELS, BURST_FIXED, BURST_INCR, BURST_WRAP,
+                     get_axi_params, get_axi_record)
+
+__all__ = ['AxiWidthConverter']
+
+ADDR_W = 12
+
+
+def _log2(n):
+    assert n > 0 and n & (n - 1) == 0
+    return n.bit_length() - 1
+
+
+def _next_addr(addr, size, burst, length):
+    '''
+        Address of the beat following ``addr`` in a burst, low bits only.
+    '''
+    aligned = (addr >> size) << size
+    incr = (aligned + (Const(1, ADDR_W) << size))[:ADDR_W]
+    mask = (((length + 1) << size) - 1)[:ADDR_W]
+    wrap = (addr & ~mask) | (incr & mask)
+    return Mux(burst == BURST_FIXED, addr, Mux(burst == BURST_WRAP, wrap, incr))
+
+
+class _Context:
+    '''
+        Per burst information kept between an address and its data beats.
+    '''
+    def __init__(self, size_w, len_w, port_len_w, id_w):
+        self.fields = [
+            ('addr', ADDR_W),
+            ('size', size_w),
+            ('burst', 2),
+            ('len', len_w),
+            ('port_len', port_len_w),
+            ('conv', 1),
+            ('id', id_w),
+        ]
+        self.width = sum(w for _, w in self.fields)
+
+    def pack(self, **values):
+        return Cat(*[values[name] for name, _ in self.fields])
+
+    def unpack(self, data):
+        values = {}
+        offset = 0
+        for name, w in self.fields:
+            values[name] = data[offset:offset + w]
+            offset += w
+        return values
+
+
+class _ContextQueue(Elaboratable):
+    '''
+        Read contexts queued per ID slot, as responses with different IDs may
+        come back in any order. A slot only holds one ID at a time.
+    '''
+    def __init__(self, width, id_w, slot_bits, depth, domain):
+        self.slot_bits = min(id_w, slot_bits)
+        self.depth = depth
+        self.domain = domain
+
+        self.w_id = Signal(id_w)
+        self.w_data = Signal(width)
+        self.w_en = Signal()
+        self.w_rdy = Signal()
+
+        self.r_id = Signal(id_w)
+        self.r_data = Signal(width)
+        self.r_en = Signal()
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+
+        slots = 2 ** self.slot_bits
+        ptr_w = _log2(self.depth)
+        mem = Memory(width=len(self.w_data), depth=slots * self.depth)
+        m.submodules.wp = wp = mem.write_port(domain=self.domain)
+        m.submodules.rp = rp = mem.read_port(domain='comb')
+
+        wptr = Array(Signal(ptr_w + 1, name='wptr{}'.format(i)) for i in range(slots))
+        rptr = Array(Signal(ptr_w + 1, name='rptr{}'.format(i)) for i in range(slots))
+        owner = Array(Signal.like(self.w_id, name='owner{}'.format(i)) for i in range(slots))
+
+        w_slot = self.w_id[:self.slot_bits]
+        r_slot = self.r_id[:self.slot_bits]
+        level = Signal(ptr_w + 1)
+        m.d.comb += [
+            level.eq(wptr[w_slot] - rptr[w_slot]),
+            self.w_rdy.eq((level == 0) | ((level != self.depth) & (owner[w_slot] == self.w_id))),
+            wp.addr.eq(Cat(wptr[w_slot][:ptr_w], w_slot)),
+            wp.data.eq(self.w_data),
+            wp.en.eq(self.w_en),
+            rp.addr.eq(Cat(rptr[r_slot][:ptr_w], r_slot)),
+            self.r_data.eq(rp.data),
+        ]
+        with m.If(self.w_en):
+            sync += [
+                wptr[w_slot].eq(wptr[w_slot] + 1),
+                owner[w_slot].eq(self.w_id),
+            ]
+        with m.If(self.r_en):
+            sync += rptr[r_slot].eq(rptr[r_slot] + 1)
+
+        return m
+
+
+class AxiWidthConverter(Elaboratable):
+    '''
+        Connects a ``data_w`` wide AXI master, ``user``, to a PS slave port
+        of a different width, such as a SAXI record from ``get_axi``.
+
+        Upsizing, full width INCR bursts are packed: the port sees full
+        width beats (``AxSIZE`` and ``AxLEN`` rewritten, ``WSTRB`` merged),
+        so a 32 bit master needs a quarter of the port beats on a 128 bit
+        port. Downsizing, beats wider than the port are split into several
+        port beats of the same burst; ``user`` bursts are shortened
+        accordingly (``len_w`` reduced by the width ratio) so that this
+        always fits in one port burst. Narrow (``AxSIZE`` below both widths)
+        and non INCR bursts are forwarded with their data moved to the right
+        byte lanes; when downsizing, FIXED and WRAP bursts can't be wider
+        than the port.
+
+        Read data interleaving between IDs is not supported, which matches
+        the PS ports; responses with different IDs may still be reordered.
+        ``max_reads`` read bursts per ID slot (low ``id_slot_bits`` bits of
+        the ID) and ``max_writes`` write bursts can be pending.
+    '''
+    def __init__(self, port, data_w, domain='sync', max_reads=4, max_writes=8,
+                 id_slot_bits=4):
+        assert data_w != len(port.WDATA), (
+            'Port is already {} bits wide'.format(data_w))
+        self.port = port
+        self.domain = domain
+        self.max_reads = max_reads
+        self.max_writes = max_writes
+        self.id_slot_bits = id_slot_bits
+
+        params = get_axi_params(port)
+        ratio = max(data_w, params['data_w']) // min(data_w, params['data_w'])
+        params['data_w'] = data_w
+        if data_w > len(port.WDATA):
+            params['len_w'] -= _log2(ratio)
+            assert params['len_w'] > 0
+        self.user = get_axi_record(name='user', **params)
+
+    def _address(self, m, ch, queue_rdy, ctx):
+        '''
+            Drives the port address channel ``ch`` from ``user``, returns
+            the handshake and the packed burst context.
+        '''
+        user = self.user
+        port = self.port
+        addr = user[ch + 'ADDR']
+        size = user[ch + 'SIZE']
+        burst = user[ch + 'BURST']
+        beats = user[ch + 'LEN'] + 1
+        user_size = _log2(len(user.WDATA) // 8)
+        port_size = _log2(len(port.WDATA) // 8)
+
+        conv = Signal(name=ch.lower() + '_conv')
+        if port_size > user_size:
+            m.d.comb += conv.eq((burst == BURST_INCR) & (size == user_size))
+        else:
+            m.d.comb += conv.eq(size > port_size)
+
+        last = ((addr >> size) << size) + (beats << size) - 1
+        port_len = Signal.like(port[ch + 'LEN'], name=ch.lower() + '_port_len')
+        m.d.comb += port_len.eq(Mux(conv, (last >> port_size) - (addr >> port_size),
+                                    user[ch + 'LEN']))
+
+        for f in CHANNELS[ch]:
+            if f in port.fields and f in user.fields:
+                m.d.comb += port[f].eq(user[f])
+        m.d.comb += [
+            port[ch + 'LEN'].eq(port_len),
+            port[ch + 'SIZE'].eq(Mux(conv, port_size, size)),
+            port[ch + 'VALID'].eq(user[ch + 'VALID'] & queue_rdy),
+            user[ch + 'READY'].eq(port[ch + 'READY'] & queue_rdy),
+        ]
+        packed = ctx.pack(
+            addr=addr[:ADDR_W], size=size, burst=burst, len=user[ch + 'LEN'],
+            port_len=port_len, conv=conv, id=user[ch + 'ID'])
+        return user[ch + 'VALID'] & user[ch + 'READY'], packed
+
+    @staticmethod
+    def _crosses(addr, port_size, size):
+        '''
+            Whether the port beat at ``addr`` is the last one of a ``size``
+            wide user beat.
+        '''
+        next_beat = ((addr >> port_size) + 1)[:ADDR_W - port_size] << port_size
+        return (next_beat & ((Const(1, ADDR_W) << size) - 1)) == 0
+
+    def elaborate(self, platform):
+        m = Module()
+        sync = m.d[self.domain]
+        user = self.user
+        port = self.port
+
+        user_w = len(user.WDATA)
+        port_w = len(port.WDATA)
+        user_size = _log2(user_w // 8)
+        port_size = _log2(port_w // 8)
+        upsize = port_w > user_w
+        narrow_w = min(user_w, port_w)
+        lanes = slice(min(user_size, port_size), max(user_size, port_size))
+
+        ctx = _Context(len(user.ARSIZE), len(user.ARLEN), len(port.ARLEN), len(user.ARID))
+
+        # Read address and contexts
+        reads = _ContextQueue(ctx.width, len(user.ARID), self.id_slot_bits,
+                              self.max_reads, self.domain)
+        m.submodules.reads = reads
+        ar, ar_ctx = self._address(m, 'AR', reads.w_rdy, ctx)
+        m.d.comb += [
+            reads.w_id.eq(user.ARID),
+            reads.w_data.eq(ar_ctx),
+            reads.w_en.eq(ar),
+            reads.r_id.eq(port.RID),
+        ]
+
+        # Read data
+        r = ctx.unpack(reads.r_data)
+        r_first = Signal(reset=1)
+        r_addr = Signal(ADDR_W)
+        r_cur = Mux(r_first, r['addr'], r_addr)
+        r_lane = r_cur[lanes]
+        r_lane_last = r_lane == (1 << len(r_lane)) - 1
+        m.d.comb += [
+            user.RID.eq(port.RID),
+            reads.r_en.eq(port.RVALID & port.RREADY & port.RLAST),
+        ]
+        if upsize:
+            r_count = Signal.like(user.ARLEN)
+            user_last = r_count == r['len']
+            port_pop = ~r['conv'] | user_last | r_lane_last
+            m.d.comb += [
+                user.RDATA.eq(port.RDATA.word_select(r_lane, narrow_w)),
+                user.RRESP.eq(port.RRESP),
+                user.RLAST.eq(user_last),
+                user.RVALID.eq(port.RVALID),
+                port.RREADY.eq(user.RREADY & port_pop),
+            ]
+            r_next = _next_addr(r_cur, r['size'], r['burst'], r['len'])
+            with m.If(user.RVALID & user.RREADY):
+                sync += [
+                    r_addr.eq(r_next),
+                    r_first.eq(user_last),
+                    r_count.eq(Mux(user_last, 0, r_count + 1)),
+                ]
+        else:
+            r_buf = Signal(user_w)
+            r_resp = Signal(2)
+            complete = ~r['conv'] | port.RLAST | self._crosses(r_cur, port_size, r['size'])
+            merged = Cat(*[
+                Mux(r_lane == i, port.RDATA, r_buf.word_select(i, narrow_w))
+                for i in range(user_w // narrow_w)
+            ])
+            resp = Mux(port.RRESP > r_resp, port.RRESP, r_resp)
+            m.d.comb += [
+                user.RDATA.eq(Mux(r['conv'], merged, Repl(port.RDATA, user_w // narrow_w))),
+                user.RRESP.eq(resp),
+                user.RLAST.eq(port.RLAST),
+                user.RVALID.eq(port.RVALID & complete),
+                port.RREADY.eq(~complete | user.RREADY),
+            ]
+            r_next = _next_addr(r_cur, Mux(r['conv'], port_size, r['size']),
+                                Mux(r['conv'], BURST_INCR, r['burst']), r['len'])
+            with m.If(port.RVALID & port.RREADY):
+                sync += [
+                    r_addr.eq(r_next),
+                    r_first.eq(port.RLAST),
+                    r_buf.eq(merged),
+                    r_resp.eq(Mux(complete, 0, resp)),
+                ]
+
+        # Write address and contexts, write data follows the address order
+        writes = SyncFIFO(width=ctx.width, depth=self.max_writes)
+        if self.domain != 'sync':
+            writes = DomainRenamer(self.domain)(writes)
+        m.submodules.writes = writes
+        aw, aw_ctx = self._address(m, 'AW', writes.w_rdy, ctx)
+        m.d.comb += [
+            writes.w_data.eq(aw_ctx),
+            writes.w_en.eq(aw),
+        ]
+
+        # Write data
+        w = ctx.unpack(writes.r_data)
+        w_first = Signal(reset=1)
+        w_addr = Signal(ADDR_W)
+        w_cur = Mux(w_first, w['addr'], w_addr)
+        w_lane = w_cur[lanes]
+        w_lane_last = w_lane == (1 << len(w_lane)) - 1
+        if 'WID' in port.fields:
+            m.d.comb += port.WID.eq(w['id'])
+        if upsize:
+            w_buf = Signal(port_w)
+            w_strb = Signal(port_w // 8)
+            complete = ~w['conv'] | user.WLAST | w_lane_last
+            data = Cat(*[
+                Mux(w_lane == i, user.WDATA, w_buf.word_select(i, narrow_w))
+                for i in range(port_w // narrow_w)
+            ])
+            strb = Cat(*[
+                Mux(w_lane == i, user.WSTRB, w_strb.word_select(i, narrow_w // 8))
+                for i in range(port_w // narrow_w)
+            ])
+            m.d.comb += [
+                port.WDATA.eq(data),
+                port.WSTRB.eq(strb),
+                port.WLAST.eq(user.WLAST),
+                port.WVALID.eq(writes.r_rdy & user.WVALID & complete),
+                user.WREADY.eq(writes.r_rdy & (~complete | port.WREADY)),
+                writes.r_en.eq(user.WVALID & user.WREADY & user.WLAST),
+            ]
+            w_next = _next_addr(w_cur, w['size'], w['burst'], w['len'])
+            with m.If(user.WVALID & user.WREADY):
+                sync += [
+                    w_addr.eq(w_next),
+                    w_first.eq(user.WLAST),
+                    w_buf.eq(data),
+                    w_strb.eq(Mux(complete, 0, strb)),
+                ]
+        else:
+            w_count = Signal.like(port.AWLEN)
+            port_last = w_count == w['port_len']
+            complete = ~w['conv'] | port_last | self._crosses(w_cur, port_size, w['size'])
+            m.d.comb += [
+                port.WDATA.eq(user.WDATA.word_select(w_lane, narrow_w)),
+                port.WSTRB.eq(user.WSTRB.word_select(w_lane, narrow_w // 8)),
+                port.WLAST.eq(port_last),
+                port.WVALID.eq(writes.r_rdy & user.WVALID),
+                user.WREADY.eq(writes.r_rdy & port.WREADY & complete),
+                writes.r_en.eq(port.WVALID & port.WREADY & port_last),
+            ]
+            w_next = _next_addr(w_cur, Mux(w['conv'], port_size, w['size']),
+                                Mux(w['conv'], BURST_INCR, w['burst']), w['len'])
+            with m.If(port.WVALID & port.WREADY):
+                sync += [
+                    w_addr.eq(w_next),
+                    w_first.eq(port_last),
+                    w_count.eq(Mux(port_last, 0, w_count + 1)),
+                ]
+
+        # Write responses, one per burst
+        for f in CHANNELS['B'] + ['BVALID']:
+            if f in user.fields and f in port.fields:
+                m.d.comb += user[f].eq(port[f])
+        m.d.comb += port.BREADY.eq(user.BREADY)
+
+        return m
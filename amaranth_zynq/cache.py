@@ -0,0 +1,133 @@
+import os
+import glob
+import json
+import shutil
+import hashlib
+import tempfile
+
+from amaranth.build.run import LocalBuildProducts
+
+__all__ = ['BuildCache', 'BuildCacheMixin']
+
+
+class BuildCache:
+    '''
+        Local content-addressed cache of toolchain products.
+
+        Entries are keyed on the digest of every generated build file, the
+        toolchain version and the target part, so a hit means the toolchain
+        would be run on byte-identical inputs.
+    '''
+    VERSION = 1
+
+    def __init__(self, root=None, toolchain_version=None):
+        if root is None:
+            root = os.environ.get(
+                'AMARANTH_ZYNQ_CACHE',
+                os.path.join(os.path.expanduser('~'), '.cache', 'amaranth_zynq')
+            )
+        self.root = root
+        self.toolchain_version = toolchain_version
+
+    def get_toolchain_version(self, platform):
+        if self.toolchain_version is not None:
+            return self.toolchain_version
+        # Xilinx installs are laid out as <prefix>/Vivado/<version>/bin/vivado
+        install_dir = os.environ.get('XILINX_VIVADO')
+        if install_dir is None:
+            vivado = shutil.which(os.environ.get('VIVADO', 'vivado'))
+            if vivado is not None:
+                install_dir = os.path.dirname(os.path.dirname(os.path.realpath(vivado)))
+        if install_dir is None:
+            return 'unknown'
+        return os.path.basename(os.path.normpath(install_dir))
+
+    def key(self, plan, platform):
+        hasher = hashlib.sha256()
+        hasher.update(plan.digest())
+        target = [
+            self.VERSION,
+            platform.toolchain,
+            self.get_toolchain_version(platform),
+            platform.device,
+            platform.package,
+            platform.speed,
+            getattr(platform, 'grade', None),
+        ]
+        hasher.update(json.dumps(target).encode('utf-8'))
+        return hasher.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, key):
+        entry = self._entry(key)
+        if os.path.exists(os.path.join(entry, 'manifest.json')):
+            return entry
+        return None
+
+    def store(self, key, build_dir, artifacts):
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=key + '.', dir=os.path.dirname(entry))
+        try:
+            for artifact in artifacts:
+                shutil.copy2(os.path.join(build_dir, artifact), tmp)
+            with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+                json.dump({'artifacts': artifacts}, f, indent=4)
+            # The rename is atomic: concurrent builders either win or find
+            # a complete entry already in place.
+            os.rename(tmp, entry)
+        except OSError:
+            if self.lookup(key) is None:
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return entry
+
+    def restore(self, key, build_dir):
+        entry = self.lookup(key)
+        assert entry is not None, ('Build not cached')
+        with open(os.path.join(entry, 'manifest.json')) as f:
+            artifacts = json.load(f)['artifacts']
+        os.makedirs(build_dir, exist_ok=True)
+        for artifact in artifacts:
+            shutil.copy2(os.path.join(entry, artifact), build_dir)
+        return artifacts
+
+
+class BuildCacheMixin:
+    build_cache = None
+    build_cache_artifacts = ['{name}.bit', '{name}.bin', '{name}_*.rpt']
+
+    def get_build_artifacts(self, name, build_dir):
+        artifacts = []
+        for pattern in self.build_cache_artifacts:
+            pattern = os.path.join(build_dir, pattern.format(name=name))
+            for path in sorted(glob.glob(pattern)):
+                artifacts.append(os.path.relpath(path, build_dir))
+        return artifacts
+
+    def build(self, elaboratable, name="top",
+              build_dir="build", do_build=True,
+              program_opts=None, do_program=False,
+              **kwargs):
+        cache = self.build_cache
+        if cache is None or not do_build:
+            return super().build(elaboratable, name, build_dir, do_build,
+                                 program_opts, do_program, **kwargs)
+
+        plan = self.prepare(elaboratable, name, **kwargs)
+        key = cache.key(plan, self)
+        if cache.lookup(key) is None:
+            products = plan.execute_local(build_dir)
+            cache.store(key, build_dir, self.get_build_artifacts(name, build_dir))
+        else:
+            plan.execute_local(build_dir, run_script=False)
+            cache.restore(key, build_dir)
+            products = LocalBuildProducts(os.path.abspath(build_dir))
+
+        if not do_program:
+            return products
+
+        self.toolchain_program(products, name, **(program_opts or {}))
@@ -0,0 +1,266 @@
+from collections import namedtuple
+
+from amaranth import Elaboratable, Module, Signal, ClockDomain, Instance, Const
+from amaranth.lib.cdc import ResetSynchronizer
+
+__all__ = [
+    'PsClock', 'solve_ps_clock', 'MmcmConfig', 'solve_mmcm', 'Mmcm',
+    'get_clock_groups', 'get_clock_groups_xdc', 'get_cdc_max_delay',
+]
+
+
+class PsClock(namedtuple('PsClock', ['requested', 'freq', 'source', 'divisor0', 'divisor1'])):
+    '''
+        A PS fabric clock setting: ``freq`` is what ``source`` divided by
+        ``divisor0`` and ``divisor1`` actually gives for a ``requested``
+        rate.
+    '''
+    @property
+    def error(self):
+        return (self.freq - self.requested) / self.requested
+
+
+def solve_ps_clock(freq, plls, max_div=63):
+    '''
+        Searches every PLL in ``plls`` (name to output rate in Hz) and every
+        pair of 6 bit dividers for the rate closest to ``freq``. Ties go to
+        the PLL listed first and then to the smallest ``divisor1``. Rates
+        too low for any pair of dividers are an error.
+    '''
+    assert freq > 0
+    best = None
+    for source, pll_freq in plls.items():
+        for divisor1 in range(1, max_div + 1):
+            # Only the two divisor0 values around the ideal one can win
+            ideal = pll_freq / (freq * divisor1)
+            for divisor0 in {int(ideal), int(ideal) + 1}:
+                if not 1 <= divisor0 <= max_div:
+                    continue
+                clock = PsClock(freq, pll_freq / (divisor0 * divisor1),
+                                source, divisor0, divisor1)
+                if best is None or abs(clock.error) < abs(best.error):
+                    best = clock
+    assert best is not None, (
+        'No divider setting for {} Hz'.format(freq))
+    return best
+
+
+# Slowest speed grade limits, see DS181/DS925
+MMCM_LIMITS = {
+    'MMCME2_ADV': {
+        'vco': (600e6, 1200e6), 'pfd': (10e6, 450e6), 'out': 800e6,
+        'mult': 64, 'divclk': 106, 'div': 128,
+    },
+    'MMCME4_ADV': {
+        'vco': (800e6, 1600e6), 'pfd': (10e6, 450e6), 'out': 891e6,
+        'mult': 128, 'divclk': 106, 'div': 128,
+    },
+}
+
+
+class MmcmConfig(namedtuple('MmcmConfig', ['primitive', 'freq_in', 'divclk', 'mult',
+                                           'dividers', 'requested'])):
+    @property
+    def vco(self):
+        return self.freq_in * self.mult / self.divclk
+
+    @property
+    def freqs(self):
+        return [self.vco / d for d in self.dividers]
+
+    @property
+    def error(self):
+        return max(abs(f - r) / r for f, r in zip(self.freqs, self.requested))
+
+
+def solve_mmcm(freq_in, freqs, primitive='MMCME2_ADV'):
+    '''
+        Integer ``DIVCLK_DIVIDE``, ``CLKFBOUT_MULT`` and ``CLKOUTn_DIVIDE``
+        values giving the output rates ``freqs`` from ``freq_in`` with the
+        smallest worst case error. Ties go to the highest VCO rate, which
+        has the lowest jitter.
+    '''
+    limits = MMCM_LIMITS[primitive]
+    assert 1 <= len(freqs) <= 7
+    assert max(freqs) <= limits['out'], (
+        '{} can not output {} Hz'.format(primitive, max(freqs)))
+    best = None
+    for divclk in range(1, limits['divclk'] + 1):
+        pfd = freq_in / divclk
+        if pfd < limits['pfd'][0]:
+            break
+        if pfd > limits['pfd'][1]:
+            continue
+        for mult in range(2, limits['mult'] + 1):
+            vco = pfd * mult
+            if vco < limits['vco'][0]:
+                continue
+            if vco > limits['vco'][1]:
+                break
+            dividers = [min(max(round(vco / f), 1), limits['div']) for f in freqs]
+            config = MmcmConfig(primitive, freq_in, divclk, mult, dividers, list(freqs))
+            if (best is None or config.error < best.error or
+                    (config.error == best.error and config.vco > best.vco)):
+                best = config
+    assert best is not None, (
+        'No {} setting for a {} Hz input'.format(primitive, freq_in))
+    return best
+
+
+class Mmcm(Elaboratable):
+    '''
+        ``MMCME2_ADV`` (7 series) or ``MMCME4_ADV`` (UltraScale+) turning
+        ``clk_in`` into up to 7 clocks at ``freqs``. The feedback goes
+        through a ``BUFG`` so the outputs are phase aligned with each other
+        and with the input. Only ``clk_in`` needs a clock constraint, Vivado
+        derives the output clocks from it. Every output gets a reset
+        ``rst[i]``, asserted while the MMCM is not locked (or ``rst_in`` is
+        high) and released synchronously to ``clk[i]``.
+    '''
+    def __init__(self, clk_in, freq_in, freqs, primitive='MMCME2_ADV', rst_in=None,
+                 name='mmcm'):
+        self.clk_in = clk_in
+        self.rst_in = rst_in
+        self.name = name
+        self.config = solve_mmcm(freq_in, freqs, primitive)
+        self.clk = [Signal(name='{}_clk{}'.format(name, i)) for i in range(len(freqs))]
+        self.rst = [Signal(name='{}_rst{}'.format(name, i)) for i in range(len(freqs))]
+        self.locked = Signal()
+
+    def get_clocks(self):
+        # Nets carrying the derived clocks, see get_clock_groups_xdc
+        return [
+            ('{}_clk{}_unbuf'.format(self.name, i), freq)
+            for i, freq in enumerate(self.config.freqs)
+        ]
+
+    def elaborate(self, platform):
+        m = Module()
+        config = self.config
+
+        params = {
+            'p_BANDWIDTH': 'OPTIMIZED',
+            'p_CLKIN1_PERIOD': 1e9 / config.freq_in,
+            'p_DIVCLK_DIVIDE': config.divclk,
+            'p_CLKFBOUT_MULT_F': float(config.mult),
+            'p_COMPENSATION': 'ZHOLD' if config.primitive == 'MMCME2_ADV' else 'AUTO',
+            'i_CLKIN1': self.clk_in,
+            'i_CLKIN2': Const(0),
+            'i_CLKINSEL': Const(1),
+            'i_RST': Const(0) if self.rst_in is None else self.rst_in,
+            'i_PWRDWN': Const(0),
+            'i_DCLK': Const(0),
+            'i_DEN': Const(0),
+            'i_DWE': Const(0),
+            'i_DADDR': Const(0, 7),
+            'i_DI': Const(0, 16),
+            'i_PSCLK': Const(0),
+            'i_PSEN': Const(0),
+            'i_PSINCDEC': Const(0),
+            'o_LOCKED': self.locked,
+        }
+        if config.primitive == 'MMCME4_ADV':
+            params['i_CDDCREQ'] = Const(0)
+
+        fb_unbuf = Signal(name='{}_fb_unbuf'.format(self.name))
+        fb = Signal(name='{}_fb'.format(self.name))
+        params['o_CLKFBOUT'] = fb_unbuf
+        params['i_CLKFBIN'] = fb
+        m.submodules.fb_buffer = Instance('BUFG', i_I=fb_unbuf, o_O=fb)
+
+        for i, (clk, rst, divider) in enumerate(zip(self.clk, self.rst, config.dividers)):
+            unbuf = Signal(name='{}_clk{}_unbuf'.format(self.name, i))
+            if i == 0:
+                params['p_CLKOUT0_DIVIDE_F'] = float(divider)
+            else:
+                params['p_CLKOUT{}_DIVIDE'.format(i)] = divider
+            params['o_CLKOUT{}'.format(i)] = unbuf
+            m.submodules['clk{}_buffer'.format(i)] = Instance('BUFG', i_I=unbuf, o_O=clk)
+
+            domain = '{}_clk{}'.format(self.name, i)
+            cd = ClockDomain(domain, local=True)
+            m.domains += cd
+            m.d.comb += [
+                cd.clk.eq(clk),
+                rst.eq(cd.rst),
+            ]
+            arst = ~self.locked if self.rst_in is None else ~self.locked | self.rst_in
+            m.submodules['rst{}_sync'.format(i)] = ResetSynchronizer(arst, domain=domain)
+
+        m.submodules.mmcm = Instance(config.primitive, **params)
+        return m
+
+
+def get_clock_groups(clocks, related=()):
+    '''
+        Merges the clock lists in ``clocks`` (a dict of PS clock number to
+        ``(name, freq)`` pairs) into groups of related clocks: every PS clock
+        is related to the clocks derived from it and to the PS clocks it
+        shares an entry of ``related`` with.
+    '''
+    parent = {n: n for n in clocks}
+
+    def find(n):
+        while parent[n] != n:
+            n = parent[n]
+        return n
+
+    for ns in related:
+        ns = [n for n in ns if n in clocks]
+        for n in ns[1:]:
+            parent[find(n)] = find(ns[0])
+    groups = {}
+    for n in sorted(clocks):
+        groups.setdefault(find(n), []).extend(clocks[n])
+    return list(groups.values())
+
+
+def _get_clocks(nets):
+    return '[get_clocks -of_objects [get_nets -hierarchical {{{}}}]]'.format(nets)
+
+
+def get_clock_groups_xdc(groups, mode='datapath_only'):
+    '''
+        XDC constraints between clock ``groups`` (lists of ``(name, freq)``
+        pairs, see ``get_clock_groups``). Clocks are looked up by the net
+        ``name`` they drive, so the clocks Vivado derives on MMCM outputs
+        are found whatever it names them:
+
+            datapath_only   ``set_max_delay -datapath_only`` of the shorter
+                            period on every path between groups (default)
+            asynchronous    ``set_clock_groups -asynchronous``, no path
+                            between groups is timed
+
+        Asynchronous clock groups take precedence over the ``set_max_delay``
+        of CDC synchronizers, use ``datapath_only`` when those must hold.
+    '''
+    assert mode in ('asynchronous', 'datapath_only')
+    if len(groups) < 2:
+        return ''
+    lines = []
+    if mode == 'asynchronous':
+        lines.append('set_clock_groups -asynchronous \\')
+        for group in groups:
+            lines.append('    -group {} \\'.format(
+                _get_clocks(' '.join(name for name, _ in group))))
+        lines[-1] = lines[-1][:-2]
+    else:
+        for src_group in groups:
+            for dst_group in groups:
+                if src_group is dst_group:
+                    continue
+                for src, src_freq in src_group:
+                    for dst, dst_freq in dst_group:
+                        lines.append(
+                            'set_max_delay -datapath_only -from {} -to {} {:.3f}'.format(
+                                _get_clocks(src), _get_clocks(dst),
+                                get_cdc_max_delay(src_freq, dst_freq) * 1e9))
+    return '\n'.join(lines) + '\n'
+
+
+def get_cdc_max_delay(*freqs):
+    '''
+        Datapath only delay budget, in seconds, for a clock domain crossing
+        between clocks at ``freqs``: the shortest of their periods.
+    '''
+    return 1 / max(freqs)
@@ -0,0 +1,89 @@
+from collections.abc import Mapping
+
+from amaranth import Signal
+
+__all__ = ['PsSignal', 'PsPortMap', 'PsPorts', 'set_platform_files']
+
+
+class PsSignal(Signal):
+    def __init__(self, *argc, dir=None, **argv):
+        Signal.__init__(self, *argc, **argv)
+        self.dir = dir
+
+
+class PsPortMap(Mapping):
+    '''
+        PS instance pins by name. Signals are only created when first
+        looked up with ``lazy=True``, and the pins looked up by the design
+        are tracked so the unused inputs can be tied off.
+    '''
+    def __init__(self, layout, default_one=(), lazy=False):
+        self._layout = {pin: (width, direction) for pin, width, direction in layout}
+        self._default_one = default_one
+        self._signals = {}
+        self._used = set()
+        if not lazy:
+            for pin in self._layout:
+                self._materialize(pin)
+
+    def _materialize(self, pin):
+        signal = self._signals.get(pin)
+        if signal is None:
+            width, direction = self._layout[pin]
+            signal = PsSignal(width, name=pin.lower(),
+                              reset=pin in self._default_one, dir=direction)
+            self._signals[pin] = signal
+        return signal
+
+    def __getitem__(self, pin):
+        signal = self._materialize(pin)
+        self._used.add(pin)
+        return signal
+
+    def __contains__(self, pin):
+        return pin in self._layout
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def layout(self):
+        for pin, (width, direction) in self._layout.items():
+            yield pin, width, direction
+
+    def is_materialized(self, pin):
+        return pin in self._signals
+
+    def is_used(self, pin):
+        return pin in self._used
+
+
+class PsPorts:
+    def __init__(self, ports):
+        self._ports = ports
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name.upper() not in self._ports:
+            raise AttributeError(name)
+        return self._ports[name.upper()]
+
+    def __dir__(self):
+        return [pin.lower() for pin in self._ports]
+
+
+def set_platform_files(platform, files):
+    '''
+        Adds the files generated by a PS to ``platform``, replacing the ones
+        of an earlier elaboration on the same platform. Amaranth refuses to
+        add a file twice with different contents, and a design that doesn't
+        need one of the files must not keep the stale copy, so empty
+        contents remove the file.
+    '''
+    if not hasattr(platform, 'extra_files'):
+        return
+    for name, contents in files.items():
+        platform.extra_files.pop(name, None)
+        if contents:
+            platform.add_file(name, contents)
@@ -409,7 +409,7 @@ def get_ps_layout():
         ("MAXIGP1ACLK",                 1,  "input" ),
         ("MAXIGP1ARREADY",              1,  "input" ),
         ("MAXIGP1AWREADY",              1,  "input" ),
-        ("MAXIGP1BID",                  5,  "input" ),
+        ("MAXIGP1BID",                  12, "input" ),
         ("MAXIGP1BRESP",                2,  "input" ),
         ("MAXIGP1BVALID",               1,  "input" ),
         ("MAXIGP1RDATA",                32, "input" ),
@@ -632,37 +632,37 @@ def get_axi_layout(axi, data_w=None, addr_w=None, id_w=None):
     assert data_w is None or data_w % 8 == 0
     if axi == "master":
         if data_w is None:
-            data_w = 128
+            data_w = 32
         if addr_w is None:
-            addr_w = 40
+            addr_w = 32
         if id_w is None:
-            id_w = 16
+            id_w = 12
         return [
             ("ARADDR", addr_w, "output"),
             ("ARBURST", 2, "output"),
             ("ARCACHE", 4, "output"),
+            ("ARESETN", 1, "output"),
             ("ARID", id_w, "output"),
-            ("ARLEN", 8, "output"),
-            ("ARLOCK", 1, "output"),
+            ("ARLEN", 4, "output"),
+            ("ARLOCK", 2, "output"),
             ("ARPROT", 3, "output"),
             ("ARQOS", 4, "output"),
-            ("ARSIZE", 3, "output"),
-            ("ARUSER", 16, "output"),
+            ("ARSIZE", 2, "output"),
             ("ARVALID", 1, "output"),
             ("AWADDR", addr_w, "output"),
             ("AWBURST", 2, "output"),
             ("AWCACHE", 4, "output"),
             ("AWID", id_w, "output"),
-            ("AWLEN", 8, "output"),
-            ("AWLOCK", 1, "output"),
+            ("AWLEN", 4, "output"),
+            ("AWLOCK", 2, "output"),
             ("AWPROT", 3, "output"),
             ("AWQOS", 4, "output"),
-            ("AWSIZE", 3, "output"),
-            ("AWUSER", 16, "output"),
+            ("AWSIZE", 2, "output"),
             ("AWVALID", 1, "output"),
             ("BREADY", 1, "output"),
             ("RREADY", 1, "output"),
             ("WDATA", data_w, "output"),
+            ("WID", id_w, "output"),
             ("WLAST", 1, "output"),
             ("WSTRB", data_w // 8, "output"),
             ("WVALID", 1, "output"),
@@ -681,66 +681,117 @@ def get_axi_layout(axi, data_w=None, addr_w=None, id_w=None):
         ]
     if axi == "slave":
         if data_w is None:
-            data_w = 128
+            data_w = 32
         if addr_w is None:
-            addr_w = 49
+            addr_w = 32
         if id_w is None:
             id_w = 6
         return [
+            ("ARESETN", 1, "output"),
             ("ARREADY", 1, "output"),
             ("AWREADY", 1, "output"),
             ("BID", id_w, "output"),
             ("BRESP", 2, "output"),
             ("BVALID", 1, "output"),
-            ("RACOUNT", 4, "output"),
+            ("RDATA", data_w, "output"),
+            ("RID", id_w, "output"),
+            ("RLAST", 1, "output"),
+            ("RRESP", 2, "output"),
+            ("RVALID", 1, "output"),
+            ("WREADY", 1, "output"),
+            ("ACLK", 1, "input"),
+            ("ARADDR", addr_w, "input"),
+            ("ARBURST", 2, "input"),
+            ("ARCACHE", 4, "input"),
+            ("ARID", id_w, "input"),
+            ("ARLEN", 4, "input"),
+            ("ARLOCK", 2, "input"),
+            ("ARPROT", 3, "input"),
+            ("ARQOS", 4, "input"),
+            ("ARSIZE", 2, "input"),
+            ("ARVALID", 1, "input"),
+            ("AWADDR", addr_w, "input"),
+            ("AWBURST", 2, "input"),
+            ("AWCACHE", 4, "input"),
+            ("AWID", id_w, "input"),
+            ("AWLEN", 4, "input"),
+            ("AWLOCK", 2, "input"),
+            ("AWPROT", 3, "input"),
+            ("AWQOS", 4, "input"),
+            ("AWSIZE", 2, "input"),
+            ("AWVALID", 1, "input"),
+            ("BREADY", 1, "input"),
+            ("RREADY", 1, "input"),
+            ("WDATA", data_w, "input"),
+            ("WID", id_w, "input"),
+            ("WLAST", 1, "input"),
+            ("WSTRB", data_w // 8, "input"),
+            ("WVALID", 1, "input"),
+        ]
+    if axi == "slave_hp":
+        if data_w is None:
+            data_w = 64
+        if addr_w is None:
+            addr_w = 32
+        if id_w is None:
+            id_w = 6
+        return [
+            ("ARESETN", 1, "output"),
+            ("ARREADY", 1, "output"),
+            ("AWREADY", 1, "output"),
+            ("BID", id_w, "output"),
+            ("BRESP", 2, "output"),
+            ("BVALID", 1, "output"),
+            ("RACOUNT", 3, "output"),
             ("RCOUNT", 8, "output"),
             ("RDATA", data_w, "output"),
             ("RID", id_w, "output"),
             ("RLAST", 1, "output"),
             ("RRESP", 2, "output"),
             ("RVALID", 1, "output"),
-            ("WACOUNT", 4, "output"),
+            ("WACOUNT", 6, "output"),
             ("WCOUNT", 8, "output"),
             ("WREADY", 1, "output"),
+            ("ACLK", 1, "input"),
             ("ARADDR", addr_w, "input"),
             ("ARBURST", 2, "input"),
             ("ARCACHE", 4, "input"),
             ("ARID", id_w, "input"),
-            ("ARLEN", 8, "input"),
-            ("ARLOCK", 1, "input"),
+            ("ARLEN", 4, "input"),
+            ("ARLOCK", 2, "input"),
             ("ARPROT", 3, "input"),
             ("ARQOS", 4, "input"),
-            ("ARSIZE", 3, "input"),
-            ("ARUSER", 1, "input"),
+            ("ARSIZE", 2, "input"),
             ("ARVALID", 1, "input"),
             ("AWADDR", addr_w, "input"),
             ("AWBURST", 2, "input"),
             ("AWCACHE", 4, "input"),
             ("AWID", id_w, "input"),
-            ("AWLEN", 8, "input"),
-            ("AWLOCK", 1, "input"),
+            ("AWLEN", 4, "input"),
+            ("AWLOCK", 2, "input"),
             ("AWPROT", 3, "input"),
             ("AWQOS", 4, "input"),
-            ("AWSIZE", 3, "input"),
-            ("AWUSER", 1, "input"),
+            ("AWSIZE", 2, "input"),
             ("AWVALID", 1, "input"),
             ("BREADY", 1, "input"),
-            ("RCLK", 1, "input"),
+            ("RDISSUECAP1EN", 1, "input"),
             ("RREADY", 1, "input"),
-            ("WCLK", 1, "input"),
             ("WDATA", data_w, "input"),
+            ("WID", id_w, "input"),
             ("WLAST", 1, "input"),
+            ("WRISSUECAP1EN", 1, "input"),
             ("WSTRB", data_w // 8, "input"),
             ("WVALID", 1, "input"),
         ]
     if axi == "slave_acp":
         if data_w is None:
-            data_w = 128
+            data_w = 64
         if addr_w is None:
-            addr_w = 40
+            addr_w = 32
         if id_w is None:
-            id_w = 5
+            id_w = 3
         return [
+            ("ARESETN", 1, "output"),
             ("ARREADY", 1, "output"),
             ("AWREADY", 1, "output"),
             ("BID", id_w, "output"),
@@ -757,27 +808,28 @@ def get_axi_layout(axi, data_w=None, addr_w=None, id_w=None):
             ("ARBURST", 2, "input"),
             ("ARCACHE", 4, "input"),
             ("ARID", id_w, "input"),
-            ("ARLEN", 8, "input"),
-            ("ARLOCK", 1, "input"),
+            ("ARLEN", 4, "input"),
+            ("ARLOCK", 2, "input"),
             ("ARPROT", 3, "input"),
             ("ARQOS", 4, "input"),
-            ("ARSIZE", 3, "input"),
-            ("ARUSER", 2, "input"),
+            ("ARSIZE", 2, "input"),
+            ("ARUSER", 5, "input"),
             ("ARVALID", 1, "input"),
             ("AWADDR", addr_w, "input"),
             ("AWBURST", 2, "input"),
             ("AWCACHE", 4, "input"),
             ("AWID", id_w, "input"),
-            ("AWLEN", 8, "input"),
-            ("AWLOCK", 1, "input"),
+            ("AWLEN", 4, "input"),
+            ("AWLOCK", 2, "input"),
             ("AWPROT", 3, "input"),
             ("AWQOS", 4, "input"),
-            ("AWSIZE", 3, "input"),
-            ("AWUSER", 2, "input"),
+            ("AWSIZE", 2, "input"),
+            ("AWUSER", 5, "input"),
             ("AWVALID", 1, "input"),
             ("BREADY", 1, "input"),
             ("RREADY", 1, "input"),
             ("WDATA", data_w, "input"),
+            ("WID", id_w, "input"),
             ("WLAST", 1, "input"),
             ("WSTRB", data_w // 8, "input"),
             ("WVALID", 1, "input"),
@@ -1,8 +1,11 @@
 from amaranth.vendor.xilinx import XilinxPlatform
+from ..cache import BuildCacheMixin
 
 __all__ = ['ZynqPL']
 
-class ZynqPL(XilinxPlatform):
+class ZynqPL(BuildCacheMixin, XilinxPlatform):
+    build_cache_artifacts = [*BuildCacheMixin.build_cache_artifacts, 'BOOT.bin']
+
     _vivado_file_templates = None
     _vivado_command_templates = None
 
@@ -1173,4 +1173,78 @@ def get_axi_layout(axi, data_w=None, addr_w=None, id_w=None):
             ("WSTRB", data_w // 8, "input"),
             ("WVALID", 1, "input"),
         ]
+    if axi == "slave_ace":
+        if data_w is None:
+            data_w = 128
+        if addr_w is None:
+            addr_w = 44
+        if id_w is None:
+            id_w = 6
+        return [
+            ("ACADDR", addr_w, "output"),
+            ("ACPROT", 3, "output"),
+            ("ACSNOOP", 4, "output"),
+            ("ACVALID", 1, "output"),
+            ("ARREADY", 1, "output"),
+            ("AWREADY", 1, "output"),
+            ("BID", id_w, "output"),
+            ("BRESP", 2, "output"),
+            ("BUSER", 1, "output"),
+            ("BVALID", 1, "output"),
+            ("CDREADY", 1, "output"),
+            ("CRREADY", 1, "output"),
+            ("RDATA", data_w, "output"),
+            ("RID", id_w, "output"),
+            ("RLAST", 1, "output"),
+            ("RRESP", 4, "output"),
+            ("RUSER", 1, "output"),
+            ("RVALID", 1, "output"),
+            ("WREADY", 1, "output"),
+            ("ACLK", 1, "input"),
+            ("ACREADY", 1, "input"),
+            ("ARADDR", addr_w, "input"),
+            ("ARBAR", 2, "input"),
+            ("ARBURST", 2, "input"),
+            ("ARCACHE", 4, "input"),
+            ("ARDOMAIN", 2, "input"),
+            ("ARID", id_w, "input"),
+            ("ARLEN", 8, "input"),
+            ("ARLOCK", 1, "input"),
+            ("ARPROT", 3, "input"),
+            ("ARQOS", 4, "input"),
+            ("ARREGION", 4, "input"),
+            ("ARSIZE", 3, "input"),
+            ("ARSNOOP", 4, "input"),
+            ("ARUSER", 16, "input"),
+            ("ARVALID", 1, "input"),
+            ("AWADDR", addr_w, "input"),
+            ("AWBAR", 2, "input"),
+            ("AWBURST", 2, "input"),
+            ("AWCACHE", 4, "input"),
+            ("AWDOMAIN", 2, "input"),
+            ("AWID", id_w, "input"),
+            ("AWLEN", 8, "input"),
+            ("AWLOCK", 1, "input"),
+            ("AWPROT", 3, "input"),
+            ("AWQOS", 4, "input"),
+            ("AWREGION", 4, "input"),
+            ("AWSIZE", 3, "input"),
+            ("AWSNOOP", 3, "input"),
+            ("AWUSER", 16, "input"),
+            ("AWVALID", 1, "input"),
+            ("BREADY", 1, "input"),
+            ("CDDATA", data_w, "input"),
+            ("CDLAST", 1, "input"),
+            ("CDVALID", 1, "input"),
+            ("CRRESP", 5, "input"),
+            ("CRVALID", 1, "input"),
+            ("RACK", 1, "input"),
+            ("RREADY", 1, "input"),
+            ("WACK", 1, "input"),
+            ("WDATA", data_w, "input"),
+            ("WLAST", 1, "input"),
+            ("WSTRB", data_w // 8, "input"),
+            ("WUSER", 1, "input"),
+            ("WVALID", 1, "input"),
+        ]
     raise ValueError("Invalid axi interface")
@@ -1,7 +1,13 @@
 from amaranth.vendor.xilinx_ultrascale import *
+from ..cache import BuildCacheMixin
 
 
-class ZynqMPPlatform(XilinxUltraScalePlatform):
+class ZynqMPPlatform(BuildCacheMixin, XilinxUltraScalePlatform):
+    build_cache_artifacts = [
+        *BuildCacheMixin.build_cache_artifacts,
+        '{name}_bootgen.bin'
+    ]
+
     _vivado_file_templates = {
         **XilinxUltraScalePlatform._vivado_file_templates,
         "{{name}}.bif": r"""
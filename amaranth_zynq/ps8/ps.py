@@ -1,15 +1,10 @@
-from amaranth import Elaboratable, Signal, Module, Instance, Record
+from amaranth import Elaboratable, Signal, Const, Module, Instance, Record, ClockSignal
 from .layouts import get_ps8_layout, get_axi_layout
-
-class PsSignal(Signal):
-    def __init__(self, *argc, dir=None, **argv):
-        Signal.__init__(self, *argc, **argv)
-        self.dir = dir
-
-class PsPorts:
-    def __init__(self, ports):
-        for k, v in ports.items():
-            setattr(self, k.lower(), v)
+from ..psconfig import MaskWrite, get_config_tcl, get_config_c
+from ..axi.common import CHANNELS
+from ..axi.regslice import AxiRegisterSlice
+from ..clocking import solve_ps_clock, Mmcm, get_clock_groups, get_clock_groups_xdc
+from ..common import PsPortMap, PsPorts, set_platform_files
 
 class PsZynqMP(Elaboratable):
     MAXI = ['maxigp0', 'maxigp1', 'maxigp2']
@@ -17,9 +12,15 @@ class PsZynqMP(Elaboratable):
         'saxigp0', 'saxigp1', 'saxigp2', 'saxigp3',
         'saxigp4', 'saxigp5', 'saxigp6'
     ]
+    ACP = ['saxiacp']
+    ACE = ['sacefpd']
     CLK = 'PLCLK'
+    # SACEFPD is clocked by PLACECLK instead of a port prefixed clock
+    ACE_CLK = 'PLACECLK'
     IRQ = ['PLPSIRQ0', 'PLPSIRQ1']
 
+    AXI_CLOCKS = ['ACLK', 'RCLK', 'WCLK']
+
     DEFAULT_ONE = [
         'EMIOENET0TXRSOP', 'EMIOENET0TXREOP',
         'EMIOENET1TXRSOP', 'EMIOENET1TXREOP',
@@ -31,28 +32,112 @@ class PsZynqMP(Elaboratable):
         'NFIQ1LPDRPU', 'NIRQ1LPDRPU',
     ]
 
-    def __init__(self):
+    # PS side data width select of each AXI port, see UG1087:
+    #   FPD_SLCR/LPD_SLCR afi_fs for the masters, AFIFM RDCTRL/WRCTRL
+    #   FABRIC_WIDTH for the slaves.
+    HPM_WIDTH = {32: 0, 64: 1, 128: 2}
+    AFIFM_WIDTH = {128: 0, 64: 1, 32: 2}
+    AXI_WIDTH_REGS = {
+        'maxigp0': [(0xFD615000, 8, HPM_WIDTH)],
+        'maxigp1': [(0xFD615000, 10, HPM_WIDTH)],
+        'maxigp2': [(0xFF419000, 8, HPM_WIDTH)],
+        'saxigp0': [(0xFD360000, 0, AFIFM_WIDTH), (0xFD360014, 0, AFIFM_WIDTH)],
+        'saxigp1': [(0xFD370000, 0, AFIFM_WIDTH), (0xFD370014, 0, AFIFM_WIDTH)],
+        'saxigp2': [(0xFD380000, 0, AFIFM_WIDTH), (0xFD380014, 0, AFIFM_WIDTH)],
+        'saxigp3': [(0xFD390000, 0, AFIFM_WIDTH), (0xFD390014, 0, AFIFM_WIDTH)],
+        'saxigp4': [(0xFD3A0000, 0, AFIFM_WIDTH), (0xFD3A0014, 0, AFIFM_WIDTH)],
+        'saxigp5': [(0xFD3B0000, 0, AFIFM_WIDTH), (0xFD3B0014, 0, AFIFM_WIDTH)],
+        'saxigp6': [(0xFF9B0000, 0, AFIFM_WIDTH), (0xFF9B0014, 0, AFIFM_WIDTH)],
+    }
+
+    # PL clock sources and dividers, see UG1087 CRL_APB PLn_REF_CTRL. The
+    # PLL rates are the usual ones for a 33.333 MHz PS_REF_CLK, pass
+    # ``plls`` when the PS is configured otherwise (``DPLL`` stands for
+    # DPLL_CLK_TO_LPD).
+    PS_REF_CLK = 100e6 / 3
+    PLLS = {'IOPLL': 45 * PS_REF_CLK, 'RPLL': 36 * PS_REF_CLK}
+    CLK_SRCSEL = {'IOPLL': 0, 'RPLL': 2, 'DPLL': 3}
+    MMCM = 'MMCME4_ADV'
+    CLK_CTRL_REGS = [0xFF5E00C0, 0xFF5E00C4, 0xFF5E00C8, 0xFF5E00CC]
+
+    def __init__(self, lazy=False, tie_off=False, plls=None,
+                 clock_groups='datapath_only'):
+        self.tie_off = tie_off
+        self.plls = dict(self.PLLS if plls is None else plls)
+        self.clock_groups = clock_groups
         ps_layout = get_ps8_layout()
-        self._ports = self._get_ps_ports(ps_layout)
+        self._ports = self._get_ps_ports(ps_layout, lazy)
         self.ports = PsPorts(self._ports)
         self._clocks = [None for _ in range(4)]
+        self._mmcms = {}
+        self._related_clocks = []
         self._resets = [None for _ in range(4)]
         self._irqs = [None for _ in range(16)]
+        self._axi_widths = {}
+        self._axi_slices = []
+        self._axi_pipelines = []
+        self._axi_domains = {}
 
-    def _get_ps_ports(self, layout):
-        return {
-            p: PsSignal(w, name=p.lower(), reset=p in self.DEFAULT_ONE, dir=d)
-            for p,w,d in layout
-        }
+    def _get_ps_ports(self, layout, lazy=False):
+        return PsPortMap(layout, self.DEFAULT_ONE, lazy=lazy)
 
-    def get_clock_signal(self, n, freq):
+    def get_clock_signal(self, n, freq, max_error=None):
         assert n < 4
         assert self._clocks[n] is None, (
             'Clock already taken')
+        plan = solve_ps_clock(freq, self.plls)
+        assert max_error is None or abs(plan.error) <= max_error, (
+            '{} Hz is {:.2%} away from the requested {} Hz'.format(
+                plan.freq, plan.error, freq))
         clk = Signal(name='pl_clk{}'.format(n))
-        self._clocks[n] = (clk, freq)
+        self._clocks[n] = (clk, plan)
         return clk
 
+    def get_clock_plan(self, n):
+        assert self._clocks[n] is not None, (
+            'Clock not requested')
+        return self._clocks[n][1]
+
+    def get_mmcm(self, n, freqs, ps_freq=100e6, max_error=None):
+        '''
+            Feeds PS clock ``n``, requested at ``ps_freq``, through an
+            ``Mmcm`` producing phase aligned clocks at ``freqs``, available
+            with their synchronous resets as ``mmcm.clk[i]`` and
+            ``mmcm.rst[i]``.
+        '''
+        clk = self.get_clock_signal(n, ps_freq)
+        mmcm = Mmcm(clk, self.get_clock_plan(n).freq, freqs, self.MMCM,
+                    name='pl_clk{}_mmcm'.format(n))
+        assert max_error is None or mmcm.config.error <= max_error, (
+            'MMCM outputs {} Hz for {} Hz'.format(mmcm.config.freqs, freqs))
+        self._mmcms[n] = mmcm
+        return mmcm
+
+    def relate_clocks(self, *ns):
+        '''
+            Keeps the paths between PS clocks ``ns`` (and the MMCM clocks
+            derived from them) timed as synchronous.
+        '''
+        self._related_clocks.append(ns)
+
+    def get_clock_constraints(self):
+        '''
+            Constraints between unrelated PS clocks according to
+            ``clock_groups``, see ``get_clock_groups_xdc``. The default
+            ``datapath_only`` keeps the ``max_delay`` of the CDC primitives
+            in force, ``asynchronous`` clock groups override it.
+        '''
+        if self.clock_groups is None:
+            return ''
+        clocks = {}
+        for n, val in enumerate(self._clocks):
+            if val is not None:
+                clocks[n] = [('pl_clk{}_unbuf'.format(n), val[1].freq)]
+                if n in self._mmcms:
+                    clocks[n] += self._mmcms[n].get_clocks()
+        groups = get_clock_groups(clocks, self._related_clocks)
+        return get_clock_groups_xdc(groups, self.clock_groups)
+
     def get_irq_signal(self, n):
         assert n < 16
         assert self._irqs[n] is None, (
@@ -69,36 +154,121 @@ class PsZynqMP(Elaboratable):
         self._resets[n] = rst
         return rst
 
-    def get_axi(self, axi):
-        assert axi in self.MAXI + self.SAXI
+    def get_axi(self, axi, data_w=None, addr_w=None, id_w=None, pipeline=0,
+                domain='sync'):
+        assert axi in self.MAXI + self.SAXI + self.ACP + self.ACE
         if axi in self.MAXI:
-            layout = get_axi_layout('master')
+            layout = get_axi_layout('master', data_w, addr_w, id_w)
+            assert id_w is None or id_w == len(self._ports[axi.upper() + 'ARID']), (
+                'Master IDs can not be narrowed')
+        elif axi in self.ACP:
+            layout = get_axi_layout('slave_acp', data_w, addr_w, id_w)
+        elif axi in self.ACE:
+            layout = get_axi_layout('slave_ace', data_w, addr_w, id_w)
         elif axi in self.SAXI:
-            layout = get_axi_layout('slave')
-        fields = {f: self._ports[axi.upper() + f] for f, w, d in layout}
-        layout = [(f, w) for f, w, _ in layout]
-        rec = Record(layout, fields=fields, name=axi)
+            layout = get_axi_layout('slave', data_w, addr_w, id_w)
+        if axi in self.AXI_WIDTH_REGS and data_w is not None:
+            assert data_w in self.HPM_WIDTH, (
+                'Unsupported data width {}'.format(data_w))
+            self._axi_widths[axi] = data_w
+        elif data_w is not None:
+            assert data_w == len(self._ports[axi.upper() + 'WDATA']), (
+                '{} has a fixed data width'.format(axi))
+        fields = {}
+        for f, w, d in layout:
+            if axi in self.ACE and f == 'ACLK':
+                port = self._ports[self.ACE_CLK]
+            else:
+                port = self._ports[axi.upper() + f]
+            assert w <= len(port), (
+                '{} is only {} bits wide'.format(axi.upper() + f, len(port)))
+            if w == len(port):
+                fields[f] = port
+            else:
+                fields[f] = Signal(w, name='{}__{}'.format(axi, f))
+                self._axi_slices.append((fields[f], port, d))
+        rec = Record([(f, w) for f, w, _ in layout], fields=fields, name=axi)
+        if pipeline:
+            rec = self._add_pipeline(axi, rec, layout, pipeline, domain or 'sync')
+        if domain is not None:
+            self._axi_domains[axi] = (rec, domain)
         return rec
 
+    def get_axi_domain(self, axi):
+        '''
+            Clock domain the ``ACLK``/``RCLK``/``WCLK`` pins of ``axi`` were
+            bound to by ``get_axi``, ``None`` when left to the design.
+        '''
+        if axi in self._axi_domains:
+            return self._axi_domains[axi][1]
+        return None
+
+    def _add_pipeline(self, axi, ps_rec, layout, n, domain):
+        recs = [ps_rec]
+        for i in range(n):
+            recs.append(Record([(f, w) for f, w, _ in layout],
+                               name='{}_p{}'.format(axi, i + 1)))
+        for i, (near, far) in enumerate(zip(recs, recs[1:])):
+            if axi in self.MAXI:
+                regslice = AxiRegisterSlice(near, far, domain)
+            else:
+                regslice = AxiRegisterSlice(far, near, domain)
+            self._axi_pipelines.append(('{}_slice{}'.format(axi, i), regslice))
+        # Clocks and other side band signals bypass the slices
+        sliced = set()
+        for ch, fields in CHANNELS.items():
+            sliced.update(fields + [ch + 'VALID', ch + 'READY'])
+        for f, w, d in layout:
+            if f not in sliced:
+                self._axi_slices.append((recs[-1][f], ps_rec[f], d))
+        return recs[-1]
+
+    def get_ps_config(self):
+        writes = []
+        for axi, data_w in self._axi_widths.items():
+            for address, shift, encoding in self.AXI_WIDTH_REGS[axi]:
+                writes.append(MaskWrite(
+                    address, 0x3 << shift, encoding[data_w] << shift,
+                    '{} {} bit data width'.format(axi, data_w)
+                ))
+        for n, val in enumerate(self._clocks):
+            if val is not None:
+                plan = val[1]
+                writes.append(MaskWrite(
+                    self.CLK_CTRL_REGS[n], 0x013F3F07,
+                    (1 << 24) | (plan.divisor1 << 16) | (plan.divisor0 << 8) |
+                    self.CLK_SRCSEL[plan.source],
+                    'PL{} {} / {} / {} = {:.6f} MHz'.format(
+                        n, plan.source, plan.divisor0, plan.divisor1, plan.freq / 1e6)
+                ))
+        return writes
+
     def _get_instance_ports(self):
         ports = {}
-        for p, s in self._ports.items():
-            if s.dir == 'input':
+        for p, w, d in self._ports.layout():
+            if d == 'input':
                 prefix = 'i_'
-            elif s.dir == 'output':
+            elif d == 'output':
                 prefix = 'o_'
             else:
                 prefix = 'o_'
-            ports[prefix + p] = s
+            if self.tie_off:
+                connected = self._ports.is_used(p)
+            else:
+                connected = self._ports.is_materialized(p)
+            if connected:
+                ports[prefix + p] = self._ports[p]
+            elif d == 'input':
+                ports[prefix + p] = Const(int(p in self.DEFAULT_ONE), w)
         return ports
 
     def elaborate(self, platform):
         m = Module()
         for i, val in enumerate(self._clocks):
             if val is not None:
-                clk, freq = val
+                clk, plan = val
                 unbuf = Signal(name='pl_clk{}_unbuf'.format(i))
-                platform.add_clock_constraint(unbuf, freq)
+                platform.add_clock_constraint(unbuf, plan.freq)
 
                 m.d.comb += unbuf.eq(self._ports[self.CLK][i])
                 buf = Instance(
@@ -116,6 +286,30 @@ class PsZynqMP(Elaboratable):
             if irq is not None:
                 m.d.comb += self._ports[self.IRQ[i // 8]][i % 8].eq(irq)
 
+        for name, regslice in self._axi_pipelines:
+            m.submodules[name] = regslice
+
+        for rec, domain in self._axi_domains.values():
+            for f in self.AXI_CLOCKS:
+                if f in rec.fields:
+                    m.d.comb += rec[f].eq(ClockSignal(domain))
+
+        for mmcm in self._mmcms.values():
+            m.submodules[mmcm.name] = mmcm
+
+        for field, port, direction in self._axi_slices:
+            if direction == 'output':
+                m.d.comb += field.eq(port[:len(field)])
+            else:
+                m.d.comb += port.eq(field)
+
+        ps_config = self.get_ps_config()
+        set_platform_files(platform, {
+            'ps_clocks.xdc': self.get_clock_constraints(),
+            'ps_config.tcl': get_config_tcl(ps_config) if ps_config else '',
+            'ps_config.h': get_config_c(ps_config) if ps_config else '',
+        })
+
         ps_i = Instance(
             'PS8',
             a_DONT_TOUCH="true",
@@ -0,0 +1,39 @@
+from collections import namedtuple
+
+__all__ = ['MaskWrite', 'get_config_tcl', 'get_config_c']
+
+
+MaskWrite = namedtuple('MaskWrite', ['address', 'mask', 'value', 'comment'])
+
+
+def get_config_tcl(writes):
+    '''
+        Renders register writes with the ``mask_write`` procedure defined by
+        the ``ps7_init.tcl``/``psu_init.tcl`` scripts exported by Vivado, so
+        they can be sourced from xsct right after the PS initialization.
+    '''
+    lines = []
+    for write in writes:
+        lines.append('# {}'.format(write.comment))
+        lines.append('mask_write 0x{:08X} 0x{:08X} 0x{:08X}'.format(
+            write.address, write.mask, write.value))
+    return '\n'.join(lines) + '\n'
+
+
+def get_config_c(writes, name='ps_config'):
+    '''
+        Renders register writes as a C function for FSBL/bare-metal hooks.
+    '''
+    lines = [
+        '#include "xil_io.h"',
+        '',
+        'static inline void {}(void)'.format(name),
+        '{',
+    ]
+    for write in writes:
+        lines.append('    /* {} */'.format(write.comment))
+        lines.append(
+            '    Xil_Out32(0x{0:08X}U, (Xil_In32(0x{0:08X}U) & ~0x{1:08X}U) | 0x{2:08X}U);'.format(
+                write.address, write.mask, write.value))
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
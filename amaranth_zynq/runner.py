@@ -0,0 +1,174 @@
+import os
+import copy
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from amaranth.build.run import LocalBuildProducts
+
+__all__ = ['BuildJob', 'BuildResult', 'BuildRunner']
+
+
+class BuildJob:
+    def __init__(self, platform, elaboratable, overrides=None, name='top',
+                 job_id=None, max_threads=None, memory_limit=None):
+        self.platform = platform
+        self.elaboratable = elaboratable
+        self.overrides = dict(overrides or {})
+        self.name = name
+        self.job_id = job_id
+        self.max_threads = max_threads
+        self.memory_limit = memory_limit
+
+
+class BuildResult:
+    def __init__(self, job, build_dir):
+        self.job = job
+        self.build_dir = build_dir
+        self.returncode = None
+        self.cached = False
+        self.error = None
+        self.elapsed = None
+        self.artifacts = []
+
+    @property
+    def ok(self):
+        return self.error is None and (self.cached or self.returncode == 0)
+
+    @property
+    def log(self):
+        return os.path.join(self.build_dir, 'build_{}.log'.format(self.job.name))
+
+    @property
+    def products(self):
+        assert self.ok, ('Build failed')
+        return LocalBuildProducts(os.path.abspath(self.build_dir))
+
+
+class BuildRunner:
+    '''
+        Runs the toolchain for several (platform, elaboratable, overrides)
+        jobs concurrently on the local machine.
+
+        Designs are elaborated in the calling process, one after another, and
+        the generated build scripts are then executed as separate processes,
+        at most ``max_workers`` at a time. ``max_threads`` is passed to Vivado
+        as ``general.maxThreads`` and ``memory_limit`` (in bytes) caps the
+        memory of each toolchain process.
+
+        By default the limit is applied with ``prlimit --as``, so it caps
+        virtual memory: Vivado reserves address space well beyond what it
+        touches, set the limit generously above the expected resident
+        size. With ``cgroup=True`` the build runs in a transient systemd
+        scope (``systemd-run --user --scope -p MemoryMax=``) instead, which
+        caps resident memory but needs a systemd user session.
+
+        The workers are threads that only wait for their script, which does
+        the actual work in its own process, so a process pool would gain
+        nothing and would need picklable designs and platforms. Elaboration
+        takes seconds next to the minutes of a toolchain run and is not
+        parallelized either. Every job prepares its own copy of the
+        platform, so several jobs can share one platform instance.
+    '''
+    def __init__(self, build_root='build', max_workers=None,
+                 max_threads=None, memory_limit=None, cgroup=False):
+        self.build_root = build_root
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_threads = max_threads
+        self.memory_limit = memory_limit
+        self.cgroup = cgroup
+        self.jobs = []
+
+    def add(self, platform, elaboratable, overrides=None, **kwargs):
+        job = BuildJob(platform, elaboratable, overrides, **kwargs)
+        if job.job_id is None:
+            job.job_id = '{}_{}'.format(type(platform).__name__, len(self.jobs))
+        self.jobs.append(job)
+        return job
+
+    def _get_overrides(self, job):
+        overrides = dict(job.overrides)
+        max_threads = job.max_threads or self.max_threads
+        if max_threads is not None:
+            overrides['script_after_read'] = '\n'.join([
+                'set_param general.maxThreads {}'.format(max_threads),
+                overrides.get('script_after_read', ''),
+            ])
+        return overrides
+
+    def _get_command(self, job, script):
+        # The limit is part of the command line, the build runs from worker
+        # threads where preexec_fn is not safe
+        command = ['sh', script]
+        memory_limit = job.memory_limit or self.memory_limit
+        if memory_limit is None:
+            return command
+        if self.cgroup:
+            return ['systemd-run', '--user', '--scope', '--quiet',
+                    '-p', 'MemoryMax={}'.format(memory_limit),
+                    '-p', 'MemorySwapMax=0'] + command
+        return ['prlimit', '--as={}'.format(memory_limit), '--'] + command
+
+    def _get_artifacts(self, job, build_dir):
+        if hasattr(job.platform, 'get_build_artifacts'):
+            return job.platform.get_build_artifacts(job.name, build_dir)
+        return []
+
+    def _prepare(self, job):
+        build_dir = os.path.join(self.build_root, job.job_id)
+        result = BuildResult(job, build_dir)
+        try:
+            # A platform can only be prepared once
+            platform = copy.deepcopy(job.platform)
+            plan = platform.prepare(job.elaboratable, job.name,
+                                    **self._get_overrides(job))
+            plan.execute_local(build_dir, run_script=False)
+            cache = getattr(platform, 'build_cache', None)
+            key = None
+            if cache is not None:
+                key = cache.key(plan, platform)
+                if cache.lookup(key) is not None:
+                    cache.restore(key, build_dir)
+                    result.cached = True
+                    result.artifacts = self._get_artifacts(job, build_dir)
+        except Exception as e:
+            result.error = e
+            key = plan = None
+        return result, plan, key
+
+    def _execute(self, result, plan, key):
+        job = result.job
+        start = time.monotonic()
+        with open(result.log, 'w') as log:
+            command = self._get_command(job, '{}.sh'.format(plan.script))
+            process = subprocess.run(
+                command,
+                cwd=result.build_dir,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        result.elapsed = time.monotonic() - start
+        result.returncode = process.returncode
+        if result.ok:
+            result.artifacts = self._get_artifacts(job, result.build_dir)
+            if key is not None:
+                job.platform.build_cache.store(key, result.build_dir, result.artifacts)
+        return result
+
+    def run(self):
+        results = []
+        pending = []
+        for job in self.jobs:
+            result, plan, key = self._prepare(job)
+            results.append(result)
+            if result.error is None and not result.cached:
+                pending.append((result, plan, key))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._execute, *args) for args in pending]
+            for future, (result, _, _) in zip(futures, pending):
+                try:
+                    future.result()
+                except Exception as e:
+                    result.error = e
+        return results
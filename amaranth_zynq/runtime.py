@@ -0,0 +1,188 @@
+import os
+import mmap
+import struct
+
+__all__ = ['MAXI_WINDOWS', 'MaxiWindow', 'RegisterBlock', 'open_maxi']
+
+# (base address, window size) of the MAXI ports in the default address map,
+# see UG585 4.1 and UG1085 10.1
+MAXI_WINDOWS = {
+    'ps7': {
+        'maxigp0': (0x40000000, 0x40000000),
+        'maxigp1': (0x80000000, 0x40000000),
+    },
+    'ps8': {
+        'maxigp0': (0xA0000000, 0x10000000),
+        'maxigp1': (0xB0000000, 0x10000000),
+        'maxigp2': (0x80000000, 0x20000000),
+    },
+}
+
+# Register types, as memoryview formats
+TYPES = {
+    'u8': 'B', 'u16': 'H', 'u32': 'I', 'u64': 'Q',
+    'i8': 'b', 'i16': 'h', 'i32': 'i', 'i64': 'q',
+    'f32': 'f', 'f64': 'd',
+}
+
+
+class MaxiWindow:
+    '''
+        Memory mapping of ``size`` bytes at physical address ``base``,
+        through ``/dev/mem`` by default. Any other ``path`` is mapped from
+        ``offset`` (0 for regular files), so the same code can run against
+        a file standing in for the hardware; the file must be at least
+        ``offset + size`` bytes long.
+
+        Accesses go through typed ``memoryview``s, so a ``u32`` read is a
+        single 32 bit load, and ``array`` returns NumPy arrays backed by
+        the mapping itself (NumPy is only needed for ``array``). When
+        ``size`` is not a multiple of a type's size, the trailing bytes are
+        out of bounds for that type.
+    '''
+    def __init__(self, base, size, path='/dev/mem', offset=None):
+        if offset is None:
+            offset = base if path == '/dev/mem' else 0
+        self.base = base
+        self.size = size
+        self.path = path
+
+        # mmap offsets must be page aligned
+        self._skew = offset % mmap.ALLOCATIONGRANULARITY
+        fd = os.open(path, os.O_RDWR | os.O_SYNC)
+        try:
+            self._mmap = mmap.mmap(fd, size + self._skew, mmap.MAP_SHARED,
+                                   mmap.PROT_READ | mmap.PROT_WRITE,
+                                   offset=offset - self._skew)
+        finally:
+            os.close(fd)
+        self._buffer = memoryview(self._mmap)[self._skew:]
+        self._views = {}
+
+    def _view(self, typ):
+        if typ not in self._views:
+            # Trailing bytes that don't make a whole item are left out
+            itemsize = struct.calcsize(TYPES[typ])
+            self._views[typ] = self._buffer[:self.size // itemsize * itemsize].cast(TYPES[typ])
+        return self._views[typ]
+
+    def _index(self, offset, typ):
+        itemsize = self._view(typ).itemsize
+        assert offset % itemsize == 0, ('Unaligned {} access at {:#x}'.format(typ, offset))
+        assert 0 <= offset and offset + itemsize <= self.size, (
+            'Offset {:#x} outside the window'.format(offset))
+        return offset // itemsize
+
+    def read(self, offset, typ='u32'):
+        return self._view(typ)[self._index(offset, typ)]
+
+    def write(self, offset, value, typ='u32'):
+        self._view(typ)[self._index(offset, typ)] = value
+
+    def read_block(self, offset, count, typ='u32'):
+        '''
+            ``count`` consecutive values as a list, one load each.
+        '''
+        index = self._index(offset, typ)
+        return self._view(typ)[index:index + count].tolist()
+
+    def array(self, offset=0, count=None, dtype='uint32'):
+        '''
+            NumPy array of ``count`` ``dtype`` items (up to the end of the
+            window by default) sharing memory with the mapping, reads and
+            writes go straight to the hardware.
+        '''
+        import numpy as np
+        dtype = np.dtype(dtype)
+        if count is None:
+            count = (self.size - offset) // dtype.itemsize
+        assert offset % dtype.itemsize == 0
+        assert offset + count * dtype.itemsize <= self.size
+        return np.frombuffer(self._buffer, dtype=dtype, count=count, offset=offset)
+
+    def registers(self, register_map, offset=0, types=None):
+        return RegisterBlock(self, register_map, offset, types)
+
+    def close(self):
+        # Fails with BufferError while arrays from ``array`` are alive
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RegisterBlock:
+    '''
+        Named registers of a ``MaxiWindow``. ``register_map`` is a dict of
+        name to byte offset, as returned by ``get_register_map`` of the PL
+        components, relative to ``offset``. Registers are ``u32`` unless
+        ``types`` gives another type from ``TYPES`` by name.
+
+        Registers read and write as attributes or items:
+
+            regs = window.registers(dma.get_register_map())
+            regs.MM2S_LEN = 4096
+            status = regs['STATUS']
+
+        ``read_all`` fetches every ``u32`` register with a single block
+        read of the span they cover.
+    '''
+    def __init__(self, window, register_map, offset=0, types=None):
+        self.__dict__.update(
+            _window=window,
+            _offsets={name: offset + off for name, off in register_map.items()},
+            _types=dict(types or {}),
+        )
+
+    def _get_type(self, name):
+        return self._types.get(name, 'u32')
+
+    def __getitem__(self, name):
+        return self._window.read(self._offsets[name], self._get_type(name))
+
+    def __setitem__(self, name, value):
+        self._window.write(self._offsets[name], value, self._get_type(name))
+
+    def __getattr__(self, name):
+        if name not in self._offsets:
+            raise AttributeError(name)
+        return self[name]
+
+    def __setattr__(self, name, value):
+        if name not in self._offsets:
+            raise AttributeError(name)
+        self[name] = value
+
+    def __dir__(self):
+        return list(self._offsets)
+
+    def read_all(self):
+        names = [name for name in self._offsets if self._get_type(name) == 'u32']
+        if not names:
+            return {}
+        lo = min(self._offsets[name] for name in names)
+        hi = max(self._offsets[name] for name in names)
+        values = self._window.read_block(lo, (hi - lo) // 4 + 1)
+        return {name: values[(self._offsets[name] - lo) // 4] for name in names}
+
+
+def open_maxi(port, family='ps8', size=None, offset=0, path='/dev/mem'):
+    '''
+        ``MaxiWindow`` on ``size`` bytes of a MAXI port (like ``maxigp2``),
+        starting ``offset`` bytes into its address window. ``family`` is
+        ``ps7`` for Zynq-7000 and ``ps8`` for Zynq UltraScale+. Without
+        ``size`` the whole window is mapped.
+    '''
+    base, window = MAXI_WINDOWS[family][port]
+    if size is None:
+        size = window - offset
+    assert offset + size <= window, ('{} window is {:#x} bytes'.format(port, window))
+    return MaxiWindow(base + offset, size, path,
+                      None if path == '/dev/mem' else offset)
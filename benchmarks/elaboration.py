@@ -0,0 +1,165 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import traceback
+import tracemalloc
+
+# Run from a checkout without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from amaranth import Elaboratable, Module, ClockDomain, ClockSignal, ResetSignal
+from amaranth.hdl.ir import Fragment
+from amaranth.back import rtlil, verilog
+
+from amaranth_zynq.ps7.ps import ZynqPS
+from amaranth_zynq.ps8.ps import PsZynqMP
+
+
+FAMILIES = {
+    'ps7': (ZynqPS, 'maxigp0'),
+    'ps8': (PsZynqMP, 'maxigp2'),
+}
+
+MODES = {
+    'eager': {},
+    'tie_off': {'tie_off': True},
+    'lazy': {'lazy': True},
+}
+
+
+class BenchPlatform:
+    def __init__(self):
+        self.clocks = []
+
+    def add_clock_constraint(self, clock, frequency):
+        self.clocks.append((clock, frequency))
+
+
+class BenchTop(Elaboratable):
+    def __init__(self, ps, axis):
+        self.ps = ps
+        self.axis = axis
+
+    def elaborate(self, platform):
+        m = Module()
+        m.domains += ClockDomain('sync')
+        m.submodules.ps = ps = self.ps
+
+        clk = ps.get_clock_signal(0, 200e6)
+        m.d.comb += ClockSignal('sync').eq(clk)
+        m.d.comb += ResetSignal('sync').eq(ps.get_reset_signal(0))
+        m.d.comb += ps.get_irq_signal(0).eq(1)
+        return m
+
+
+def get_configs(family):
+    ps_cls, maxi = FAMILIES[family]
+    return {
+        'basic': [],
+        'axi': [maxi],
+        'all_axi': ps_cls.MAXI + ps_cls.SAXI + ps_cls.ACP + getattr(ps_cls, 'ACE', []),
+    }
+
+
+def run_once(family, config, mode, emit_verilog=False):
+    ps_cls, _ = FAMILIES[family]
+    ports = get_configs(family)[config]
+    times = {}
+
+    start = time.perf_counter()
+    ps = ps_cls(**MODES[mode])
+    times['construct'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    axis = [ps.get_axi(axi) for axi in ports]
+    times['get_axi'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fragment = Fragment.get(BenchTop(ps, axis), BenchPlatform()).prepare()
+    times['elaborate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rtlil_text, _ = rtlil.convert_fragment(fragment, 'top')
+    times['rtlil'] = time.perf_counter() - start
+
+    if emit_verilog:
+        # Converts to RTLIL again before running Yosys
+        start = time.perf_counter()
+        verilog.convert_fragment(fragment, 'top')
+        times['verilog'] = time.perf_counter() - start
+
+    return times, len(rtlil_text)
+
+
+def run(family, config, mode, repeat=3, emit_verilog=False, reraise=False):
+    result = {'family': family, 'config': config, 'mode': mode}
+    try:
+        best = {}
+        for _ in range(repeat):
+            gc.collect()
+            times, size = run_once(family, config, mode, emit_verilog)
+            for phase, t in times.items():
+                best[phase] = min(best.get(phase, t), t)
+
+        gc.collect()
+        tracemalloc.start()
+        run_once(family, config, mode)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except Exception as e:
+        if reraise:
+            raise
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        result['traceback'] = traceback.format_exc()
+        return result
+
+    result['times'] = best
+    result['rtlil_size'] = size
+    result['peak_memory'] = peak
+    return result
+
+
+def format_result(result):
+    name = '{family:4} {config:8} {mode:8}'.format(**result)
+    if 'error' in result:
+        return '{} FAILED {}\n{}'.format(name, result['error'], result['traceback'].rstrip())
+    phases = ' '.join(
+        '{}={:8.2f}ms'.format(phase, t * 1e3)
+        for phase, t in result['times'].items()
+    )
+    return '{} {} rtlil_size={:7d}B peak={:7.2f}MiB'.format(
+        name, phases, result['rtlil_size'], result['peak_memory'] / 2**20)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--family', choices=list(FAMILIES), action='append',
+                        help='PS family to benchmark (default: all)')
+    parser.add_argument('--config', choices=['basic', 'axi', 'all_axi'], action='append',
+                        help='top level configuration (default: all)')
+    parser.add_argument('--mode', choices=list(MODES), action='append',
+                        help='PS port construction mode (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing repetitions, the best one is reported')
+    parser.add_argument('--verilog', action='store_true',
+                        help='also time Verilog emission, RTLIL conversion included '
+                             '(requires Yosys)')
+    parser.add_argument('--raise', dest='reraise', action='store_true',
+                        help='stop at the first failing run instead of reporting it')
+    parser.add_argument('-o', default=None, help='JSON output file')
+    args = parser.parse_args()
+
+    results = []
+    for family in args.family or list(FAMILIES):
+        for config in args.config or ['basic', 'axi', 'all_axi']:
+            for mode in args.mode or list(MODES):
+                result = run(family, config, mode, args.repeat, args.verilog, args.reraise)
+                print(format_result(result), flush=True)
+                results.append(result)
+
+    if args.o:
+        with open(args.o, 'w') as f:
+            json.dump(results, f, indent=4)
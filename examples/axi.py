@@ -27,8 +27,7 @@ class AxiExample(Elaboratable):
         reset_sync = ResetSynchronizer(reset, domain="sync")
         m.submodules.reset_sync = reset_sync
 
-        axi_ps = ps.get_axi('maxigp2')
-        m.d.comb += axi_ps['ACLK'].eq(clk)
+        axi_ps = ps.get_axi('maxigp2', domain='sync')
         axi_master = AxiMaster.from_record(axi_ps)
 
         axi2axil = Axi2AxiLite(data_w=32, addr_w=16, id_w=5, domain='sync')
@@ -25,5 +25,8 @@ setup(
     install_requires=[
         "amaranth",
     ],
+    extras_require={
+        "runtime": ["numpy"],
+    },
     packages=find_packages(exclude=["*.test*"]),
 )
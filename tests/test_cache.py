@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from amaranth import Module, Signal
+from amaranth.build.run import BuildPlan
+
+from amaranth_zynq.cache import BuildCache
+
+from .utils import Zynq7020Platform, Zu3egPlatform, make_toolchain, get_toolchain_runs
+
+
+def get_design(value=1):
+    m = Module()
+    out = Signal(8)
+    m.d.comb += out.eq(value)
+    return m
+
+
+class BuildCacheKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def get_plan(self, **files):
+        plan = BuildPlan('build_top')
+        for name, contents in sorted(files.items()):
+            plan.add_file(name, contents)
+        return plan
+
+    def get_platform(self, **kwargs):
+        target = dict(toolchain='Vivado', device='xczu3eg', package='sfva625',
+                      speed='1', grade='e')
+        target.update(kwargs)
+        return types.SimpleNamespace(**target)
+
+    def test_key(self):
+        cache = BuildCache(self.root, toolchain_version='2023.1')
+        plan = self.get_plan(top_v='module top;', top_xdc='')
+        key = cache.key(plan, self.get_platform())
+        self.assertEqual(key, cache.key(self.get_plan(top_v='module top;', top_xdc=''),
+                                        self.get_platform()))
+
+        misses = [
+            cache.key(self.get_plan(top_v='module top ;', top_xdc=''), self.get_platform()),
+            cache.key(self.get_plan(top_v='module top;', top_xdc='', ps_clocks_xdc=''),
+                      self.get_platform()),
+            BuildCache(self.root, toolchain_version='2024.1').key(plan, self.get_platform()),
+            cache.key(plan, self.get_platform(device='xczu9eg')),
+            cache.key(plan, self.get_platform(package='ffvb1156')),
+            cache.key(plan, self.get_platform(speed='2')),
+            cache.key(plan, self.get_platform(grade='i')),
+        ]
+        self.assertEqual(len(set(misses + [key])), len(misses) + 1)
+
+    def test_toolchain_version(self):
+        cache = BuildCache(self.root)
+        bin_dir = make_toolchain(self.root, '2022.2')
+        with mock.patch.dict(os.environ, {'PATH': bin_dir}):
+            os.environ.pop('XILINX_VIVADO', None)
+            os.environ.pop('VIVADO', None)
+            self.assertEqual(cache.get_toolchain_version(None), '2022.2')
+            os.environ['XILINX_VIVADO'] = '/opt/Xilinx/Vivado/2021.1/'
+            self.assertEqual(cache.get_toolchain_version(None), '2021.1')
+        with mock.patch.dict(os.environ, {'PATH': self.root}):
+            os.environ.pop('XILINX_VIVADO', None)
+            os.environ.pop('VIVADO', None)
+            self.assertEqual(cache.get_toolchain_version(None), 'unknown')
+
+
+class BuildCacheMixinTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = BuildCache(os.path.join(self.root, 'cache'))
+        self.toolchains = {}
+
+    def build(self, platform, design, build_dir, version='2023.1'):
+        if version not in self.toolchains:
+            self.toolchains[version] = make_toolchain(self.root, version)
+        bin_dir = self.toolchains[version]
+        platform.build_cache = self.cache
+        env = {'PATH': bin_dir + os.pathsep + os.environ.get('PATH', '')}
+        with mock.patch.dict(os.environ, env):
+            os.environ.pop('XILINX_VIVADO', None)
+            os.environ.pop('VIVADO', None)
+            return platform.build(design, build_dir=os.path.join(self.root, build_dir))
+
+    def runs(self, version='2023.1'):
+        return [os.path.basename(run) for run in get_toolchain_runs(self.toolchains[version])]
+
+    def check_hit(self, platform_cls, boot):
+        products = self.build(platform_cls(), get_design(), 'a')
+        self.assertEqual(self.runs(), ['a'])
+        artifacts = ['top.bit', 'top.bin', boot, 'top_timing.rpt']
+
+        # A hit restores the products and reports without running the script
+        products = self.build(platform_cls(), get_design(), 'b')
+        self.assertEqual(self.runs(), ['a'])
+        for artifact in artifacts:
+            self.assertEqual(products.get(artifact),
+                             open(os.path.join(self.root, 'a', artifact), 'rb').read(), artifact)
+        # The build files are still written, the logs are not cached
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'b', 'top.v')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'b', 'top.log')))
+
+    def test_hit_ps7(self):
+        self.check_hit(Zynq7020Platform, 'BOOT.bin')
+
+    def test_hit_ps8(self):
+        self.check_hit(Zu3egPlatform, 'top_bootgen.bin')
+
+    def test_misses(self):
+        self.build(Zu3egPlatform(), get_design(), 'a')
+        # Changed design file
+        self.build(Zu3egPlatform(), get_design(2), 'b')
+        self.assertEqual(self.runs(), ['a', 'b'])
+        self.assertNotEqual(open(os.path.join(self.root, 'a', 'top.bit')).read(),
+                            open(os.path.join(self.root, 'b', 'top.bit')).read())
+        # Other toolchain version
+        self.build(Zu3egPlatform(), get_design(), 'c', version='2024.1')
+        self.assertEqual(self.runs('2024.1'), ['c'])
+
+        # Other part
+        for i, target in enumerate([{'device': 'xczu2eg'}, {'package': 'sbva484'},
+                                    {'speed': '2'}]):
+            platform = Zu3egPlatform()
+            for attr, value in target.items():
+                setattr(platform, attr, value)
+            self.build(platform, get_design(), 'part{}'.format(i))
+        self.assertEqual(self.runs(), ['a', 'b', 'part0', 'part1', 'part2'])
+
+        # Everything was stored, the first build is still a hit
+        self.build(Zu3egPlatform(), get_design(), 'd')
+        self.assertEqual(self.runs(), ['a', 'b', 'part0', 'part1', 'part2'])
@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from amaranth import Module, ClockDomain
+
+from amaranth_zynq.axi.cdc import AsyncFifo
+
+from .utils import simulate
+
+
+class AsyncFifoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.m = Module()
+        self.m.domains += [ClockDomain('w'), ClockDomain('r')]
+        self.m.submodules.fifo = self.fifo = AsyncFifo(16, 8, 'w', 'r')
+
+    def check_full_empty(self, clocks):
+        fifo = self.fifo
+        state = {'full': False}
+
+        def writer():
+            # Fill until i_ready stays low, the reader is idle
+            count = 0
+            idle = 0
+            yield fifo.i_valid.eq(1)
+            while idle < 20:
+                yield fifo.i_data.eq(count)
+                yield
+                if (yield fifo.i_ready):
+                    count += 1
+                    idle = 0
+                else:
+                    idle += 1
+            yield fifo.i_valid.eq(0)
+            # The output register holds one more word than the memory
+            self.assertEqual(count, fifo.depth + 1)
+            self.assertEqual((yield fifo.w_level), fifo.depth)
+            state['full'] = True
+
+        def reader():
+            while not state['full']:
+                yield
+            for _ in range(5):
+                yield
+            self.assertEqual((yield fifo.r_level), fifo.depth + 1)
+            yield fifo.o_ready.eq(1)
+            words = []
+            while len(words) < fifo.depth + 1:
+                yield
+                if (yield fifo.o_valid):
+                    words.append((yield fifo.o_data))
+            self.assertEqual(words, list(range(fifo.depth + 1)))
+            # Drained, no word appears out of nowhere
+            for _ in range(10):
+                yield
+                self.assertFalse((yield fifo.o_valid))
+            self.assertEqual((yield fifo.r_level), 0)
+
+        simulate(self.m, [('w', writer), ('r', reader)], clocks=clocks)
+
+    def test_full_empty_fast_write(self):
+        self.check_full_empty({'w': 1e-8, 'r': 3.7e-8})
+
+    def test_full_empty_slow_write(self):
+        self.check_full_empty({'w': 3.7e-8, 'r': 1e-8})
+
+    def test_stream(self):
+        fifo = self.fifo
+        rnd = random.Random(0)
+        n = 200
+
+        def writer():
+            for i in range(n):
+                yield fifo.i_data.eq(i)
+                yield fifo.i_valid.eq(1)
+                while True:
+                    yield
+                    if (yield fifo.i_ready):
+                        break
+                yield fifo.i_valid.eq(0)
+                while rnd.random() < 0.3:
+                    yield
+
+        def reader():
+            words = []
+            while len(words) < n:
+                ready = rnd.random() < 0.7
+                yield fifo.o_ready.eq(ready)
+                yield
+                if ready and (yield fifo.o_valid):
+                    words.append((yield fifo.o_data))
+            self.assertEqual(words, list(range(n)))
+
+        simulate(self.m, [('w', writer), ('r', reader)],
+                 clocks={'w': 1e-8, 'r': 1.3e-8})
@@ -0,0 +1,213 @@
+import unittest
+
+from amaranth import Fragment, Signal
+
+from amaranth_zynq.clocking import (
+    solve_ps_clock, solve_mmcm, Mmcm, MMCM_LIMITS, get_clock_groups, get_clock_groups_xdc,
+)
+from amaranth_zynq.psconfig import MaskWrite, get_config_tcl, get_config_c
+from amaranth_zynq.ps7 import ZynqPS
+from amaranth_zynq.ps8 import PsZynqMP
+
+
+class PsClockTestCase(unittest.TestCase):
+    def brute_force(self, freq, plls):
+        return min(
+            abs(pll_freq / (d0 * d1) - freq) / freq
+            for pll_freq in plls.values()
+            for d0 in range(1, 64) for d1 in range(1, 64)
+        )
+
+    def test_exact(self):
+        clock = solve_ps_clock(100e6, ZynqPS.PLLS)
+        self.assertEqual((clock.source, clock.divisor0, clock.divisor1), ('IO', 10, 1))
+        self.assertEqual(clock.error, 0)
+        clock = solve_ps_clock(300e6, PsZynqMP.PLLS)
+        self.assertEqual((clock.source, clock.divisor0, clock.divisor1), ('IOPLL', 5, 1))
+        # Ties go to the smallest divisor1
+        clock = solve_ps_clock(1e6, ZynqPS.PLLS)
+        self.assertEqual((clock.source, clock.divisor0, clock.divisor1), ('IO', 50, 20))
+        self.assertEqual(clock.freq, 1e6)
+
+    def test_closest(self):
+        for plls in [ZynqPS.PLLS, PsZynqMP.PLLS]:
+            for freq in [12.288e6, 33e6, 74.25e6, 147.456e6, 260e6, 400e6]:
+                clock = solve_ps_clock(freq, plls)
+                self.assertEqual(clock.requested, freq)
+                self.assertAlmostEqual(
+                    clock.freq, plls[clock.source] / (clock.divisor0 * clock.divisor1))
+                self.assertAlmostEqual(abs(clock.error), self.brute_force(freq, plls))
+
+    def test_out_of_range(self):
+        with self.assertRaisesRegex(AssertionError, 'No divider setting for 100000.0 Hz'):
+            solve_ps_clock(100e3, ZynqPS.PLLS)
+        ps = PsZynqMP(lazy=True)
+        ps.get_clock_signal(0, 260e6, max_error=0.05)
+        with self.assertRaisesRegex(AssertionError, 'away from the requested 260000000.0 Hz'):
+            ps.get_clock_signal(1, 260e6, max_error=0.001)
+
+
+class PsConfigTestCase(unittest.TestCase):
+    def test_ps7(self):
+        ps = ZynqPS(lazy=True)
+        ps.get_clock_signal(0, 100e6)
+        ps.get_clock_signal(2, 1e6)
+        ps.get_axi('saxihp1', data_w=32)
+        writes = ps.get_ps_config()
+        self.assertEqual(writes, [
+            MaskWrite(0xF8009000, 0x1, 0x1, 'saxihp1 32 bit data width'),
+            MaskWrite(0xF8009014, 0x1, 0x1, 'saxihp1 32 bit data width'),
+            MaskWrite(0xF8000008, 0xFFFF, 0xDF0D, 'SLCR unlock'),
+            MaskWrite(0xF8000170, 0x03F03F30, 0x00100A00, 'FCLK0 IO / 10 / 1 = 100.000000 MHz'),
+            MaskWrite(0xF8000190, 0x03F03F30, 0x01403200, 'FCLK2 IO / 50 / 20 = 1.000000 MHz'),
+            MaskWrite(0xF8000004, 0xFFFF, 0x767B, 'SLCR lock'),
+        ])
+        tcl = get_config_tcl(writes)
+        self.assertTrue(tcl.startswith(
+            '# saxihp1 32 bit data width\n'
+            'mask_write 0xF8009000 0x00000001 0x00000001\n'))
+        self.assertIn(
+            '# FCLK0 IO / 10 / 1 = 100.000000 MHz\n'
+            'mask_write 0xF8000170 0x03F03F30 0x00100A00\n', tcl)
+        self.assertTrue(tcl.endswith('mask_write 0xF8000004 0x0000FFFF 0x0000767B\n'))
+
+    def test_ps8(self):
+        ps = PsZynqMP(lazy=True, plls={'RPLL': 1200e6})
+        ps.get_clock_signal(1, 150e6)
+        ps.get_axi('maxigp2', data_w=64)
+        writes = ps.get_ps_config()
+        self.assertEqual(writes, [
+            MaskWrite(0xFF419000, 0x300, 0x100, 'maxigp2 64 bit data width'),
+            MaskWrite(0xFF5E00C4, 0x013F3F07, 0x01010802, 'PL1 RPLL / 8 / 1 = 150.000000 MHz'),
+        ])
+        self.assertEqual(get_config_c(writes, 'pl_init'), '\n'.join([
+            '#include "xil_io.h"',
+            '',
+            'static inline void pl_init(void)',
+            '{',
+            '    /* maxigp2 64 bit data width */',
+            '    Xil_Out32(0xFF419000U, (Xil_In32(0xFF419000U) & ~0x00000300U) | 0x00000100U);',
+            '    /* PL1 RPLL / 8 / 1 = 150.000000 MHz */',
+            '    Xil_Out32(0xFF5E00C4U, (Xil_In32(0xFF5E00C4U) & ~0x013F3F07U) | 0x01010802U);',
+            '}',
+        ]) + '\n')
+
+    def test_empty(self):
+        self.assertEqual(ZynqPS(lazy=True).get_ps_config(), [])
+
+
+class MmcmTestCase(unittest.TestCase):
+    def test_solve(self):
+        config = solve_mmcm(100e6, [200e6, 50e6])
+        self.assertEqual((config.divclk, config.mult, config.dividers), (1, 12, [6, 24]))
+        self.assertEqual(config.error, 0)
+        # Exact with a 900 MHz or 1.2 GHz VCO too, the fastest wins
+        config = solve_mmcm(100e6, [300e6], 'MMCME4_ADV')
+        self.assertEqual((config.vco, config.dividers), (1500e6, [5]))
+
+    def test_limits(self):
+        for primitive, limits in MMCM_LIMITS.items():
+            for freq_in, freqs in [(100e6, [148.5e6, 74.25e6]), (33.333e6, [125e6]),
+                                   (200e6, [10e6, 333e6, 25e6]), (50e6, [limits['out']])]:
+                config = solve_mmcm(freq_in, freqs, primitive)
+                self.assertGreaterEqual(config.vco, limits['vco'][0])
+                self.assertLessEqual(config.vco, limits['vco'][1])
+                pfd = freq_in / config.divclk
+                self.assertTrue(limits['pfd'][0] <= pfd <= limits['pfd'][1])
+                self.assertLessEqual(config.mult, limits['mult'])
+                self.assertTrue(all(1 <= d <= limits['div'] for d in config.dividers))
+                self.assertLess(config.error, 2e-3)
+
+    def test_errors(self):
+        with self.assertRaisesRegex(AssertionError, 'MMCME2_ADV can not output 900000000.0 Hz'):
+            solve_mmcm(100e6, [100e6, 900e6])
+        with self.assertRaisesRegex(AssertionError, 'MMCME4_ADV can not output 900000000.0 Hz'):
+            solve_mmcm(100e6, [900e6], 'MMCME4_ADV')
+        with self.assertRaisesRegex(AssertionError, 'No MMCME2_ADV setting for a 5000000.0 Hz input'):
+            solve_mmcm(5e6, [100e6])
+        ps = ZynqPS(lazy=True)
+        with self.assertRaisesRegex(AssertionError, 'MMCM outputs'):
+            ps.get_mmcm(0, [97.3e6], max_error=1e-4)
+
+    def get_instances(self, mmcm):
+        fragment = Fragment.get(mmcm, None)
+        return {name: sub for sub, name in fragment.subfragments}
+
+    def test_elaborate(self):
+        mmcm = Mmcm(Signal(), 100e6, [200e6, 50e6], name='pl_clk0_mmcm')
+        self.assertEqual(mmcm.get_clocks(), [
+            ('pl_clk0_mmcm_clk0_unbuf', 200e6), ('pl_clk0_mmcm_clk1_unbuf', 50e6),
+        ])
+        instances = self.get_instances(mmcm)
+        self.assertEqual(instances['mmcm'].type, 'MMCME2_ADV')
+        params = instances['mmcm'].parameters
+        self.assertEqual(params['CLKIN1_PERIOD'], 10.0)
+        self.assertEqual(params['DIVCLK_DIVIDE'], 1)
+        self.assertEqual(params['CLKFBOUT_MULT_F'], 12.0)
+        self.assertEqual(params['CLKOUT0_DIVIDE_F'], 6.0)
+        self.assertEqual(params['CLKOUT1_DIVIDE'], 24)
+        self.assertEqual(params['COMPENSATION'], 'ZHOLD')
+        ports = instances['mmcm'].named_ports
+        self.assertNotIn('CDDCREQ', ports)
+        self.assertIs(ports['LOCKED'][0], mmcm.locked)
+        for name in ['fb_buffer', 'clk0_buffer', 'clk1_buffer']:
+            self.assertEqual(instances[name].type, 'BUFG')
+        self.assertIs(instances['fb_buffer'].named_ports['O'][0], ports['CLKFBIN'][0])
+        self.assertIs(instances['clk1_buffer'].named_ports['O'][0], mmcm.clk[1])
+        self.assertIn('rst1_sync', instances)
+
+        mmcm = Mmcm(Signal(), 100e6, [300e6], 'MMCME4_ADV')
+        instances = self.get_instances(mmcm)
+        self.assertEqual(instances['mmcm'].type, 'MMCME4_ADV')
+        self.assertEqual(instances['mmcm'].parameters['COMPENSATION'], 'AUTO')
+        self.assertIn('CDDCREQ', instances['mmcm'].named_ports)
+
+
+class ClockGroupsTestCase(unittest.TestCase):
+    GROUPS = [
+        [('pl_clk0_unbuf', 100e6), ('pl_clk0_mmcm_clk0_unbuf', 200e6)],
+        [('pl_clk1_unbuf', 50e6)],
+    ]
+
+    def test_groups(self):
+        clocks = {
+            0: [('a', 100e6), ('a_mmcm', 200e6)],
+            1: [('b', 50e6)],
+            3: [('d', 10e6)],
+        }
+        self.assertEqual(get_clock_groups(clocks), [
+            [('a', 100e6), ('a_mmcm', 200e6)], [('b', 50e6)], [('d', 10e6)],
+        ])
+        # PS clocks that weren't requested are ignored
+        self.assertEqual(get_clock_groups(clocks, [(3, 0), (1, 2)]), [
+            [('a', 100e6), ('a_mmcm', 200e6), ('d', 10e6)], [('b', 50e6)],
+        ])
+
+    def test_asynchronous(self):
+        self.assertEqual(get_clock_groups_xdc(self.GROUPS, 'asynchronous'), (
+            'set_clock_groups -asynchronous \\\n'
+            '    -group [get_clocks -of_objects [get_nets -hierarchical '
+            '{pl_clk0_unbuf pl_clk0_mmcm_clk0_unbuf}]] \\\n'
+            '    -group [get_clocks -of_objects [get_nets -hierarchical {pl_clk1_unbuf}]]\n'
+        ))
+
+    def test_datapath_only(self):
+        def clocks(net):
+            return '[get_clocks -of_objects [get_nets -hierarchical {{{}}}]]'.format(net)
+
+        lines = get_clock_groups_xdc(self.GROUPS).splitlines()
+        self.assertEqual(lines, [
+            'set_max_delay -datapath_only -from {} -to {} {}'.format(clocks(src), clocks(dst), delay)
+            for src, dst, delay in [
+                ('pl_clk0_unbuf', 'pl_clk1_unbuf', '10.000'),
+                ('pl_clk0_mmcm_clk0_unbuf', 'pl_clk1_unbuf', '5.000'),
+                ('pl_clk1_unbuf', 'pl_clk0_unbuf', '10.000'),
+                ('pl_clk1_unbuf', 'pl_clk0_mmcm_clk0_unbuf', '5.000'),
+            ]
+        ])
+
+    def test_single_group(self):
+        for mode in ['asynchronous', 'datapath_only']:
+            self.assertEqual(get_clock_groups_xdc(self.GROUPS[:1], mode), '')
+        with self.assertRaises(AssertionError):
+            get_clock_groups_xdc(self.GROUPS, 'false_path')
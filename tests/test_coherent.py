@@ -0,0 +1,180 @@
+import unittest
+
+from amaranth import Elaboratable, Module, ClockDomain, Fragment, Record
+from amaranth.back import rtlil
+from amaranth.hdl.ir import Instance
+
+from amaranth_zynq.axi import (
+    get_axi_record, get_cache_attrs, set_cache_attrs, AceLiteResponder,
+    CACHE_NORMAL, CACHE_WRITE_BACK, PROT_NONSECURE,
+    DOMAIN_NON_SHAREABLE, DOMAIN_INNER, DOMAIN_OUTER, DOMAIN_SYSTEM,
+)
+from amaranth_zynq.ps7 import ZynqPS
+from amaranth_zynq.ps8 import PsZynqMP
+from amaranth_zynq.ps7.layouts import get_axi_layout as get_ps7_axi_layout
+from amaranth_zynq.ps8.layouts import get_axi_layout as get_ps8_axi_layout
+
+from .utils import simulate
+
+
+def get_port_record(get_axi_layout, axi):
+    return Record([(f, w) for f, w, _ in get_axi_layout(axi)])
+
+
+class CacheAttrsTestCase(unittest.TestCase):
+    def test_axi4(self):
+        axi = get_axi_record('axi', data_w=64)
+        self.assertEqual(get_cache_attrs(axi, prot=PROT_NONSECURE), {
+            'ARCACHE': CACHE_WRITE_BACK, 'ARPROT': PROT_NONSECURE,
+            'AWCACHE': CACHE_WRITE_BACK, 'AWPROT': PROT_NONSECURE,
+        })
+        attrs = get_cache_attrs(axi, allocate=False)
+        self.assertEqual((attrs['ARCACHE'], attrs['AWCACHE']), (0b1011, 0b0111))
+        attrs = get_cache_attrs(axi, coherent=False)
+        self.assertEqual((attrs['ARCACHE'], attrs['AWCACHE']), (CACHE_NORMAL, CACHE_NORMAL))
+
+    def test_ps7_acp(self):
+        acp = get_port_record(get_ps7_axi_layout, 'slave_acp')
+        self.assertEqual(get_cache_attrs(acp), {
+            'ARCACHE': CACHE_WRITE_BACK, 'ARPROT': 0, 'ARUSER': 1,
+            'AWCACHE': CACHE_WRITE_BACK, 'AWPROT': 0, 'AWUSER': 1,
+        })
+        # AXI3 has no separate read and write allocate hints
+        attrs = get_cache_attrs(acp, allocate=False)
+        self.assertEqual((attrs['ARCACHE'], attrs['AWCACHE']), (0b0011, 0b0011))
+        attrs = get_cache_attrs(acp, coherent=False)
+        self.assertEqual((attrs['ARUSER'], attrs['AWUSER']), (0, 0))
+
+    def test_ps8_acp(self):
+        acp = get_port_record(get_ps8_axi_layout, 'slave_acp')
+        attrs = get_cache_attrs(acp)
+        self.assertEqual((attrs['ARUSER'], attrs['AWUSER']), (DOMAIN_INNER, DOMAIN_INNER))
+        attrs = get_cache_attrs(acp, coherent=False)
+        self.assertEqual((attrs['ARUSER'], attrs['AWUSER']),
+                         (DOMAIN_NON_SHAREABLE, DOMAIN_NON_SHAREABLE))
+
+    def test_ps8_ace(self):
+        ace = get_port_record(get_ps8_axi_layout, 'slave_ace')
+        self.assertEqual(get_cache_attrs(ace, allocate=False), {
+            'ARCACHE': 0b1011, 'ARPROT': 0, 'ARDOMAIN': DOMAIN_OUTER, 'ARSNOOP': 0, 'ARBAR': 0,
+            'AWCACHE': 0b0111, 'AWPROT': 0, 'AWDOMAIN': DOMAIN_OUTER, 'AWSNOOP': 0, 'AWBAR': 0,
+        })
+        attrs = get_cache_attrs(ace, coherent=False)
+        self.assertEqual((attrs['ARDOMAIN'], attrs['AWDOMAIN']), (DOMAIN_SYSTEM, DOMAIN_SYSTEM))
+
+    def test_set_cache_attrs(self):
+        ace = get_port_record(get_ps8_axi_layout, 'slave_ace')
+        targets = [s.lhs for s in set_cache_attrs(ace, cache=False)]
+        self.assertEqual(len(targets), len(get_cache_attrs(ace)) - 2)
+        self.assertFalse(any(t is ace.ARCACHE or t is ace.AWCACHE for t in targets))
+
+
+class AceLiteResponderTestCase(unittest.TestCase):
+    def test_handshakes(self):
+        ace = get_port_record(get_ps8_axi_layout, 'slave_ace')
+        m = Module()
+        m.submodules.responder = AceLiteResponder(ace)
+
+        def process():
+            # RACK follows the last beat of a burst only
+            yield ace.RREADY.eq(1)
+            yield ace.RVALID.eq(1)
+            yield
+            yield ace.RLAST.eq(1)
+            yield
+            self.assertFalse((yield ace.RACK))
+            yield ace.RVALID.eq(0)
+            yield
+            self.assertTrue((yield ace.RACK))
+            yield
+            self.assertFalse((yield ace.RACK))
+
+            # WACK follows the B handshake, not a stalled response
+            yield ace.BVALID.eq(1)
+            yield
+            self.assertFalse((yield ace.WACK))
+            yield ace.BREADY.eq(1)
+            yield
+            yield ace.BVALID.eq(0)
+            yield
+            self.assertTrue((yield ace.WACK))
+            yield
+            self.assertFalse((yield ace.WACK))
+
+            # One empty response per snoop, a stalled response holds off
+            # the next snoop
+            yield ace.ACVALID.eq(1)
+            snoops = responses = 0
+            for cycle in range(20):
+                yield ace.CRREADY.eq(cycle >= 10)
+                yield
+                snoops += (yield ace.ACVALID) and (yield ace.ACREADY)
+                if (yield ace.CRVALID):
+                    self.assertFalse((yield ace.ACREADY))
+                    self.assertEqual((yield ace.CRRESP), 0)
+                    responses += (yield ace.CRREADY)
+                self.assertFalse((yield ace.CDVALID))
+                if cycle == 9:
+                    self.assertEqual((snoops, responses), (1, 0))
+            yield ace.ACVALID.eq(0)
+            for _ in range(4):
+                yield
+                responses += (yield ace.CRVALID) and (yield ace.CRREADY)
+            self.assertGreater(snoops, 3)
+            self.assertEqual(responses, snoops)
+
+        simulate(m, [process])
+
+
+class CoherentTop(Elaboratable):
+    def __init__(self, ps, port):
+        self.ps = ps
+        self.port = port
+        self.axi = None
+
+    def elaborate(self, platform):
+        m = Module()
+        m.domains += ClockDomain('sync')
+        self.axi = self.ps.get_axi(self.port)
+        m.submodules.ps = self.ps
+        m.d.comb += set_cache_attrs(self.axi)
+        if 'RACK' in self.axi.fields:
+            m.submodules.responder = AceLiteResponder(self.axi)
+        return m
+
+
+class CoherentPortTestCase(unittest.TestCase):
+    def check_port(self, ps, port, prefix, fields):
+        top = CoherentTop(ps, port)
+        fragment = Fragment.get(top, None)
+        instances = []
+        stack = [fragment]
+        while stack:
+            frag = stack.pop()
+            if isinstance(frag, Instance):
+                instances.append(frag)
+            stack.extend(sub for sub, _ in frag.subfragments)
+        self.assertEqual(len(instances), 1)
+        ports = instances[0].named_ports
+        for f in fields:
+            value, _ = ports[prefix + f]
+            self.assertIs(value, top.axi[f], f)
+        rtlil.convert_fragment(fragment.prepare())
+        return top, ports
+
+    def test_ps7_acp(self):
+        ps = ZynqPS(lazy=True)
+        self.check_port(ps, 'saxiacp', 'SAXIACP', ['ARUSER', 'AWUSER', 'ARCACHE', 'WID'])
+
+    def test_ps8_acp(self):
+        ps = PsZynqMP(lazy=True)
+        self.check_port(ps, 'saxiacp', 'SAXIACP', ['ARUSER', 'AWUSER', 'AWCACHE', 'ACLK'])
+
+    def test_ps8_ace(self):
+        ps = PsZynqMP(lazy=True)
+        top, ports = self.check_port(ps, 'sacefpd', 'SACEFPD', [
+            'ARDOMAIN', 'AWDOMAIN', 'ARSNOOP', 'AWSNOOP', 'RACK', 'WACK', 'ACREADY', 'CRVALID',
+        ])
+        # The ACE port is clocked by PLACECLK
+        value, _ = ports['PLACECLK']
+        self.assertIs(value, top.axi.ACLK)
@@ -0,0 +1,99 @@
+import random
+import unittest
+
+from amaranth import Module
+
+from amaranth_zynq.axi import AxiReader, AxiWriter, get_axi_record
+
+from .utils import simulate, AxiMemoryModel
+
+
+class AxiDmaTestCase(unittest.TestCase):
+    # (address, length) of transfers around 4KB boundaries
+    TRANSFERS = [(0x0f80, 0x300), (0x1ff8, 0x10), (0x2000, 0x1000), (0x3008, 0x1ff0)]
+
+    def check_bursts(self, bursts, boundary, max_burst):
+        nbytes = 8
+        covered = []
+        for addr, n in bursts:
+            self.assertLessEqual(n, max_burst)
+            # Never crosses a boundary
+            self.assertEqual(addr // boundary, (addr + n * nbytes - 1) // boundary)
+            covered.extend(range(addr, addr + n * nbytes, nbytes))
+        expected = [a for addr, length in self.TRANSFERS
+                    for a in range(addr, addr + length, nbytes)]
+        self.assertEqual(covered, expected)
+
+    def check_reader(self, boundary):
+        axi = get_axi_record('axi', data_w=64, id_w=6)
+        m = Module()
+        m.submodules.reader = reader = AxiReader(axi, max_burst=16, boundary=boundary)
+        model = AxiMemoryModel(axi, 0x8000, reorder=True, ready=0.7)
+        model.data[:] = bytes(random.Random(0).getrandbits(8) for _ in range(0x8000))
+
+        def process():
+            yield reader.source.TREADY.eq(1)
+            for addr, length in self.TRANSFERS:
+                yield reader.cmd_addr.eq(addr)
+                yield reader.cmd_len.eq(length)
+                yield reader.cmd_valid.eq(1)
+                yield
+                yield reader.cmd_valid.eq(0)
+                beats = []
+                while True:
+                    yield
+                    if (yield reader.source.TVALID):
+                        beats.append((yield reader.source.TDATA))
+                        if (yield reader.source.TLAST):
+                            break
+                self.assertEqual(beats, [
+                    int.from_bytes(model.data[a:a + 8], 'little')
+                    for a in range(addr, addr + length, 8)
+                ])
+                while (yield reader.busy):
+                    yield
+
+        simulate(m, [process, model.process])
+        self.check_bursts(model.reads, boundary, 16)
+
+    def check_writer(self, boundary):
+        axi = get_axi_record('axi', data_w=64, id_w=6)
+        m = Module()
+        m.submodules.writer = writer = AxiWriter(axi, max_burst=16, boundary=boundary)
+        model = AxiMemoryModel(axi, 0x8000, reorder=True, ready=0.7)
+
+        def process():
+            for addr, length in self.TRANSFERS:
+                yield writer.cmd_addr.eq(addr)
+                yield writer.cmd_len.eq(length)
+                yield writer.cmd_valid.eq(1)
+                yield
+                yield writer.cmd_valid.eq(0)
+                for a in range(addr, addr + length, 8):
+                    yield writer.sink.TDATA.eq(a)
+                    yield writer.sink.TVALID.eq(1)
+                    while True:
+                        yield
+                        if (yield writer.sink.TREADY):
+                            break
+                yield writer.sink.TVALID.eq(0)
+                while not (yield writer.done):
+                    yield
+                self.assertFalse((yield writer.error))
+                for a in range(addr, addr + length, 8):
+                    self.assertEqual(int.from_bytes(model.data[a:a + 8], 'little'), a)
+
+        simulate(m, [process, model.process])
+        self.check_bursts(model.write_bursts, boundary, 16)
+
+    def test_reader_4k(self):
+        self.check_reader(4096)
+
+    def test_reader_striper_boundary(self):
+        self.check_reader(1024)
+
+    def test_writer_4k(self):
+        self.check_writer(4096)
+
+    def test_writer_striper_boundary(self):
+        self.check_writer(1024)
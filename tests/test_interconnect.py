@@ -0,0 +1,109 @@
+import random
+import unittest
+
+from amaranth import Module
+
+from amaranth_zynq.axi import AxiStriper, get_axi_record
+
+from .utils import simulate, AxiMemoryModel
+
+
+class AxiStriperTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ports = [get_axi_record('port{}'.format(i), data_w=64, id_w=6) for i in range(4)]
+        self.striper = AxiStriper(self.ports, granularity=256)
+        self.models = [
+            AxiMemoryModel(port, 4096, seed=i, reorder=True, ready=0.3)
+            for i, port in enumerate(self.ports)
+        ]
+        for i, model in enumerate(self.models):
+            model.data[:] = bytes((i * 64 + j) & 0xff for j in range(4096))
+        self.m = Module()
+        self.m.submodules.striper = self.striper
+
+    def expected(self, addr):
+        # Block n of 256 bytes lives in port n % 4
+        port = addr // 256 % 4
+        return int.from_bytes(self.models[port].data[addr:addr + 8], 'little')
+
+    def test_reads_in_order(self):
+        master = self.striper.master
+        rnd = random.Random(0)
+        bursts = [(rnd.randrange(0, 4096 - 64, 64), rnd.randint(1, 8), i % 8) for i in range(32)]
+
+        def addresses():
+            for addr, n, id in bursts:
+                yield master.ARADDR.eq(addr)
+                yield master.ARLEN.eq(n - 1)
+                yield master.ARSIZE.eq(3)
+                yield master.ARBURST.eq(1)
+                yield master.ARID.eq(id)
+                yield master.ARVALID.eq(1)
+                while True:
+                    yield
+                    if (yield master.ARREADY):
+                        break
+            yield master.ARVALID.eq(0)
+
+        def data():
+            yield master.RREADY.eq(1)
+            for addr, n, id in bursts:
+                for beat in range(n):
+                    while True:
+                        yield
+                        if (yield master.RVALID):
+                            break
+                    self.assertEqual((yield master.RID), id)
+                    self.assertEqual((yield master.RLAST), beat == n - 1)
+                    self.assertEqual((yield master.RDATA), self.expected(addr + 8 * beat))
+
+        simulate(self.m, [addresses, data] + [model.process for model in self.models])
+
+    def test_writes_in_order(self):
+        master = self.striper.master
+        rnd = random.Random(1)
+        bursts = [(rnd.randrange(0, 4096 - 64, 64), rnd.randint(1, 8), i % 8) for i in range(32)]
+
+        def addresses():
+            for addr, n, id in bursts:
+                yield master.AWADDR.eq(addr)
+                yield master.AWLEN.eq(n - 1)
+                yield master.AWSIZE.eq(3)
+                yield master.AWBURST.eq(1)
+                yield master.AWID.eq(id)
+                yield master.AWVALID.eq(1)
+                while True:
+                    yield
+                    if (yield master.AWREADY):
+                        break
+            yield master.AWVALID.eq(0)
+
+        def data():
+            yield master.WSTRB.eq(0xff)
+            for addr, n, id in bursts:
+                for beat in range(n):
+                    yield master.WDATA.eq(addr + 8 * beat)
+                    yield master.WLAST.eq(beat == n - 1)
+                    yield master.WVALID.eq(1)
+                    while True:
+                        yield
+                        if (yield master.WREADY):
+                            break
+            yield master.WVALID.eq(0)
+
+        def responses():
+            # Accept responses slowly so that they pile up in the ports
+            for addr, n, id in bursts:
+                while True:
+                    ready = rnd.random() < 0.1
+                    yield master.BREADY.eq(ready)
+                    yield
+                    if ready and (yield master.BVALID):
+                        break
+                self.assertEqual((yield master.BID), id)
+            yield master.BREADY.eq(0)
+
+        simulate(self.m, [addresses, data, responses] + [model.process for model in self.models])
+        written = {addr + 8 * beat for addr, n, id in bursts for beat in range(n)}
+        for addr in written:
+            self.assertEqual(self.expected(addr), addr)
@@ -0,0 +1,183 @@
+import unittest
+
+from amaranth import Module, Signal
+
+from amaranth_zynq.axi import AxiRegisterBank, IrqController, IrqLatencyProbe, get_axi_record
+
+from .utils import simulate, axi_write, axi_read
+
+
+class IrqControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.axi = get_axi_record('axi', data_w=32, id_w=4)
+        self.m = Module()
+        self.m.submodules.bank = bank = AxiRegisterBank(self.axi)
+        self.m.submodules.irqc = self.irqc = IrqController(bank, 40)
+        self.regs = self.irqc.get_register_map()
+
+    def read(self, name):
+        beats = yield from axi_read(self.axi, self.regs[name], 1)
+        return beats[0][0]
+
+    def write(self, name, value):
+        yield from axi_write(self.axi, self.regs[name], [value])
+
+    def pulse(self, *sources):
+        yield self.irqc.sources.eq(sum(1 << n for n in sources))
+        yield
+        yield self.irqc.sources.eq(0)
+        yield
+
+    def wait_irq(self, cycles):
+        for cycle in range(cycles):
+            if (yield self.irqc.irq):
+                return cycle
+            yield
+        return None
+
+    def test_count(self):
+        def process():
+            yield from self.write('COAL_COUNT', 4)
+            yield from self.write('COAL_TIMEOUT', 10000)
+            yield from self.write('MASK_1', 0xfe)
+            yield from self.write('CTRL', 1)
+
+            # A masked source is pending but doesn't count
+            yield from self.pulse(32)
+            yield from self.pulse(3)
+            yield from self.pulse(5, 33)
+            self.assertIsNone((yield from self.wait_irq(50)))
+            self.assertEqual((yield from self.read('PENDING_0')), 0b101000)
+            self.assertEqual((yield from self.read('PENDING_1')), 0b11)
+            self.assertEqual((yield from self.read('SUMMARY')), 0b11)
+
+            # The fourth event fires the interrupt
+            yield from self.pulse(39)
+            self.assertIsNotNone((yield from self.wait_irq(5)))
+
+            # Acknowledging part of the batch keeps it high
+            yield from self.write('ACK_0', 0b101000)
+            self.assertTrue((yield self.irqc.irq))
+            self.assertEqual((yield from self.read('SUMMARY')), 0b10)
+            yield from self.write('ACK_1', 0b10000010)
+            yield
+            self.assertFalse((yield self.irqc.irq))
+            # The masked source is still pending
+            self.assertEqual((yield from self.read('PENDING_1')), 0b1)
+            self.assertEqual((yield from self.read('SUMMARY')), 0)
+
+        simulate(self.m, [process])
+
+    def test_timeout(self):
+        def process():
+            yield from self.write('COAL_COUNT', 100)
+            yield from self.write('COAL_TIMEOUT', 50)
+            yield from self.write('CTRL', 1)
+
+            yield from self.pulse(7)
+            cycle = yield from self.wait_irq(100)
+            self.assertIsNotNone(cycle)
+            self.assertTrue(48 <= cycle <= 52, cycle)
+
+            # Once acknowledged, nothing fires without a new event
+            yield from self.write('ACK_0', 1 << 7)
+            yield
+            self.assertFalse((yield self.irqc.irq))
+            self.assertIsNone((yield from self.wait_irq(100)))
+
+            # Two quick events only make one interrupt
+            yield from self.pulse(1)
+            yield from self.pulse(2)
+            cycle = yield from self.wait_irq(100)
+            self.assertTrue(46 <= cycle <= 52, cycle)
+            self.assertEqual((yield from self.read('PENDING_0')), 0b110)
+
+        simulate(self.m, [process])
+
+
+class IrqLatencyProbeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.axi = get_axi_record('axi', data_w=32, id_w=4)
+        self.irq = Signal()
+        self.gpio = Signal()
+        self.m = Module()
+        self.m.submodules.bank = bank = AxiRegisterBank(self.axi)
+        self.m.submodules.probe = self.probe = IrqLatencyProbe(
+            self.irq, bank, gpio=self.gpio, bins=16, shift=2)
+        self.regs = self.probe.get_register_map()
+
+    def read(self, name, n=1):
+        beats = yield from axi_read(self.axi, self.regs[name], n, burst=0)
+        return [b[0] for b in beats] if n > 1 else beats[0][0]
+
+    def write(self, name, value):
+        yield from axi_write(self.axi, self.regs[name], [value])
+
+    def interrupt(self, latency):
+        # The PS toggles its GPIO ``latency`` cycles after the rising edge
+        yield self.irq.eq(1)
+        for _ in range(latency):
+            yield
+        yield self.gpio.eq(~self.gpio)
+        yield
+        yield self.irq.eq(0)
+        for _ in range(8):
+            yield
+
+    def test_histogram(self):
+        def process():
+            # The GPIO synchronizer adds a constant offset
+            yield from self.interrupt(20)
+            offset = (yield from self.read('LAST')) - 20
+            yield from self.write('CTRL', 0b11)
+            for _ in range(20):
+                yield
+
+            latencies = [0, 1, 2, 5, 6, 7, 8, 13, 30, 59, 60, 100, 1000]
+            for latency in latencies:
+                yield from self.interrupt(latency)
+
+            expected = [0] * 16
+            for latency in latencies:
+                expected[min((latency + offset) >> 2, 15)] += 1
+            yield from self.write('HIST_INDEX', 0)
+            self.assertEqual((yield from self.read('HIST_DATA', 16)), expected)
+            # Bins can also be read one at a time
+            yield from self.write('HIST_INDEX', 15)
+            self.assertEqual((yield from self.read('HIST_DATA')), expected[15])
+
+            self.assertEqual((yield from self.read('COUNT')), len(latencies))
+            self.assertEqual((yield from self.read('MIN')), offset)
+            self.assertEqual((yield from self.read('MAX')), 1000 + offset)
+            self.assertEqual((yield from self.read('LAST')), 1000 + offset)
+            self.assertEqual((yield from self.read('MISSED')), 0)
+
+        simulate(self.m, [process])
+
+    def test_missed_and_clear(self):
+        def process():
+            # A second edge before the acknowledge is only counted as missed
+            yield self.irq.eq(1)
+            yield
+            yield self.irq.eq(0)
+            yield
+            yield from self.interrupt(10)
+            self.assertEqual((yield from self.read('COUNT')), 1)
+            self.assertEqual((yield from self.read('MISSED')), 1)
+
+            # Acknowledging through the register works too
+            yield self.irq.eq(1)
+            yield from self.write('ACK', 1)
+            yield self.irq.eq(0)
+            self.assertEqual((yield from self.read('COUNT')), 2)
+
+            yield from self.write('CTRL', 0b11)
+            for _ in range(20):
+                yield
+            for name in ['COUNT', 'MISSED', 'LAST', 'MAX']:
+                self.assertEqual((yield from self.read(name)), 0)
+            self.assertEqual((yield from self.read('MIN')), 2**32 - 1)
+            yield from self.write('HIST_INDEX', 0)
+            self.assertEqual((yield from self.read('HIST_DATA', 16)), [0] * 16)
+
+        simulate(self.m, [process])
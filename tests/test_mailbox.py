@@ -0,0 +1,211 @@
+import unittest
+
+from amaranth import Module
+
+from amaranth_zynq.axi import Mailbox, get_axi_record
+
+from .utils import simulate, axi_write, axi_read
+
+
+class MailboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.axi = get_axi_record('axi', data_w=32, id_w=4)
+        self.m = Module()
+        self.m.submodules.mailbox = self.mailbox = Mailbox(self.axi, depth=16)
+        self.regs = self.mailbox.get_register_map()
+
+    def read(self, name, offset=0):
+        beats = yield from axi_read(self.axi, self.regs[name] + offset, 1)
+        return beats[0][0]
+
+    def write(self, name, value, offset=0):
+        yield from axi_write(self.axi, self.regs[name] + offset, [value])
+
+    def test_doorbells(self):
+        mailbox = self.mailbox
+        received = []
+        state = {'send': False}
+
+        def pl():
+            yield mailbox.source.TREADY.eq(1)
+            while len(received) < 3:
+                yield
+                if (yield mailbox.source.TVALID):
+                    received.append(((yield mailbox.source.TDATA),
+                                     (yield mailbox.source.TLAST)))
+            yield mailbox.source.TREADY.eq(0)
+
+            while not state['send']:
+                yield
+            for i, word in enumerate([0x1234, 0x5678]):
+                yield mailbox.sink.TDATA.eq(word)
+                yield mailbox.sink.TLAST.eq(i == 1)
+                yield mailbox.sink.TVALID.eq(1)
+                while True:
+                    yield
+                    if (yield mailbox.sink.TREADY):
+                        break
+                yield mailbox.sink.TVALID.eq(0)
+                # Half a message is not visible to the PS
+                if i == 0:
+                    yield
+                    self.assertFalse((yield mailbox.irq))
+
+        def ps():
+            # PS to PL message, the doorbell is the head pointer
+            yield from axi_write(self.axi, self.regs['TO_PL_RING'], [10, 11, 12])
+            yield from self.write('TO_PL_HEAD', 3)
+            while (yield from self.read('TO_PL_TAIL')) != 3:
+                pass
+            self.assertEqual(received, [(10, 0), (11, 0), (12, 1)])
+            # The PL took words, but that bit is not routed to irq by default
+            self.assertEqual((yield from self.read('STATUS')), 0b10)
+            self.assertFalse((yield mailbox.irq))
+
+            # PL to PS message raises irq once complete
+            state['send'] = True
+            while not (yield mailbox.irq):
+                yield
+            self.assertEqual((yield from self.read('TO_PS_HEAD')), 2)
+            self.assertEqual((yield from self.read('STATUS')), 0b11)
+            self.assertEqual((yield from self.read('TO_PS_RING')), 0x1234)
+            self.assertEqual((yield from self.read('TO_PS_RING', 4)), 0x5678)
+            yield from self.write('TO_PS_TAIL', 2)
+            yield from self.write('STATUS', 0b01)
+            yield
+            self.assertFalse((yield mailbox.irq))
+            self.assertEqual((yield from self.read('STATUS')), 0b10)
+
+            # Routing the other bit raises irq until it is cleared too
+            yield from self.write('CTRL', 0b11)
+            yield
+            self.assertTrue((yield mailbox.irq))
+            yield from self.write('STATUS', 0b10)
+            yield
+            self.assertFalse((yield mailbox.irq))
+            self.assertEqual((yield from self.read('STATUS')), 0)
+
+        simulate(self.m, [pl, ps])
+
+    def test_ring_full(self):
+        mailbox = self.mailbox
+
+        def process():
+            # The PS hasn't read anything, the PL can fill the whole ring
+            yield mailbox.sink.TVALID.eq(1)
+            yield mailbox.sink.TLAST.eq(1)
+            accepted = 0
+            for _ in range(2 * mailbox.depth):
+                yield
+                accepted += (yield mailbox.sink.TREADY)
+            self.assertEqual(accepted, mailbox.depth)
+            self.assertEqual((yield from self.read('TO_PS_HEAD')), mailbox.depth)
+            # Reading 4 words makes room for 4 more
+            yield from self.write('TO_PS_TAIL', 4)
+            for _ in range(16):
+                yield
+            self.assertFalse((yield mailbox.sink.TREADY))
+            self.assertEqual((yield from self.read('TO_PS_HEAD')), mailbox.depth + 4)
+
+        simulate(self.m, [process])
+
+    def test_pointer_wrap(self):
+        mailbox = self.mailbox
+        depth = mailbox.depth
+        # Messages of 1 to 3 words, then single words so that some message
+        # ends right before the pointers wrap around 2 * depth
+        lengths = [n % 3 + 1 for n in range(10)] + [1] * 50
+        messages = [[100 * n + i for i in range(length)] for n, length in enumerate(lengths)]
+        received = []
+
+        def pl():
+            yield mailbox.source.TREADY.eq(1)
+            while len(received) < sum(len(msg) for msg in messages):
+                yield
+                if (yield mailbox.source.TVALID):
+                    received.append(((yield mailbox.source.TDATA),
+                                     (yield mailbox.source.TLAST)))
+
+        def ps():
+            head = 0
+            for msg in messages:
+                for word in msg:
+                    yield from self.write('TO_PL_RING', word, 4 * (head % depth))
+                    head = (head + 1) % (2 * depth)
+                yield from self.write('TO_PL_HEAD', head)
+                while (yield from self.read('TO_PL_TAIL')) != head:
+                    pass
+
+        simulate(self.m, [pl, ps])
+        self.assertEqual(received, [
+            (word, int(i == len(msg) - 1)) for msg in messages for i, word in enumerate(msg)
+        ])
+
+
+class WideMailboxTestCase(unittest.TestCase):
+    def check_bursts(self, data_w):
+        axi = get_axi_record('axi', data_w=data_w, id_w=4)
+        m = Module()
+        m.submodules.mailbox = mailbox = Mailbox(axi, depth=16)
+        regs = mailbox.get_register_map()
+        lanes = data_w // 32
+        words = [0x1000 + i for i in range(12)]
+        received = []
+
+        def pack(values):
+            return [sum(v << (32 * i) for i, v in enumerate(values[n:n + lanes]))
+                    for n in range(0, len(values), lanes)]
+
+        def unpack(beats):
+            return [beat >> (32 * i) & 0xffffffff for beat in beats for i in range(lanes)]
+
+        def pl():
+            yield mailbox.source.TREADY.eq(1)
+            while len(received) < len(words):
+                yield
+                if (yield mailbox.source.TVALID):
+                    received.append((yield mailbox.source.TDATA))
+            yield mailbox.source.TREADY.eq(0)
+
+            for i, word in enumerate(words):
+                yield mailbox.sink.TDATA.eq(word + 0x100)
+                yield mailbox.sink.TLAST.eq(i == len(words) - 1)
+                yield mailbox.sink.TVALID.eq(1)
+                while True:
+                    yield
+                    if (yield mailbox.sink.TREADY):
+                        break
+            yield mailbox.sink.TVALID.eq(0)
+
+        def ps():
+            # Fill the ring, then rewrite the even lanes and the odd lanes
+            even = sum(0xf << (8 * i) for i in range(lanes // 2))
+            yield from axi_write(axi, regs['TO_PL_RING'], pack([0xdead] * len(words)))
+            yield from axi_write(axi, regs['TO_PL_RING'], pack(words), strb=even)
+            yield from axi_write(axi, regs['TO_PL_RING'], pack(words), strb=even << 4)
+            yield from axi_write(axi, regs['TO_PL_HEAD'], [len(words)], strb=0xf)
+
+            # The four pointers come back in one burst
+            pointers = None
+            while pointers != [len(words)] * 3 + [0]:
+                beats = yield from axi_read(axi, regs['TO_PL_HEAD'], 4 // lanes)
+                pointers = unpack([b[0] for b in beats])
+            beats = yield from axi_read(axi, regs['TO_PS_RING'], len(words) // lanes)
+            self.assertEqual(unpack([b[0] for b in beats]), [w + 0x100 for w in words])
+
+            # A burst over the registers writes every lane
+            self.assertTrue((yield mailbox.irq))
+            n = len(words)
+            yield from axi_write(axi, regs['TO_PL_HEAD'], pack([n, 0, 0, n, 3, 3, 0, 0]))
+            beats = yield from axi_read(axi, regs['TO_PL_HEAD'], 8 // lanes)
+            self.assertEqual(unpack([b[0] for b in beats])[:6], [n, n, n, n, 3, 0])
+            self.assertFalse((yield mailbox.irq))
+
+        simulate(m, [pl, ps])
+        self.assertEqual(received, words)
+
+    def test_bursts_64(self):
+        self.check_bursts(64)
+
+    def test_bursts_128(self):
+        self.check_bursts(128)
@@ -0,0 +1,176 @@
+import random
+import unittest
+
+from amaranth import Module
+from amaranth.sim import Passive
+
+from amaranth_zynq.axi import AxiPerfMonitor, AxiRegisterBank, get_axi_record
+
+from .utils import simulate, axi_write, axi_read, AxiMemoryModel
+
+
+class AxiPerfMonitorTestCase(unittest.TestCase):
+    # (address, beats, id, size) of the monitored bursts
+    READS = [(0x100, 4, 1, 3), (0x200, 1, 2, 3), (0x300, 16, 3, 3),
+             (0x1000, 8, 1, 2), (0x1800, 2, 4, 3)]
+    WRITES = [(0x2000, 4, 5, 0xff), (0x2100, 1, 6, 0x0f),
+              (0x2200, 16, 7, 0xff), (0x2400, 3, 5, 0x81)]
+
+    def setUp(self):
+        self.axi = get_axi_record('axi', data_w=64, id_w=6)
+        self.regs_axi = get_axi_record('regs', data_w=32, id_w=4)
+        self.m = Module()
+        self.m.submodules.bank = bank = AxiRegisterBank(self.regs_axi)
+        self.m.submodules.monitor = self.monitor = AxiPerfMonitor(
+            self.axi, bank, hist_bins=4)
+        self.regs = self.monitor.get_register_map()
+        self.model = AxiMemoryModel(self.axi, 0x4000, ready=0.7)
+        self.rnd = random.Random(1)
+
+    def read(self, name):
+        beats = yield from axi_read(self.regs_axi, self.regs[name], 1)
+        return beats[0][0]
+
+    def write(self, name, value):
+        yield from axi_write(self.regs_axi, self.regs[name], [value])
+
+    def read_burst(self, addr, n, id, size):
+        # Like axi_read, but RREADY is dropped at random to stall R
+        axi = self.axi
+        yield axi.ARADDR.eq(addr)
+        yield axi.ARID.eq(id)
+        yield axi.ARLEN.eq(n - 1)
+        yield axi.ARSIZE.eq(size)
+        yield axi.ARBURST.eq(1)
+        yield axi.ARVALID.eq(1)
+        while True:
+            yield
+            if (yield axi.ARREADY):
+                break
+        yield axi.ARVALID.eq(0)
+        while True:
+            ready = self.rnd.random() < 0.6
+            yield axi.RREADY.eq(ready)
+            yield
+            if ready and (yield axi.RVALID) and (yield axi.RLAST):
+                break
+        yield axi.RREADY.eq(0)
+
+    def write_burst(self, addr, n, id, strb):
+        # Like axi_write, but BREADY is dropped at random to stall B
+        axi = self.axi
+        yield axi.AWADDR.eq(addr)
+        yield axi.AWID.eq(id)
+        yield axi.AWLEN.eq(n - 1)
+        yield axi.AWSIZE.eq(3)
+        yield axi.AWBURST.eq(1)
+        yield axi.AWVALID.eq(1)
+        while True:
+            yield
+            if (yield axi.AWREADY):
+                break
+        yield axi.AWVALID.eq(0)
+        for i in range(n):
+            yield axi.WDATA.eq(i)
+            yield axi.WSTRB.eq(strb)
+            yield axi.WLAST.eq(i == n - 1)
+            yield axi.WVALID.eq(1)
+            while True:
+                yield
+                if (yield axi.WREADY):
+                    break
+        yield axi.WVALID.eq(0)
+        while True:
+            ready = self.rnd.random() < 0.6
+            yield axi.BREADY.eq(ready)
+            yield
+            if ready and (yield axi.BVALID):
+                break
+        yield axi.BREADY.eq(0)
+
+    def test_counters(self):
+        axi = self.axi
+        observed = {ch: 0 for ch in ['AR', 'R', 'AW', 'W', 'B']}
+        latencies = {'RD': [], 'WR': []}
+
+        def throttle():
+            # The memory model always accepts addresses, stall them too
+            rnd = random.Random(2)
+            yield Passive()
+            while True:
+                yield axi.ARREADY.eq(rnd.random() < 0.5)
+                yield axi.AWREADY.eq(rnd.random() < 0.5)
+                yield
+
+        def observer():
+            # Counts stalls and latencies cycle by cycle, as seen on the bus
+            starts = {'RD': {}, 'WR': {}}
+            cycle = 0
+            yield Passive()
+            while True:
+                yield
+                cycle += 1
+                valid, ready = {}, {}
+                for ch in observed:
+                    valid[ch] = yield axi[ch + 'VALID']
+                    ready[ch] = yield axi[ch + 'READY']
+                    observed[ch] += valid[ch] and not ready[ch]
+                if valid['AR'] and ready['AR']:
+                    starts['RD'].setdefault((yield axi.ARID), []).append(cycle)
+                if valid['AW'] and ready['AW']:
+                    starts['WR'].setdefault((yield axi.AWID), []).append(cycle)
+                if valid['R'] and ready['R'] and (yield axi.RLAST):
+                    latencies['RD'].append(cycle - starts['RD'][(yield axi.RID)].pop(0))
+                if valid['B'] and ready['B']:
+                    latencies['WR'].append(cycle - starts['WR'][(yield axi.BID)].pop(0))
+
+        def process():
+            for addr, n, id, size in self.READS:
+                yield from self.read_burst(addr, n, id, size)
+            for addr, n, id, strb in self.WRITES:
+                yield from self.write_burst(addr, n, id, strb)
+            for _ in range(4):
+                yield
+
+            self.assertEqual((yield from self.read('RD_BURSTS')), len(self.READS))
+            self.assertEqual((yield from self.read('RD_BEATS')),
+                             sum(n for _, n, _, _ in self.READS))
+            self.assertEqual((yield from self.read('RD_BYTES_LO')),
+                             sum(n << size for _, n, _, size in self.READS))
+            self.assertEqual((yield from self.read('RD_BYTES_HI')), 0)
+            self.assertEqual((yield from self.read('WR_BURSTS')), len(self.WRITES))
+            self.assertEqual((yield from self.read('WR_BEATS')),
+                             sum(n for _, n, _, _ in self.WRITES))
+            self.assertEqual((yield from self.read('WR_BYTES_LO')),
+                             sum(n * bin(strb).count('1') for _, n, _, strb in self.WRITES))
+
+            for ch, stalls in observed.items():
+                self.assertGreater(stalls, 0, ch)
+                self.assertEqual((yield from self.read(ch + '_STALLS')), stalls, ch)
+
+            for d, lats in latencies.items():
+                self.assertEqual(len(lats), len(self.READS if d == 'RD' else self.WRITES))
+                self.assertEqual((yield from self.read(d + '_LAT_COUNT')), len(lats))
+                self.assertEqual((yield from self.read(d + '_LAT_MIN')), min(lats))
+                self.assertEqual((yield from self.read(d + '_LAT_MAX')), max(lats))
+                self.assertEqual((yield from self.read(d + '_LAT_SUM_LO')), sum(lats))
+                hist = [0] * 4
+                for lat in lats:
+                    hist[min(max(lat.bit_length() - 1, 0), 3)] += 1
+                # Short and long bursts land in different bins
+                self.assertGreater(len([n for n in hist if n]), 1)
+                for i, count in enumerate(hist):
+                    self.assertEqual((yield from self.read('{}_LAT_HIST{}'.format(d, i))), count)
+
+            # Clearing restores the reset values, disabling freezes the counters
+            self.assertGreater((yield from self.read('CYCLES_LO')), 100)
+            yield from self.write('CTRL', 0b10)
+            self.assertEqual((yield from self.read('RD_LAT_MIN')), 2**32 - 1)
+            for name in ['CYCLES_LO', 'RD_BEATS', 'W_STALLS', 'WR_LAT_MAX', 'WR_LAT_HIST3']:
+                self.assertEqual((yield from self.read(name)), 0, name)
+            yield from self.write('CTRL', 0b11)
+            yield from self.read_burst(0x100, 2, 0, 3)
+            self.assertEqual((yield from self.read('RD_BEATS')), 2)
+            self.assertGreater((yield from self.read('CYCLES_LO')), 0)
+
+        simulate(self.m, [process, observer, throttle, self.model.process])
@@ -0,0 +1,41 @@
+import unittest
+
+from amaranth import Fragment
+
+from amaranth_zynq.ps7 import ZynqPS
+from amaranth_zynq.ps8 import PsZynqMP
+
+from .utils import Zynq7020Platform, Zu3egPlatform
+
+
+class PsFilesTestCase(unittest.TestCase):
+    def check_two_designs(self, ps_cls, platform):
+        # Two designs with different clocks elaborated on one platform,
+        # as BuildRunner jobs sharing a platform do
+        ps = ps_cls()
+        ps.get_clock_signal(0, 100e6)
+        ps.get_clock_signal(1, 200e6)
+        Fragment.get(ps, platform)
+        xdc = platform.extra_files['ps_clocks.xdc']
+        tcl = platform.extra_files['ps_config.tcl']
+        self.assertIn('pl_clk1_unbuf', xdc)
+
+        ps = ps_cls()
+        ps.get_clock_signal(0, 50e6)
+        ps.get_clock_signal(2, 25e6)
+        Fragment.get(ps, platform)
+        self.assertNotEqual(platform.extra_files['ps_clocks.xdc'], xdc)
+        self.assertIn('pl_clk2_unbuf', platform.extra_files['ps_clocks.xdc'])
+        self.assertNotIn('pl_clk1_unbuf', platform.extra_files['ps_clocks.xdc'])
+        self.assertNotEqual(platform.extra_files['ps_config.tcl'], tcl)
+
+        # A design without PS clocks doesn't keep the stale files
+        Fragment.get(ps_cls(), platform)
+        for name in ['ps_clocks.xdc', 'ps_config.tcl', 'ps_config.h']:
+            self.assertNotIn(name, platform.extra_files)
+
+    def test_ps7(self):
+        self.check_two_designs(ZynqPS, Zynq7020Platform())
+
+    def test_ps8(self):
+        self.check_two_designs(PsZynqMP, Zu3egPlatform())
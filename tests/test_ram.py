@@ -0,0 +1,141 @@
+import random
+import re
+import unittest
+
+from amaranth import Module, ClockDomain
+from amaranth.back import rtlil
+
+from amaranth_zynq.axi import AxiRam, get_axi_record
+
+from .utils import simulate, axi_write, axi_read, burst_addrs
+
+
+class AxiRamTestCase(unittest.TestCase):
+    def check_bursts(self, data_w, domain='sync'):
+        axi = get_axi_record('axi', data_w=data_w, id_w=4, addr_w=40)
+        m = Module()
+        if domain != 'sync':
+            m.domains += ClockDomain(domain)
+        m.submodules.ram = AxiRam(axi, 8192, domain=domain)
+        nbytes = data_w // 8
+        model = bytearray(8192)
+        rnd = random.Random(data_w)
+
+        def process():
+            for t in range(40):
+                burst = rnd.choice([0, 1, 2])
+                size = rnd.randint(0, (nbytes - 1).bit_length())
+                n = rnd.choice([2, 4, 8, 16]) if burst == 2 else rnd.randint(1, 16)
+                addr = rnd.randrange(0, 4096 - (32 << size), 1 << size) + rnd.choice([0, 4096])
+                data = [rnd.getrandbits(data_w) for _ in range(n)]
+                strb = [rnd.getrandbits(nbytes) for _ in range(n)]
+                resp = yield from axi_write(axi, addr, data, id=t % 16, size=size,
+                                            burst=burst, strb=strb)
+                self.assertEqual(resp, (t % 16, 0))
+                for beat, value, mask in zip(burst_addrs(addr, size, burst, n), data, strb):
+                    base = beat // nbytes * nbytes
+                    for i in range(nbytes):
+                        if mask >> i & 1:
+                            model[base + i] = value >> (8 * i) & 0xff
+
+                addr = rnd.randrange(0, 8192 - 16 * nbytes, nbytes)
+                beats = yield from axi_read(axi, addr, 16, id=t % 16)
+                expected = [
+                    int.from_bytes(model[a:a + nbytes], 'little')
+                    for a in range(addr, addr + 16 * nbytes, nbytes)
+                ]
+                self.assertEqual([b[0] for b in beats], expected)
+                self.assertEqual({b[1] for b in beats}, {t % 16})
+                self.assertEqual([b[2] for b in beats], [0] * 15 + [1])
+
+            addr = 3 * nbytes
+            beats = yield from axi_read(axi, addr, 4, burst=2)
+            expected = [
+                int.from_bytes(model[a:a + nbytes], 'little')
+                for a in burst_addrs(addr, (nbytes - 1).bit_length(), 2, 4)
+            ]
+            self.assertEqual([b[0] for b in beats], expected)
+
+        simulate(m, [(domain, process)], clocks={domain: 1e-8})
+
+    def test_bursts_32(self):
+        self.check_bursts(32)
+
+    def test_bursts_128(self):
+        self.check_bursts(128)
+
+    def test_domain(self):
+        self.check_bursts(64, domain='fast')
+
+    def test_outstanding_reads(self):
+        axi = get_axi_record('axi', data_w=128, id_w=4)
+        m = Module()
+        m.submodules.ram = ram = AxiRam(axi, 4096, init=range(256))
+        cycles = []
+
+        def addresses():
+            for i in range(4):
+                yield axi.ARADDR.eq(256 * i)
+                yield axi.ARID.eq(i)
+                yield axi.ARLEN.eq(15)
+                yield axi.ARSIZE.eq(4)
+                yield axi.ARBURST.eq(1)
+                yield axi.ARVALID.eq(1)
+                while True:
+                    yield
+                    if (yield axi.ARREADY):
+                        break
+            yield axi.ARVALID.eq(0)
+
+        def data():
+            yield axi.RREADY.eq(1)
+            beats = []
+            cycle = 0
+            while len(beats) < 64:
+                yield
+                cycle += 1
+                if (yield axi.RVALID):
+                    beats.append(((yield axi.RDATA), (yield axi.RID)))
+                    cycles.append(cycle)
+            self.assertEqual([b[0] for b in beats], list(range(64)))
+            self.assertEqual([b[1] for b in beats], [i // 16 for i in range(64)])
+
+        simulate(m, [addresses, data])
+        self.assertEqual(cycles[-1] - cycles[0], 63)
+
+    def test_pl_ports(self):
+        axi = get_axi_record('axi', data_w=64, id_w=4)
+        m = Module()
+        m.submodules.ram = ram = AxiRam(axi, 4096, pl_write=True)
+
+        def pl():
+            # PL writes every other cycle while the AXI side streams
+            for i in range(64):
+                yield ram.write_port.addr.eq(256 + i)
+                yield ram.write_port.data.eq(0x1000 + i)
+                yield ram.write_port.en.eq(0xff if i % 2 == 0 else 0)
+                yield
+            yield ram.write_port.en.eq(0)
+
+        def bus():
+            yield from axi_write(axi, 0, list(range(32)))
+            beats = yield from axi_read(axi, 0, 32)
+            self.assertEqual([b[0] for b in beats], list(range(32)))
+            for _ in range(64):
+                yield
+            yield ram.port.addr.eq(256 + 10)
+            yield
+            yield
+            self.assertEqual((yield ram.port.data), 0x1000 + 10)
+            beats = yield from axi_read(axi, 256 * 8, 4)
+            self.assertEqual([b[0] for b in beats], [0x1000, 0, 0x1002, 0])
+
+        simulate(m, [pl, bus])
+
+    def test_two_ports(self):
+        for pl_write in [False, True]:
+            axi = get_axi_record('axi', data_w=64, id_w=4)
+            text = rtlil.convert(AxiRam(axi, 4096, uram=True, pl_write=pl_write), ports=[])
+            cells = re.findall(r'cell \$(memrd|memwr) .*\n((?:    .*\n)*)', text)
+            ports = [kind for kind, body in cells if '\\WIDTH 64\n' in body]
+            self.assertEqual(sorted(ports), ['memrd', 'memrd', 'memwr'])
@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from amaranth import Elaboratable, Module, Signal
+
+from amaranth_zynq.cache import BuildCache
+from amaranth_zynq.runner import BuildRunner
+
+from .utils import Zu3egPlatform, make_toolchain, get_toolchain_runs
+
+
+class BrokenDesign(Elaboratable):
+    def elaborate(self, platform):
+        raise ValueError('broken design')
+
+
+def get_design(value=1):
+    m = Module()
+    out = Signal(8)
+    m.d.comb += out.eq(value)
+    return m
+
+
+class BuildRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.bin_dir = make_toolchain(self.root)
+        env = {'PATH': self.bin_dir + os.pathsep + os.environ.get('PATH', '')}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop('XILINX_VIVADO', None)
+        os.environ.pop('VIVADO', None)
+
+    def get_runner(self, **kwargs):
+        return BuildRunner(os.path.join(self.root, 'build'), **kwargs)
+
+    def read(self, result, name):
+        with open(os.path.join(result.build_dir, name)) as f:
+            return f.read()
+
+    def test_max_workers(self):
+        os.environ['FAKE_VIVADO_DELAY'] = '0.5'
+        runner = self.get_runner(max_workers=2)
+        for i in range(4):
+            runner.add(Zu3egPlatform(), get_design(i))
+        results = runner.run()
+        self.assertTrue(all(result.ok for result in results))
+
+        running = max_running = 0
+        events = sorted((float(t), kind == 'start') for kind, t in
+                        (e.split() for e in get_toolchain_runs(self.bin_dir, 'events')))
+        self.assertEqual(len(events), 8)
+        for _, start in events:
+            running += 1 if start else -1
+            max_running = max(max_running, running)
+        self.assertEqual(max_running, 2)
+
+    def test_max_threads(self):
+        runner = self.get_runner(max_threads=4)
+        default = runner.add(Zu3egPlatform(), get_design())
+        job = runner.add(Zu3egPlatform(), get_design(), max_threads=2,
+                         overrides={'script_after_read': 'puts after_read'})
+        results = {result.job: result for result in runner.run()}
+
+        self.assertIn('set_param general.maxThreads 4', self.read(results[default], 'top.tcl'))
+        tcl = self.read(results[job], 'top.tcl')
+        self.assertIn('set_param general.maxThreads 2\nputs after_read', tcl)
+        self.assertNotIn('general.maxThreads 4', tcl)
+        plain = self.get_runner()
+        self.assertEqual(plain._get_overrides(plain.add(Zu3egPlatform(), get_design())), {})
+
+    def test_memory_limit(self):
+        limit = 2 * 1024 ** 3
+        runner = self.get_runner(memory_limit=limit)
+        default = runner.add(Zu3egPlatform(), get_design())
+        job = runner.add(Zu3egPlatform(), get_design(), memory_limit=limit // 2)
+        self.assertEqual(runner._get_command(default, 'build_top.sh'),
+                         ['prlimit', '--as={}'.format(limit), '--', 'sh', 'build_top.sh'])
+        self.assertEqual(self.get_runner(memory_limit=limit, cgroup=True)
+                         ._get_command(job, 'build_top.sh'),
+                         ['systemd-run', '--user', '--scope', '--quiet',
+                          '-p', 'MemoryMax={}'.format(limit // 2), '-p', 'MemorySwapMax=0',
+                          'sh', 'build_top.sh'])
+        self.assertEqual(self.get_runner()._get_command(default, 'build_top.sh'),
+                         ['sh', 'build_top.sh'])
+
+        if shutil.which('prlimit') is None:
+            self.skipTest('prlimit is not available')
+        results = {result.job: result for result in runner.run()}
+        # ulimit -v is in KiB
+        self.assertEqual(self.read(results[default], 'top_ulimit').strip(),
+                         str(limit // 1024))
+        self.assertEqual(self.read(results[job], 'top_ulimit').strip(),
+                         str(limit // 2048))
+
+    def test_results(self):
+        runner = self.get_runner(max_workers=2)
+        # One platform shared by several jobs
+        platform = Zu3egPlatform()
+        good = runner.add(platform, get_design())
+        failed = runner.add(platform, get_design(2),
+                            overrides={'script_after_read': '# FAIL_BUILD'})
+        broken = runner.add(platform, BrokenDesign())
+        other = runner.add(platform, get_design(3), name='other')
+        results = {result.job: result for result in runner.run()}
+        self.assertEqual(len(set(result.build_dir for result in results.values())), 4)
+
+        for job, name in [(good, 'top'), (other, 'other')]:
+            result = results[job]
+            self.assertTrue(result.ok)
+            self.assertEqual(result.returncode, 0)
+            self.assertFalse(result.cached)
+            self.assertGreater(result.elapsed, 0)
+            self.assertEqual(sorted(result.artifacts), sorted([
+                '{}.bit'.format(name), '{}.bin'.format(name),
+                '{}_bootgen.bin'.format(name), '{}_timing.rpt'.format(name),
+            ]))
+            self.assertEqual(result.products.get('{}.bin'.format(name)),
+                             open(os.path.join(result.build_dir, '{}.bit'.format(name)),
+                                  'rb').read())
+            self.assertTrue(os.path.exists(result.log))
+        self.assertNotEqual(self.read(results[good], 'top.bit'),
+                            self.read(results[other], 'other.bit'))
+
+        result = results[failed]
+        self.assertFalse(result.ok)
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.artifacts, [])
+        self.assertTrue(os.path.exists(result.log))
+        self.assertEqual(self.read(result, 'top.log'), 'vivado failed\n')
+        with self.assertRaisesRegex(AssertionError, 'Build failed'):
+            result.products
+
+        result = results[broken]
+        self.assertFalse(result.ok)
+        self.assertIsInstance(result.error, ValueError)
+        self.assertIsNone(result.returncode)
+        self.assertEqual(len(get_toolchain_runs(self.bin_dir)), 3)
+
+    def test_cached(self):
+        platform = Zu3egPlatform()
+        platform.build_cache = BuildCache(os.path.join(self.root, 'cache'))
+        runner = self.get_runner()
+        runner.add(platform, get_design())
+        first, = runner.run()
+        self.assertFalse(first.cached)
+
+        runner = BuildRunner(os.path.join(self.root, 'again'))
+        runner.add(platform, get_design())
+        second, = runner.run()
+        self.assertTrue(second.ok)
+        self.assertTrue(second.cached)
+        self.assertIsNone(second.returncode)
+        self.assertEqual(sorted(second.artifacts), sorted(first.artifacts))
+        self.assertEqual(self.read(second, 'top.bit'), self.read(first, 'top.bit'))
+        self.assertEqual(len(get_toolchain_runs(self.bin_dir)), 1)
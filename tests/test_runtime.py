@@ -0,0 +1,120 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from amaranth_zynq.runtime import MAXI_WINDOWS, MaxiWindow, open_maxi
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class MaxiWindowTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, bytes(range(256)) * 64)
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def contents(self, offset, size):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def test_file_backed(self):
+        with MaxiWindow(0xA0000000, 0x1000, self.path) as window:
+            self.assertEqual(window.read(0), 0x03020100)
+            self.assertEqual(window.read(0xffc), 0xfffefdfc)
+            window.write(0x10, 0x12345678)
+        self.assertEqual(self.contents(0x10, 4), struct.pack('<I', 0x12345678))
+
+    def test_offset(self):
+        # Offsets that are not page aligned are mapped from the page below
+        with MaxiWindow(0xA0000000, 0x100, self.path, offset=0x1004) as window:
+            self.assertEqual(window.read(0), 0x07060504)
+            window.write(0xfc, 0xdeadbeef)
+        self.assertEqual(self.contents(0x1100, 4), struct.pack('<I', 0xdeadbeef))
+
+    def test_types(self):
+        with MaxiWindow(0, 0x100, self.path) as window:
+            window.write(0x00, 0xa5, 'u8')
+            window.write(0x02, -2, 'i16')
+            window.write(0x08, 2**64 - 1, 'u64')
+            window.write(0x10, -3, 'i64')
+            window.write(0x18, 1.5, 'f32')
+            window.write(0x20, -0.25, 'f64')
+            self.assertEqual(window.read(0x00, 'u8'), 0xa5)
+            self.assertEqual(window.read(0x02, 'u16'), 0xfffe)
+            self.assertEqual(window.read(0x02, 'i16'), -2)
+            self.assertEqual(window.read(0x08, 'i64'), -1)
+            self.assertEqual(window.read(0x10, 'i32'), -3)
+            self.assertEqual(window.read(0x18, 'f32'), 1.5)
+            self.assertEqual(window.read(0x20, 'f64'), -0.25)
+            self.assertEqual(window.read_block(0x40, 4), [
+                struct.unpack_from('<I', bytes(range(256)), a)[0]
+                for a in range(0x40, 0x50, 4)
+            ])
+
+    def test_bounds(self):
+        with MaxiWindow(0, 0x100, self.path) as window:
+            for offset, typ in [(0x100, 'u32'), (0x100, 'u8'), (-4, 'u32'), (0x100, 'u64')]:
+                with self.assertRaisesRegex(AssertionError, 'outside the window'):
+                    window.read(offset, typ)
+            with self.assertRaisesRegex(AssertionError, 'Unaligned u32 access at 0x2'):
+                window.write(2, 0)
+            with self.assertRaises(KeyError):
+                window.read(0, 'u24')
+
+    def test_partial_items(self):
+        # The window size is not a multiple of the wider types
+        with MaxiWindow(0, 0x106, self.path) as window:
+            self.assertEqual(window.read(0x104, 'u16'), 0x0504)
+            self.assertEqual(window.read(0x100, 'u32'), 0x03020100)
+            self.assertEqual(window.read(0xf8, 'u64'), 0xfffefdfcfbfaf9f8)
+            with self.assertRaisesRegex(AssertionError, 'outside the window'):
+                window.read(0x104, 'u32')
+            with self.assertRaisesRegex(AssertionError, 'outside the window'):
+                window.read(0x100, 'u64')
+
+    def test_registers(self):
+        register_map = {'CTRL': 0x0, 'STATUS': 0x4, 'LEN': 0xc, 'SIGNED': 0x10}
+        with MaxiWindow(0, 0x100, self.path) as window:
+            regs = window.registers(register_map, offset=0x20, types={'SIGNED': 'i32'})
+            regs.CTRL = 1
+            regs['LEN'] = 4096
+            regs.SIGNED = -1
+            self.assertEqual(window.read(0x20), 1)
+            self.assertEqual(window.read(0x2c), 4096)
+            self.assertEqual(regs.STATUS, 0x27262524)
+            self.assertEqual(regs['SIGNED'], -1)
+            self.assertEqual(regs.read_all(), {'CTRL': 1, 'STATUS': 0x27262524, 'LEN': 4096})
+            self.assertEqual(sorted(dir(regs)), sorted(register_map))
+            with self.assertRaises(AttributeError):
+                regs.MISSING
+            with self.assertRaises(AttributeError):
+                regs.MISSING = 0
+
+    def test_open_maxi(self):
+        base, size = MAXI_WINDOWS['ps8']['maxigp2']
+        with open_maxi('maxigp2', size=0x100, offset=0x1000, path=self.path) as window:
+            self.assertEqual(window.base, base + 0x1000)
+            self.assertEqual(window.read(0), 0x03020100)
+        with self.assertRaisesRegex(AssertionError, 'maxigp0 window is 0x40000000 bytes'):
+            open_maxi('maxigp0', 'ps7', size=0x1000, offset=0x40000000, path=self.path)
+
+    @unittest.skipUnless(numpy, 'NumPy is not installed')
+    def test_array(self):
+        with MaxiWindow(0, 0x100, self.path) as window:
+            array = window.array(0x10, 4)
+            self.assertEqual(list(array), [
+                struct.unpack_from('<I', bytes(range(256)), a)[0]
+                for a in range(0x10, 0x20, 4)
+            ])
+            array[0] = 7
+            self.assertEqual(window.read(0x10), 7)
+            self.assertEqual(len(window.array(dtype='uint16')), 0x80)
+            del array
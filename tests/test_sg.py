@@ -0,0 +1,64 @@
+import unittest
+
+from amaranth import Module
+
+from amaranth_zynq.axi import AxiRegisterBank, AxiSgDma, DESC_BYTES, get_axi_record
+
+from .utils import simulate, axi_write, axi_read, AxiMemoryModel
+
+RING = 0x1000
+WB = 0x2000
+BUFFERS = 0x4000
+
+
+class AxiSgDmaTestCase(unittest.TestCase):
+    def check_writeback(self, data_w):
+        maxi = get_axi_record('maxi', data_w=32, id_w=4)
+        saxi = get_axi_record('saxi', data_w=data_w, id_w=6)
+        m = Module()
+        m.submodules.bank = bank = AxiRegisterBank(maxi)
+        m.submodules.dma = dma = AxiSgDma(saxi, bank, s2mm=False)
+        regs = dma.get_register_map()
+        model = AxiMemoryModel(saxi, 0x8000, ready=0.5)
+        model.data[WB:WB + 64] = b'\xaa' * 64
+        for i in range(4):
+            desc = RING + i * DESC_BYTES
+            model.data[desc:desc + 16] = (
+                (BUFFERS + 0x100 * i).to_bytes(8, 'little') + (64).to_bytes(4, 'little') +
+                bytes(4))
+        beats = []
+
+        def stream():
+            yield dma.mm2s.TREADY.eq(1)
+            while len(beats) < 4 * 64 * 8 // data_w:
+                yield
+                if (yield dma.mm2s.TVALID):
+                    beats.append((yield dma.mm2s.TDATA))
+
+        def software():
+            for name, value in [('RING', RING), ('WB', WB), ('RING_SIZE', 8),
+                                ('COAL_COUNT', 4), ('COAL_TIMEOUT', 1000),
+                                ('CTRL', 1), ('TAIL', 4)]:
+                yield from axi_write(maxi, regs['MM2S_' + name], [value])
+            while True:
+                status, = yield from axi_read(maxi, regs['MM2S_STATUS'], 1)
+                if status[0] & 2:
+                    break
+
+        simulate(m, [stream, software, model.process])
+        self.assertEqual(model.data[WB:WB + 8], (4).to_bytes(8, 'little'))
+        self.assertEqual(model.data[WB + 8:WB + 64], b'\xaa' * 56)
+        wb = [(addr, strb) for addr, strb in model.writes if addr >= WB]
+        self.assertEqual({strb for addr, strb in wb}, {(1 << min(data_w // 8, 8)) - 1})
+
+    def test_writeback_32(self):
+        self.check_writeback(32)
+
+    def test_writeback_128(self):
+        self.check_writeback(128)
+
+    def test_fetch_batch(self):
+        saxi = get_axi_record('saxi', data_w=64, id_w=6)
+        bank = AxiRegisterBank(get_axi_record('maxi', data_w=32))
+        with self.assertRaisesRegex(ValueError, 'fetch_batch must be a power of two, not 3'):
+            AxiSgDma(saxi, bank, fetch_batch=3)
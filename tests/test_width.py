@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from amaranth import Module
+
+from amaranth_zynq.axi import AxiWidthConverter, get_axi_record
+
+from .utils import simulate, axi_write, axi_read, burst_addrs, AxiMemoryModel
+
+
+class AxiWidthConverterTestCase(unittest.TestCase):
+    def check_conversion(self, user_w, port_w):
+        port = get_axi_record('port', data_w=port_w, id_w=6)
+        m = Module()
+        m.submodules.conv = conv = AxiWidthConverter(port, user_w)
+        user = conv.user
+        model = AxiMemoryModel(port, 8192, seed=user_w, reorder=True, ready=0.5)
+        expected = bytearray(8192)
+        nbytes = user_w // 8
+        rnd = random.Random(port_w)
+
+        def process():
+            for t in range(30):
+                # FIXED and WRAP bursts can't be wider than the port
+                burst = rnd.choice([1, 1, 0, 2])
+                full = (nbytes - 1).bit_length()
+                if burst != 1:
+                    size = rnd.randint(0, (min(user_w, port_w) // 8 - 1).bit_length())
+                else:
+                    size = rnd.choice([full, rnd.randint(0, full)])
+                n = rnd.choice([2, 4, 8, 16]) if burst == 2 else rnd.randint(1, 16)
+                addr = rnd.randrange(0, 4096 - (16 << size), 1 << size) + rnd.choice([0, 4096])
+                if burst == 2:
+                    addr &= ~((n << size) - 1)
+                beats = burst_addrs(addr, size, burst, n)
+                data = [rnd.getrandbits(user_w) for _ in range(n)]
+                # Partial strobes, within the byte lanes of each beat
+                strb = [
+                    rnd.getrandbits(1 << size) << (beat % nbytes >> size << size)
+                    for beat in beats
+                ]
+                resp = yield from axi_write(user, addr, data, id=t % 8, size=size,
+                                            burst=burst, strb=strb)
+                self.assertEqual(resp, (t % 8, 0))
+                for beat, value, mask in zip(beats, data, strb):
+                    base = beat // nbytes * nbytes
+                    for i in range(nbytes):
+                        if mask >> i & 1:
+                            expected[base + i] = value >> (8 * i) & 0xff
+                self.assertEqual(model.data, expected)
+
+                addr = rnd.randrange(0, 8192 - 16 * nbytes, nbytes)
+                beats = yield from axi_read(user, addr, 16, id=t % 8)
+                self.assertEqual([b[0] for b in beats], [
+                    int.from_bytes(expected[a:a + nbytes], 'little')
+                    for a in range(addr, addr + 16 * nbytes, nbytes)
+                ])
+                self.assertEqual({b[1] for b in beats}, {t % 8})
+                self.assertEqual([b[2] for b in beats], [0] * 15 + [1])
+
+        simulate(m, [process, model.process])
+        return model
+
+    def test_upsize(self):
+        model = self.check_conversion(32, 128)
+        # 16 beat reads of 32 bits are packed into 4 port beats
+        self.assertIn(4, [n for addr, n in model.reads])
+
+    def test_downsize(self):
+        model = self.check_conversion(128, 32)
+        self.assertIn(64, [n for addr, n in model.reads])
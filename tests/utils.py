@@ -0,0 +1,285 @@
+import os
+import random
+
+from amaranth.sim import Simulator, Passive
+
+from amaranth_zynq.ps7 import ZynqPL
+from amaranth_zynq.ps8 import ZynqMPPlatform
+
+
+def simulate(fragment, processes, clocks={'sync': 1e-8}, timeout=None):
+    '''
+        Runs ``processes`` (generator functions, or ``(domain, function)``
+        pairs) against ``fragment`` until every non passive one returns.
+    '''
+    sim = Simulator(fragment)
+    for domain, period in clocks.items():
+        sim.add_clock(period, domain=domain)
+    for process in processes:
+        if isinstance(process, tuple):
+            domain, process = process
+        else:
+            domain = 'sync'
+        sim.add_sync_process(process, domain=domain)
+    if timeout is None:
+        sim.run()
+    else:
+        sim.run_until(timeout, run_passive=True)
+
+
+def axi_write(axi, addr, data, id=0, size=None, burst=1, strb=None):
+    '''
+        One AXI write burst from a sync process, returns ``(BID, BRESP)``.
+        ``strb`` is a single value or one value per beat.
+    '''
+    if size is None:
+        size = (len(axi.WDATA) // 8 - 1).bit_length()
+    if strb is None:
+        strb = (1 << len(axi.WSTRB)) - 1
+    if isinstance(strb, int):
+        strb = [strb] * len(data)
+    yield axi.AWADDR.eq(addr)
+    yield axi.AWID.eq(id)
+    yield axi.AWLEN.eq(len(data) - 1)
+    yield axi.AWSIZE.eq(size)
+    yield axi.AWBURST.eq(burst)
+    yield axi.AWVALID.eq(1)
+    while True:
+        yield
+        if (yield axi.AWREADY):
+            break
+    yield axi.AWVALID.eq(0)
+    for i, (value, mask) in enumerate(zip(data, strb)):
+        yield axi.WDATA.eq(value)
+        yield axi.WSTRB.eq(mask)
+        yield axi.WLAST.eq(i == len(data) - 1)
+        yield axi.WVALID.eq(1)
+        while True:
+            yield
+            if (yield axi.WREADY):
+                break
+    yield axi.WVALID.eq(0)
+    yield axi.BREADY.eq(1)
+    while True:
+        yield
+        if (yield axi.BVALID):
+            break
+    resp = ((yield axi.BID), (yield axi.BRESP))
+    yield axi.BREADY.eq(0)
+    return resp
+
+
+def axi_read(axi, addr, n, id=0, size=None, burst=1):
+    '''
+        One AXI read burst of ``n`` beats from a sync process, returns a list
+        of ``(RDATA, RID, RLAST)``.
+    '''
+    if size is None:
+        size = (len(axi.RDATA) // 8 - 1).bit_length()
+    yield axi.ARADDR.eq(addr)
+    yield axi.ARID.eq(id)
+    yield axi.ARLEN.eq(n - 1)
+    yield axi.ARSIZE.eq(size)
+    yield axi.ARBURST.eq(burst)
+    yield axi.ARVALID.eq(1)
+    while True:
+        yield
+        if (yield axi.ARREADY):
+            break
+    yield axi.ARVALID.eq(0)
+    yield axi.RREADY.eq(1)
+    beats = []
+    while True:
+        yield
+        if (yield axi.RVALID):
+            beats.append(((yield axi.RDATA), (yield axi.RID), (yield axi.RLAST)))
+            if beats[-1][2]:
+                break
+    yield axi.RREADY.eq(0)
+    return beats
+
+
+def burst_addrs(addr, size, burst, n):
+    '''
+        Byte addresses of the ``n`` beats of a burst, per the AXI spec.
+    '''
+    nbytes = 1 << size
+    lower = addr // (nbytes * n) * (nbytes * n)
+    addrs = []
+    for _ in range(n):
+        addrs.append(addr)
+        if burst == 1:
+            addr = addr // nbytes * nbytes + nbytes
+        elif burst == 2:
+            addr = addr // nbytes * nbytes + nbytes
+            if addr >= lower + nbytes * n:
+                addr = lower
+    return addrs
+
+
+class AxiMemoryModel:
+    '''
+        AXI slave backed by a ``bytearray``, as a passive process. Any
+        number of bursts can be outstanding; with ``reorder=True`` read
+        bursts of different IDs are answered in random order and their
+        beats interleaved, as the AXI ordering rules allow, and write
+        responses of different IDs are returned out of order too.
+        ``ready`` is the probability of WREADY and of a read beat or write
+        response being offered in a given cycle. Written beats are recorded
+        in ``writes`` as ``(addr, strb)``, read and write bursts in ``reads``
+        and ``write_bursts`` as ``(addr, len)``.
+    '''
+    def __init__(self, axi, size, seed=0, reorder=False, ready=1.0):
+        self.axi = axi
+        self.data = bytearray(size)
+        self.rnd = random.Random(seed)
+        self.reorder = reorder
+        self.ready = ready
+        self.writes = []
+        self.reads = []
+        self.write_bursts = []
+
+    def _pick(self, pending):
+        # Only the oldest burst of each ID may be answered
+        heads = [p for i, p in enumerate(pending)
+                 if all(q['id'] != p['id'] for q in pending[:i])]
+        return self.rnd.choice(heads) if self.reorder else heads[0]
+
+    def _burst(self, prefix):
+        axi = self.axi
+        n = (yield axi[prefix + 'LEN']) + 1
+        addr = yield axi[prefix + 'ADDR']
+        return {
+            'id': (yield axi[prefix + 'ID']),
+            'addrs': burst_addrs(addr, (yield axi[prefix + 'SIZE']),
+                                 (yield axi[prefix + 'BURST']), n),
+        }
+
+    def process(self):
+        axi = self.axi
+        nbytes = len(axi.WDATA) // 8
+        reads, writes, responses = [], [], []
+        current = None
+        response = None
+        yield Passive()
+        yield axi.ARREADY.eq(1)
+        yield axi.AWREADY.eq(1)
+        while True:
+            yield
+            if (yield axi.ARVALID) and (yield axi.ARREADY):
+                burst = yield from self._burst('AR')
+                reads.append(burst)
+                self.reads.append((burst['addrs'][0], len(burst['addrs'])))
+            if (yield axi.AWVALID) and (yield axi.AWREADY):
+                burst = yield from self._burst('AW')
+                writes.append(burst)
+                self.write_bursts.append((burst['addrs'][0], len(burst['addrs'])))
+            if (yield axi.WVALID) and (yield axi.WREADY):
+                burst = writes[0]
+                addr = burst['addrs'].pop(0)
+                data = yield axi.WDATA
+                strb = yield axi.WSTRB
+                base = addr // nbytes * nbytes
+                for i in range(nbytes):
+                    if strb >> i & 1:
+                        self.data[base + i] = data >> (8 * i) & 0xff
+                self.writes.append((addr, strb))
+                assert (yield axi.WLAST) == (not burst['addrs'])
+                if not burst['addrs']:
+                    responses.append(writes.pop(0))
+            if (yield axi.RVALID) and (yield axi.RREADY):
+                current['addrs'].pop(0)
+                if not current['addrs']:
+                    reads.remove(current)
+                current = None
+            if (yield axi.BVALID) and (yield axi.BREADY):
+                responses.remove(response)
+                response = None
+
+            yield axi.WREADY.eq(self.rnd.random() < self.ready)
+            if response is None and responses and self.rnd.random() < self.ready:
+                response = self._pick(responses)
+                yield axi.BID.eq(response['id'])
+            yield axi.BVALID.eq(response is not None)
+            if current is None and reads and self.rnd.random() < self.ready:
+                current = self._pick(reads)
+            if current is not None:
+                addr = current['addrs'][0]
+                base = addr // nbytes * nbytes
+                yield axi.RDATA.eq(int.from_bytes(self.data[base:base + nbytes], 'little'))
+                yield axi.RID.eq(current['id'])
+                yield axi.RLAST.eq(len(current['addrs']) == 1)
+            yield axi.RVALID.eq(current is not None)
+
+
+class Zynq7020Platform(ZynqPL):
+    device = 'xc7z020'
+    package = 'clg400'
+    speed = '1'
+    resources = []
+    connectors = []
+
+
+class Zu3egPlatform(ZynqMPPlatform):
+    device = 'xczu3eg'
+    package = 'sfva625'
+    speed = '1'
+    grade = 'e'
+    resources = []
+    connectors = []
+
+
+FAKE_VIVADO = r'''#!/bin/sh
+echo "$PWD" >> "$(dirname "$0")/runs"
+for arg; do
+    case "$arg" in *.tcl) name="${arg%.tcl}";; esac
+done
+echo "start $(date +%s.%N)" >> "$(dirname "$0")/events"
+ulimit -v > "${name}_ulimit"
+sleep "${FAKE_VIVADO_DELAY:-0}"
+echo "end $(date +%s.%N)" >> "$(dirname "$0")/events"
+if grep -q FAIL_BUILD "$name.tcl"; then
+    echo "vivado failed" > "$name.log"
+    exit 1
+fi
+cksum < "$name.v" > "$name.bit"
+cp "$name.bit" "$name.bin"
+echo "timing met" > "${name}_timing.rpt"
+echo "vivado log" > "$name.log"
+'''
+
+FAKE_BOOTGEN = r'''#!/bin/sh
+while [ $# -gt 0 ]; do
+    [ "$1" = -o ] && out="$2"
+    shift
+done
+echo "boot image" > "$out"
+'''
+
+
+def make_toolchain(root, version='2023.1'):
+    '''
+        Stand-ins for ``vivado`` and ``bootgen`` laid out like a Xilinx
+        install, ``<root>/Vivado/<version>/bin``. They write the products of
+        a build from its files and log the directory of every run to
+        ``runs`` next to them, and its start and end times to ``events``.
+        A run sleeps for ``$FAKE_VIVADO_DELAY`` seconds, writes its
+        ``ulimit -v`` to ``<name>_ulimit`` and fails if the Tcl script
+        contains ``FAIL_BUILD``. Returns the ``bin`` directory.
+    '''
+    bin_dir = os.path.join(root, 'Vivado', version, 'bin')
+    os.makedirs(bin_dir)
+    for tool, script in [('vivado', FAKE_VIVADO), ('bootgen', FAKE_BOOTGEN)]:
+        path = os.path.join(bin_dir, tool)
+        with open(path, 'w') as f:
+            f.write(script)
+        os.chmod(path, 0o755)
+    return bin_dir
+
+
+def get_toolchain_runs(bin_dir, log='runs'):
+    path = os.path.join(bin_dir, log)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return f.read().splitlines()
@@ -2,6 +2,32 @@ import re
 import argparse
 
 
+AXI_INTERFACES = {
+    'ps7': [
+        ('MAXIGP0', 'master'),
+        ('SAXIGP0', 'slave'),
+        ('SAXIHP0', 'slave_hp'),
+        ('SAXIACP', 'slave_acp'),
+    ],
+    'ps8': [
+        ('MAXIGP0', 'master'),
+        ('SAXIGP0', 'slave'),
+        ('SAXIACP', 'slave_acp'),
+    ],
+}
+
+LAYOUT_FUNCTIONS = {
+    'ps7': 'get_ps_layout',
+    'ps8': 'get_ps8_layout',
+}
+
+VHDL_DIRECTIONS = {
+    'in': 'input',
+    'out': 'output',
+    'inout': 'inout',
+}
+
+
 def to_width(s):
     if s == '':
         s = '0'
@@ -9,10 +35,14 @@ def to_width(s):
 
 
 class PsParser:
-    def __init__(self, ps8):
-        with open(ps8) as f:
+    def __init__(self, unisim, family='ps8'):
+        with open(unisim) as f:
             self.data = f.read()
-        self.ports = self.get_ports()
+        self.family = family
+        if unisim.endswith(('.vhd', '.vhdl')):
+            self.ports = self.get_vhdl_ports()
+        else:
+            self.ports = self.get_ports()
 
     def get_ports(self):
         expr = r'^ *(input|output|inout) (\[(.*):.*\] )?(\w*)'
@@ -20,8 +50,17 @@ class PsParser:
         ports = {p[-1]: (to_width(p[2]), p[0]) for p in ports}
         return ports
 
+    def get_vhdl_ports(self):
+        expr = r'^ *(\w+) *: *(inout|in|out) +std_u?logic(_vector *\((\d+) +downto +\d+\))?'
+        ports = re.findall(expr, self.data, re.MULTILINE | re.IGNORECASE)
+        ports = {
+            p[0]: (to_width(p[3]), VHDL_DIRECTIONS[p[1].lower()])
+            for p in ports
+        }
+        return ports
+
     def generate_ps_layout(self):
-        txt  = 'def get_ps8_layout():\n'
+        txt  = 'def {}():\n'.format(LAYOUT_FUNCTIONS[self.family])
         txt += '    ports = [\n'
         for k, (w, d) in self.ports.items():
             txt += '        ("{}", {}, "{}"),\n'.format(k, w, d)
@@ -33,7 +72,7 @@ class PsParser:
         return self.ports[port][0]
 
     def generate_axi_layout(self):
-        axis = [('MAXIGP0', 'master'), ('SAXIGP0', 'slave'), ('SAXIACP', 'slave_acp')]
+        axis = AXI_INTERFACES[self.family]
         txt = 'def get_axi_layout(axi, data_w=None, addr_w=None, id_w=None):\n'
         txt += '    assert data_w is None or data_w % 8 == 0\n'
         for axi_name, axi_type in axis:
@@ -47,7 +86,7 @@ class PsParser:
                 txt += '        if {} is None:\n'.format(var)
                 txt += '            {} = {}\n'.format(var, self.get_default_width(port))
             txt += '        return [\n'
-            for p, w, d in ps.get_interface(axi_name):
+            for p, w, d in self.get_interface(axi_name):
                 field = p.split(axi_name)[1]
                 if 'DATA' in field:
                     w = 'data_w'
@@ -68,10 +107,12 @@ class PsParser:
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('-i', help='PS8.v unisim file')
+    parser.add_argument('-i', help='PS7.v/PS7.vhd or PS8.v unisim file')
     parser.add_argument('-o', default=None, help='output file')
+    parser.add_argument('--family', choices=list(AXI_INTERFACES), default='ps8',
+                        help='processing system family')
     args = parser.parse_args()
-    ps = PsParser(args.i)
+    ps = PsParser(args.i, args.family)
 
     layout_file = ps.generate_ps_layout()
     layout_file += '\n\n'